@@ -6,24 +6,91 @@
 #ifndef AHPARSER_HPACK_H_
 #define AHPARSER_HPACK_H_
 
+#include <stdint.h>
+
 #include "msgbuf.h"
 #include "strlen.h"
 
+#define AHP_HPACK_DEFAULT_TABLE_SIZE 4096  // SETTINGS_HEADER_TABLE_SIZE 的初始值
+#define AHP_HPACK_ENTRY_OVERHEAD 32        // 动态表中每个条目额外计入的大小
+
 struct ahp_hpack;
 typedef struct ahp_hpack ahp_hpack_t;
 
 typedef int (*ahp_header_field_callback)(ahp_hpack_t* hpack, ahp_strlen_t* name, ahp_strlen_t* value);
 
+/**
+ * 动态表中的条目, 名称与值依次存放在 buffer 中
+ */
+typedef struct ahp_hpack_entry {
+  long offset;  // 名称的逻辑位置, 减去动态表的 offset 即为在 buffer 中的位置
+  uint32_t name_length;
+  uint32_t value_length;
+} ahp_hpack_entry_t;
+
+/**
+ * 动态表 (RFC 7541 2.3.2), 编码与解码共用
+ *
+ * entries 为环形队列, 从 entry_first 开始依次为由旧到新的 entry_count 个条目.
+ * 条目的名称与值按加入的顺序追加到 buffer, 淘汰最旧的条目时从头部释放
+ */
+typedef struct ahp_hpack_table {
+  ahp_hpack_entry_t* entries;
+  uint32_t entry_capacity;
+  uint32_t entry_first;
+  uint32_t entry_count;
+  ahp_msgbuf_t buffer;
+  long offset;  // buffer 中第一个字节的逻辑位置
+
+  size_t size;      // 按 RFC 7541 4.1 计算的动态表大小
+  size_t capacity;  // 动态表的最大大小, 由编码方以 dynamic table size update 调整
+} ahp_hpack_table_t;
+
 struct ahp_hpack {
   ahp_msgbuf_t name_buffer;
   ahp_msgbuf_t value_buffer;
 
+  ahp_hpack_table_t table;
+  size_t max_table_size;  // table.capacity 的上限, 即本端通告的 SETTINGS_HEADER_TABLE_SIZE
+  // 当前头块中已解码了 header field, 此后不能再出现 dynamic table size update (RFC 7541 4.2)
+  int field_decoded;
+
   void* data;
 
   // callbacks
   ahp_header_field_callback on_header_field;
 };
 
+/**
+ * 编码器, 每个连接一个, 按发送的顺序编码各个头块
+ */
+typedef struct ahp_hpack_encoder {
+  ahp_msgbuf_t name_buffer;  // 转为小写的名称
+
+  ahp_hpack_table_t table;
+  size_t table_size_limit;  // 本端愿意使用的动态表大小
+  size_t max_table_size;    // 对端通告的 SETTINGS_HEADER_TABLE_SIZE
+
+  // 动态表大小变化后, 须在下一个头块的开头告知对端 (RFC 7541 4.2)
+  int table_size_changed;
+  size_t min_table_size;  // 上次告知后动态表大小的最小值
+} ahp_hpack_encoder_t;
+
+int ahp_hpack_init(ahp_hpack_t* hpack, size_t max_table_size);
+void ahp_hpack_free(ahp_hpack_t* hpack);
+void ahp_hpack_set_max_table_size(ahp_hpack_t* hpack, size_t max_table_size);
+void ahp_hpack_begin_block(ahp_hpack_t* hpack);
 int ahp_hpack_decode(ahp_hpack_t* hpack, ahp_msgbuf_t* block);
 
+int ahp_hpack_encoder_init(ahp_hpack_encoder_t* encoder, size_t table_size_limit);
+void ahp_hpack_encoder_free(ahp_hpack_encoder_t* encoder);
+void ahp_hpack_encoder_set_max_table_size(ahp_hpack_encoder_t* encoder, size_t max_table_size);
+int ahp_hpack_encode_table_size_update(ahp_hpack_encoder_t* encoder, ahp_msgbuf_t* block);
+int ahp_hpack_encode_field(ahp_hpack_encoder_t* encoder,
+                           ahp_msgbuf_t* block,
+                           const char* name,
+                           size_t name_length,
+                           const char* value,
+                           size_t value_length);
+
 #endif  // AHPARSER_HPACK_H_
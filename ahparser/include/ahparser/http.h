@@ -6,6 +6,8 @@
 #ifndef AHPARSER_HTTP_H_
 #define AHPARSER_HTTP_H_
 
+#include "strlen.h"
+
 #ifdef __cplusplus
 extern "C" {
 #endif
@@ -24,6 +26,21 @@ typedef enum {
 
 typedef enum { AHP_VERSION_10 = 0, AHP_VERSION_11, AHP_VERSION_20 } ahp_version_t;
 
+/**
+ * RFC7541 静态表的大小, 静态表中的名称均为小写
+ */
+#define AHP_STATIC_INDEX_TABLE_SIZE 61
+
+/**
+ * 查找 header 名称 (不区分大小写) 在静态表中首次出现的序号, 不存在时返回 0
+ */
+int ahp_static_header_index(const char* name, size_t len);
+
+/**
+ * 静态表中序号为 index 的 header 名称, 序号无效时返回 NULL
+ */
+const ahp_strlen_t* ahp_static_header_name(int index);
+
 #ifdef __cplusplus
 }
 #endif
@@ -19,6 +19,7 @@ typedef struct ahp_msgbuf {
 
 int ahp_msgbuf_init(ahp_msgbuf_t* buf, long size);
 void ahp_msgbuf_free(ahp_msgbuf_t* buf);
+int ahp_msgbuf_reserve(ahp_msgbuf_t* buf, size_t len);
 int ahp_msgbuf_append(ahp_msgbuf_t* buf, const char* data, size_t len);
 
 static inline int ahp_msgbuf_appendc(ahp_msgbuf_t* buf, char ch) {
@@ -35,6 +36,21 @@ static inline long ahp_msgbuf_length(ahp_msgbuf_t* buf) {
   return buf->end - buf->start;
 }
 
+/**
+ * 缓冲区尾部的可写空间, 配合 ahp_msgbuf_reserve/ahp_msgbuf_commit 实现外部直接写入 (如 recv_into)
+ */
+static inline char* ahp_msgbuf_tail(ahp_msgbuf_t* buf) {
+  return buf->base + buf->end;
+}
+
+static inline long ahp_msgbuf_tail_length(ahp_msgbuf_t* buf) {
+  return buf->size - buf->end;
+}
+
+static inline void ahp_msgbuf_commit(ahp_msgbuf_t* buf, long size) {
+  buf->end += size;
+}
+
 static inline void ahp_msgbuf_reset(ahp_msgbuf_t* buf) {
   buf->start = buf->end = 0;
 }
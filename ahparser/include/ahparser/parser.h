@@ -27,6 +27,22 @@ typedef enum ahp_parser_state {
   AHP_PARSER_STATE_PARSE_CHUNKED_TRAILER
 } ahp_parser_state_t;
 
+/**
+ * 请求头最大数量
+ */
+#define AHP_MAX_HEADERS 128
+
+/**
+ * 请求头在报文头块中的位置, 偏移量相对于 header_block
+ */
+typedef struct ahp_header_span {
+  uint32_t name_offset;
+  uint32_t name_length;
+  uint32_t value_offset;
+  uint32_t value_length;
+  uint32_t name_index;  // 名称在静态表中的序号, 0 表示不在静态表中
+} ahp_header_span_t;
+
 struct ahp_parser;
 typedef struct ahp_parser ahp_parser_t;
 
@@ -44,6 +60,16 @@ typedef int (*ahp_message_body_callback)(ahp_parser_t* parser, ahp_strlen_t* bod
 struct ahp_parser {
   ahp_parser_state_t state;
   long expected_length;
+  long body_length;  // 已接收的 body 长度
+
+  // 报文大小限制, 0 表示不限制. 超出限制时返回:
+  //   ENAMETOOLONG: 请求行中的 uri 超长 (414)
+  //   EMSGSIZE: 请求行与请求头超长, 或请求头数量超出 (431)
+  //   EFBIG: body 超长 (413)
+  long max_uri_length;
+  long max_header_size;
+  int max_header_count;
+  long max_body_size;
 
   void* data;
 
@@ -52,10 +78,24 @@ struct ahp_parser {
   ahp_request_line_ext_callback on_request_line_ext;
   ahp_message_header_callback on_message_header;
   ahp_message_body_callback on_message_body;
+
+  // 请求头表, ahp_parse_request 成功返回后有效, 直到 msgbuf 被修改
+  // 未设置 on_message_header 时, 仅记录请求头的位置, 不逐个回调
+  const char* header_block;
+  long header_block_length;
+  int header_count;
+  ahp_header_span_t headers[AHP_MAX_HEADERS];
+  // 报文头块不完整时, 块中已解码的 header 的总长度, 下次从此处继续解码
+  long header_parsed_length;
 };
 
 static inline void ahp_parse_reset(ahp_parser_t* parser) {
   parser->state = AHP_PARSER_STATE_IDLE;
+  parser->body_length = 0;
+  parser->header_block = NULL;
+  parser->header_block_length = 0;
+  parser->header_count = 0;
+  parser->header_parsed_length = 0;
 }
 
 int ahp_parse_request(ahp_parser_t* parser, ahp_msgbuf_t* msg);
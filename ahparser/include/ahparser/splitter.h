@@ -15,6 +15,11 @@
 extern "C" {
 #endif
 
+/**
+ * SETTINGS_MAX_FRAME_SIZE 的初始值
+ */
+#define AHP_DEFAULT_MAX_FRAME_SIZE 16384
+
 typedef enum ahp_splitter_state {
   AHP_SPLITTER_STATE_IDLE,
   AHP_SPLITTER_STATE_WAIT_CONTINUATION_FRAME
@@ -30,7 +35,8 @@ typedef enum ahp_frame_type {
   AHP_FRAME_TYPE_PING = 0x06,
   AHP_FRAME_TYPE_GOWAY = 0x07,
   AHP_FRAME_TYPE_WINDOW_UPDATE = 0x08,
-  AHP_FRAME_TYPE_CONTINUAION = 0x09
+  AHP_FRAME_TYPE_CONTINUAION = 0x09,
+  AHP_FRAME_TYPE_PRIORITY_UPDATE = 0x10  // RFC 9218
 } ahp_frame_type_t;
 
 typedef enum ahp_frame_flag {
@@ -73,9 +79,16 @@ typedef int (*ahp_data_frame_callback)(ahp_splitter_t* splitter, void* frame, ah
 typedef int (*ahp_headers_frame_callback)(ahp_splitter_t* splitter, void* frame, ahp_strlen_t* header_block_fragment);
 typedef int (*aph_settings_frame_callback)(ahp_splitter_t* splitter, void* frame, uint16_t identifier, uint32_t value);
 typedef int (*ahp_window_update_frame_callback)(ahp_splitter_t* splitter, void* frame, uint32_t increment);
+typedef int (*ahp_rst_stream_frame_callback)(ahp_splitter_t* splitter, void* frame, uint32_t error_code);
+typedef int (*ahp_ping_frame_callback)(ahp_splitter_t* splitter, void* frame, ahp_strlen_t* opaque_data);
+typedef int (*ahp_priority_update_frame_callback)(ahp_splitter_t* splitter,
+                                                  void* frame,
+                                                  uint32_t prioritized_stream_id,
+                                                  ahp_strlen_t* priority_field_value);
 
 struct ahp_splitter {
   ahp_splitter_state_t state;
+  uint32_t max_frame_size;  // 帧负载的最大长度, 0 表示不限制
 
   void* data;
 
@@ -88,10 +101,25 @@ struct ahp_splitter {
   ahp_headers_frame_callback on_headers_frame;
   aph_settings_frame_callback on_settings_frame;
   ahp_window_update_frame_callback on_window_update_frame;
+  ahp_rst_stream_frame_callback on_rst_stream_frame;
+  ahp_ping_frame_callback on_ping_frame;
+  ahp_priority_update_frame_callback on_priority_update_frame;
 };
 
 int ahp_split_frame(ahp_splitter_t* splitter, ahp_msgbuf_t* msg);
 
+/**
+ * 帧头的长度
+ */
+#define AHP_FRAME_HEADER_SIZE 9
+
+/**
+ * 将 9 字节的帧头追加到 msg 尾部, 负载由调用方随后追加或另行发送
+ *
+ * @return 0 成功, ENOMEM 内存不足
+ */
+int ahp_append_frame_header(ahp_msgbuf_t* msg, uint32_t length, uint8_t type, uint8_t flags, uint32_t identifier);
+
 #ifdef __cplusplus
 }
 #endif
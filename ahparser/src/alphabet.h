@@ -30,6 +30,13 @@ extern const ahp_alphabet_t AHP_RULES_URL;
 #define AHP_RULES_DQ 34   // "
 #define AHP_RULES_DOT 46  // .
 
+/**
+ * ASCII 字母转换为小写
+ */
+static inline unsigned char to_lower(unsigned char ch) {
+  return (ch >= 'A' && ch <= 'Z') ? ch + ('a' - 'A') : ch;
+}
+
 #ifdef __cplusplus
 }
 #endif
@@ -11,37 +11,55 @@
 
 #include <errno.h>
 #include <stdint.h>
+#include <stdlib.h>
+#include <string.h>
 
+#include "alphabet.h"
 #include "huffman.h"
 #include "index.h"
 #include "strbuf.h"
 
 int MAX_OCTET_INTEGER[5] = {0xFF, 0x7F, 0x3F, 0x1F, 0x0F};
 
+#define HPACK_INTEGER_EAGAIN -1
+#define HPACK_INTEGER_OVERFLOW -2
+
+static ahp_strlen_t HPACK_EMPTY_VALUE = {.str = "", .len = 0};
+
+/**
+ * 解码整数 (RFC 7541 5.1), prefix_size 为首字节中标志位的个数
+ *
+ * 数据不完整时返回 HPACK_INTEGER_EAGAIN, 超过 2^28 时返回 HPACK_INTEGER_OVERFLOW
+ */
 int decode_integer(strbuf_t* block, size_t prefix_size) {
   int octet = strbuf_pop(block);
   if (octet == EOF) {
-    return -1;
+    return HPACK_INTEGER_EAGAIN;
   }
   int integer = octet & MAX_OCTET_INTEGER[prefix_size];
   if (integer < MAX_OCTET_INTEGER[prefix_size]) {
     return integer;
   }
-  int base = 1;
-  for (;;) {
+  for (int shift = 0;; shift += 7) {
     octet = strbuf_pop(block);
     if (octet == EOF) {
-      return -1;
+      return HPACK_INTEGER_EAGAIN;
     }
-    integer += (octet & 0x7F) * base;
-    if (octet & 0x80 != 0x80) {
+    if (shift > 21) {
+      return HPACK_INTEGER_OVERFLOW;
+    }
+    integer += (octet & 0x7F) << shift;
+    if ((octet & 0x80) == 0) {
       break;
     }
-    base *= 128;
   }
   return integer;
 }
 
+static inline int integer_error(int integer) {
+  return integer == HPACK_INTEGER_EAGAIN ? EAGAIN : EBADMSG;
+}
+
 int ahp_decode_huffman(strbuf_t* block, int length, ahp_msgbuf_t* buffer, ahp_strlen_t* string) {
   ahp_msgbuf_reset(buffer);
 
@@ -110,7 +128,7 @@ int ahp_decode_string(strbuf_t* block, ahp_msgbuf_t* buffer, ahp_strlen_t* strin
   int octet = strbuf_peek(block);
   int length = decode_integer(block, 1);
   if (length < 0) {
-    return EAGAIN;
+    return integer_error(length);
   }
   if ((octet & 0x80) == 0x80) {
     // huffman encoded
@@ -123,29 +141,145 @@ int ahp_decode_string(strbuf_t* block, ahp_msgbuf_t* buffer, ahp_strlen_t* strin
   return 0;
 }
 
-int ahp_decode_indexed_header(ahp_hpack_t* hpack, strbuf_t* header_block, ahp_strlen_t* name, ahp_strlen_t* value) {
-  int index = decode_integer(header_block, 1);
-  if (index < 0) {
-    return EAGAIN;
+static int ahp_hpack_table_init(ahp_hpack_table_t* table, size_t capacity) {
+  int err = ahp_msgbuf_init(&table->buffer, 1024);
+  if (err != 0) {
+    return err;
+  }
+  table->entries = NULL;
+  table->entry_capacity = table->entry_first = table->entry_count = 0;
+  table->offset = 0;
+  table->size = 0;
+  table->capacity = capacity;
+  return 0;
+}
+
+static void ahp_hpack_table_free(ahp_hpack_table_t* table) {
+  ahp_msgbuf_free(&table->buffer);
+  free(table->entries);
+  table->entries = NULL;
+  table->entry_capacity = table->entry_first = table->entry_count = 0;
+  table->size = 0;
+}
+
+/**
+ * 从动态表中淘汰最旧的条目, 直到动态表的大小不超过 limit
+ */
+static void ahp_hpack_table_evict(ahp_hpack_table_t* table, size_t limit) {
+  while (table->size > limit) {
+    ahp_hpack_entry_t* entry = &table->entries[table->entry_first];
+    size_t length = entry->name_length + entry->value_length;
+    ahp_msgbuf_forward(&table->buffer, length);
+    table->offset += length;
+    table->size -= length + AHP_HPACK_ENTRY_OVERHEAD;
+    table->entry_first = (table->entry_first + 1) % table->entry_capacity;
+    table->entry_count--;
+  }
+}
+
+/**
+ * 加入新条目 (RFC 7541 4.4), name 与 value 不能指向动态表
+ */
+static int ahp_hpack_table_add(ahp_hpack_table_t* table,
+                               const char* name,
+                               size_t name_length,
+                               const char* value,
+                               size_t value_length) {
+  size_t size = name_length + value_length + AHP_HPACK_ENTRY_OVERHEAD;
+  if (size > table->capacity) {
+    // 大于动态表的条目使动态表清空, 不是错误
+    ahp_hpack_table_evict(table, 0);
+    return 0;
+  }
+  ahp_hpack_table_evict(table, table->capacity - size);
+
+  if (table->entry_count == table->entry_capacity) {
+    // 环形队列已满, 扩充并将条目按由旧到新的顺序移到开头
+    uint32_t capacity = table->entry_capacity > 0 ? table->entry_capacity * 2 : 16;
+    ahp_hpack_entry_t* entries = (ahp_hpack_entry_t*)malloc(capacity * sizeof(ahp_hpack_entry_t));
+    if (entries == NULL) {
+      return ENOMEM;
+    }
+    for (uint32_t i = 0; i < table->entry_count; i++) {
+      entries[i] = table->entries[(table->entry_first + i) % table->entry_capacity];
+    }
+    free(table->entries);
+    table->entries = entries;
+    table->entry_capacity = capacity;
+    table->entry_first = 0;
+  }
+
+  int err = ahp_msgbuf_reserve(&table->buffer, name_length + value_length);
+  if (err != 0) {
+    return err;
   }
+  long offset = table->offset + ahp_msgbuf_length(&table->buffer);
+  ahp_msgbuf_append(&table->buffer, name, name_length);
+  ahp_msgbuf_append(&table->buffer, value, value_length);
+
+  ahp_hpack_entry_t* entry = &table->entries[(table->entry_first + table->entry_count) % table->entry_capacity];
+  entry->offset = offset;
+  entry->name_length = name_length;
+  entry->value_length = value_length;
+  table->entry_count++;
+  table->size += size;
+
+  return 0;
+}
+
+/**
+ * 动态表中的第 dynamic_index 个条目, 从 1 开始, 1 为最新的条目
+ */
+static inline ahp_hpack_entry_t* ahp_hpack_table_entry(ahp_hpack_table_t* table, uint32_t dynamic_index) {
+  return &table->entries[(table->entry_first + table->entry_count - dynamic_index) % table->entry_capacity];
+}
+
+static inline char* ahp_hpack_table_name(ahp_hpack_table_t* table, ahp_hpack_entry_t* entry) {
+  return ahp_msgbuf_data(&table->buffer) + (entry->offset - table->offset);
+}
+
+/**
+ * 按序号查找静态表与动态表 (RFC 7541 2.3.3), value 为 NULL 时只取名称
+ */
+static int ahp_hpack_lookup(ahp_hpack_t* hpack, int index, ahp_strlen_t* name, ahp_strlen_t* value) {
   if (index <= 0) {
     return EBADMSG;
   }
-  if (index <= STATIC_INDEX_TABLE_SIZE) {
+
+  if (index <= AHP_STATIC_INDEX_TABLE_SIZE) {
     // static table
     ahp_header_index_t* index_item = &ahp_static_index_table[index];
-    if (index_item->value == NULL) {
-      return EBADMSG;
-    }
     *name = *index_item->name;
-    *value = *index_item->value;
-  } else {
-    // dynamic table
+    if (value != NULL) {
+      *value = index_item->value != NULL ? *index_item->value : HPACK_EMPTY_VALUE;
+    }
+    return 0;
+  }
+
+  // dynamic table: 序号 AHP_STATIC_INDEX_TABLE_SIZE + 1 为最新的条目
+  uint32_t dynamic_index = index - AHP_STATIC_INDEX_TABLE_SIZE;
+  if (dynamic_index > hpack->table.entry_count) {
     return EBADMSG;
   }
+  ahp_hpack_entry_t* entry = ahp_hpack_table_entry(&hpack->table, dynamic_index);
+  char* str = ahp_hpack_table_name(&hpack->table, entry);
+  name->str = str;
+  name->len = entry->name_length;
+  if (value != NULL) {
+    value->str = str + entry->name_length;
+    value->len = entry->value_length;
+  }
   return 0;
 }
 
+int ahp_decode_indexed_header(ahp_hpack_t* hpack, strbuf_t* header_block, ahp_strlen_t* name, ahp_strlen_t* value) {
+  int index = decode_integer(header_block, 1);
+  if (index < 0) {
+    return integer_error(index);
+  }
+  return ahp_hpack_lookup(hpack, index, name, value);
+}
+
 int ahp_decode_literal_header(ahp_hpack_t* hpack,
                               strbuf_t* header_block,
                               size_t prefix_size,
@@ -153,14 +287,16 @@ int ahp_decode_literal_header(ahp_hpack_t* hpack,
                               ahp_strlen_t* value) {
   int err = 0;
   int index = decode_integer(header_block, prefix_size);
+  if (index < 0) {
+    return integer_error(index);
+  }
   if (index > 0) {
-    if (index <= STATIC_INDEX_TABLE_SIZE) {
-      // static table
-      ahp_header_index_t* index_item = &ahp_static_index_table[index];
-      *name = *index_item->name;
-    } else {
-      // dynamic table
-      err = EBADMSG;
+    err = ahp_hpack_lookup(hpack, index, name, NULL);
+    if (err == 0 && index > AHP_STATIC_INDEX_TABLE_SIZE) {
+      // 动态表中的名称在加入新条目时可能被移动或淘汰, 复制一份
+      ahp_msgbuf_reset(&hpack->name_buffer);
+      err = ahp_msgbuf_append(&hpack->name_buffer, name->str, name->len);
+      name->str = ahp_msgbuf_data(&hpack->name_buffer);
     }
   } else {
     err = ahp_decode_string(header_block, &hpack->name_buffer, name);
@@ -171,6 +307,64 @@ int ahp_decode_literal_header(ahp_hpack_t* hpack,
   return err;
 }
 
+int ahp_decode_table_size_update(ahp_hpack_t* hpack, strbuf_t* header_block) {
+  int size = decode_integer(header_block, 3);
+  if (size < 0) {
+    return integer_error(size);
+  }
+  if ((size_t)size > hpack->max_table_size) {
+    // 超过本端通告的 SETTINGS_HEADER_TABLE_SIZE
+    return EBADMSG;
+  }
+  hpack->table.capacity = size;
+  ahp_hpack_table_evict(&hpack->table, size);
+  return 0;
+}
+
+int ahp_hpack_init(ahp_hpack_t* hpack, size_t max_table_size) {
+  int err = ahp_msgbuf_init(&hpack->name_buffer, 64);
+  if (err == 0) {
+    err = ahp_msgbuf_init(&hpack->value_buffer, 256);
+  }
+  if (err == 0) {
+    err = ahp_hpack_table_init(&hpack->table, max_table_size);
+  }
+  if (err != 0) {
+    ahp_hpack_free(hpack);
+    return err;
+  }
+
+  hpack->max_table_size = max_table_size;
+  hpack->field_decoded = 0;
+
+  return 0;
+}
+
+void ahp_hpack_free(ahp_hpack_t* hpack) {
+  ahp_msgbuf_free(&hpack->name_buffer);
+  ahp_msgbuf_free(&hpack->value_buffer);
+  ahp_hpack_table_free(&hpack->table);
+}
+
+/**
+ * 本端通告新的 SETTINGS_HEADER_TABLE_SIZE. 调小时立即收缩动态表,
+ * 调大时动态表的大小不变, 由编码方以 dynamic table size update 使用新的上限
+ */
+void ahp_hpack_set_max_table_size(ahp_hpack_t* hpack, size_t max_table_size) {
+  hpack->max_table_size = max_table_size;
+  if (hpack->table.capacity > max_table_size) {
+    hpack->table.capacity = max_table_size;
+    ahp_hpack_table_evict(&hpack->table, max_table_size);
+  }
+}
+
+/**
+ * 开始解码新的头块. 头块可以分为多次解码 (HEADERS 与 CONTINUATION 帧), 只在头块开始时调用
+ */
+void ahp_hpack_begin_block(ahp_hpack_t* hpack) {
+  hpack->field_decoded = 0;
+}
+
 int ahp_hpack_decode(ahp_hpack_t* hpack, ahp_msgbuf_t* block) {
   int err = 0;
 
@@ -186,6 +380,7 @@ int ahp_hpack_decode(ahp_hpack_t* hpack, ahp_msgbuf_t* block) {
     }
 
     ahp_strlen_t name, value;
+    int is_field = 1;
     if (octet & 0x80) {
       // indexed header field
       err = ahp_decode_indexed_header(hpack, &header_block, &name, &value);
@@ -194,10 +389,12 @@ int ahp_hpack_decode(ahp_hpack_t* hpack, ahp_msgbuf_t* block) {
       err = ahp_decode_literal_header(hpack, &header_block, 2, &name, &value);
       if (err == 0) {
         // add new index
+        err = ahp_hpack_table_add(&hpack->table, name.str, name.len, value.str, value.len);
       }
     } else if (octet & 0x20) {
-      // dynamic table size update
-      return EBADMSG;
+      // dynamic table size update, 只能出现在头块的开头, 即第一个 header field 之前
+      err = hpack->field_decoded ? EBADMSG : ahp_decode_table_size_update(hpack, &header_block);
+      is_field = 0;
     } else if (octet & 0x10) {
       // literal header field never-indexed
       err = ahp_decode_literal_header(hpack, &header_block, 4, &name, &value);
@@ -206,7 +403,8 @@ int ahp_hpack_decode(ahp_hpack_t* hpack, ahp_msgbuf_t* block) {
       err = ahp_decode_literal_header(hpack, &header_block, 4, &name, &value);
     }
 
-    if (err == 0) {
+    if (err == 0 && is_field) {
+      hpack->field_decoded = 1;
       err = hpack->on_header_field(hpack, &name, &value);
     }
 
@@ -221,3 +419,275 @@ int ahp_hpack_decode(ahp_hpack_t* hpack, ahp_msgbuf_t* block) {
 
   return err;
 }
+
+/**
+ * 编码整数 (RFC 7541 5.1), prefix 为首字节中的标志位, prefix_size 为标志位的个数
+ */
+static int encode_integer(ahp_msgbuf_t* block, uint8_t prefix, size_t prefix_size, size_t integer) {
+  int err = ahp_msgbuf_reserve(block, 6);
+  if (err != 0) {
+    return err;
+  }
+  unsigned char* pos = (unsigned char*)ahp_msgbuf_tail(block);
+  unsigned char* start = pos;
+  size_t max_prefix = MAX_OCTET_INTEGER[prefix_size];
+  if (integer < max_prefix) {
+    *pos++ = prefix | integer;
+  } else {
+    *pos++ = prefix | max_prefix;
+    for (integer -= max_prefix; integer >= 0x80; integer >>= 7) {
+      *pos++ = 0x80 | (integer & 0x7F);
+    }
+    *pos++ = integer;
+  }
+  ahp_msgbuf_commit(block, pos - start);
+  return 0;
+}
+
+static size_t huffman_encoded_length(const unsigned char* str, size_t len) {
+  size_t bits = 0;
+  for (size_t i = 0; i < len; i++) {
+    bits += ahp_huffman_encode_table[str[i]].len;
+  }
+  return (bits + 7) / 8;
+}
+
+/**
+ * 编码字符串 (RFC 7541 5.2), huffman 编码更短时使用 huffman 编码
+ */
+static int encode_string(ahp_msgbuf_t* block, const char* str, size_t len) {
+  const unsigned char* data = (const unsigned char*)str;
+  size_t length = huffman_encoded_length(data, len);
+  if (length >= len) {
+    int err = encode_integer(block, 0x00, 1, len);
+    if (err == 0) {
+      err = ahp_msgbuf_append(block, str, len);
+    }
+    return err;
+  }
+
+  int err = encode_integer(block, 0x80, 1, length);
+  if (err == 0) {
+    err = ahp_msgbuf_reserve(block, length);
+  }
+  if (err != 0) {
+    return err;
+  }
+  unsigned char* pos = (unsigned char*)ahp_msgbuf_tail(block);
+  uint64_t bits = 0;  // 只使用低 bits_count 位
+  int bits_count = 0;
+  for (size_t i = 0; i < len; i++) {
+    huffman_code_t* code = &ahp_huffman_encode_table[data[i]];
+    bits = (bits << code->len) | (uint64_t)code->code;
+    bits_count += code->len;
+    while (bits_count >= 8) {
+      bits_count -= 8;
+      *pos++ = (unsigned char)(bits >> bits_count);
+    }
+  }
+  if (bits_count > 0) {
+    // 以 EOS 的前缀 (全 1) 填充
+    *pos++ = (unsigned char)((bits << (8 - bits_count)) | (0xFF >> bits_count));
+  }
+  ahp_msgbuf_commit(block, length);
+  return 0;
+}
+
+int ahp_hpack_encoder_init(ahp_hpack_encoder_t* encoder, size_t table_size_limit) {
+  int err = ahp_msgbuf_init(&encoder->name_buffer, 64);
+  if (err == 0) {
+    // 对端未通告 SETTINGS_HEADER_TABLE_SIZE 前, 动态表大小为初始值
+    size_t capacity = AHP_HPACK_DEFAULT_TABLE_SIZE;
+    if (table_size_limit < capacity) {
+      capacity = table_size_limit;
+    }
+    err = ahp_hpack_table_init(&encoder->table, capacity);
+    // 小于初始值时, 须在第一个头块中告知对端
+    encoder->table_size_changed = capacity != AHP_HPACK_DEFAULT_TABLE_SIZE;
+    encoder->min_table_size = capacity;
+  }
+  if (err != 0) {
+    ahp_hpack_encoder_free(encoder);
+    return err;
+  }
+
+  encoder->table_size_limit = table_size_limit;
+  encoder->max_table_size = AHP_HPACK_DEFAULT_TABLE_SIZE;
+
+  return 0;
+}
+
+void ahp_hpack_encoder_free(ahp_hpack_encoder_t* encoder) {
+  ahp_msgbuf_free(&encoder->name_buffer);
+  ahp_hpack_table_free(&encoder->table);
+}
+
+/**
+ * 对端通告新的 SETTINGS_HEADER_TABLE_SIZE, 动态表大小取其与 table_size_limit 中的较小值
+ */
+void ahp_hpack_encoder_set_max_table_size(ahp_hpack_encoder_t* encoder, size_t max_table_size) {
+  encoder->max_table_size = max_table_size;
+  size_t capacity = max_table_size < encoder->table_size_limit ? max_table_size : encoder->table_size_limit;
+  if (capacity == encoder->table.capacity) {
+    return;
+  }
+  encoder->table.capacity = capacity;
+  ahp_hpack_table_evict(&encoder->table, capacity);
+  if (!encoder->table_size_changed || capacity < encoder->min_table_size) {
+    encoder->min_table_size = capacity;
+  }
+  encoder->table_size_changed = 1;
+}
+
+/**
+ * 在头块的开头告知对端动态表大小的变化 (RFC 7541 4.2), 没有变化时不输出
+ *
+ * 两次告知之间动态表曾经缩小时, 先告知其间的最小值, 再告知当前值
+ */
+int ahp_hpack_encode_table_size_update(ahp_hpack_encoder_t* encoder, ahp_msgbuf_t* block) {
+  if (!encoder->table_size_changed) {
+    return 0;
+  }
+  int err = 0;
+  if (encoder->min_table_size < encoder->table.capacity) {
+    err = encode_integer(block, 0x20, 3, encoder->min_table_size);
+  }
+  if (err == 0) {
+    err = encode_integer(block, 0x20, 3, encoder->table.capacity);
+  }
+  if (err == 0) {
+    encoder->table_size_changed = 0;
+  }
+  return err;
+}
+
+/**
+ * 敏感的 header 以 never indexed 编码, 不进入动态表, 中间节点也不得将其压缩
+ */
+static inline int is_sensitive_header(int name_index) {
+  switch (name_index) {
+    case 23:  // authorization
+    case 32:  // cookie
+    case 49:  // proxy-authorization
+    case 55:  // set-cookie
+      return 1;
+    default:
+      return 0;
+  }
+}
+
+/**
+ * 每个响应都不同的 header, 加入动态表只会挤出其它条目
+ */
+static inline int is_unique_header(int name_index) {
+  switch (name_index) {
+    case 28:  // content-length
+    case 34:  // etag
+    case 46:  // location
+      return 1;
+    default:
+      return 0;
+  }
+}
+
+/**
+ * 查找与 name, value 完全匹配的条目, 返回其序号, 没有时返回 0.
+ * name_index 为名称匹配的条目的序号, 优先使用静态表, 没有时为 0
+ */
+static int ahp_hpack_encoder_find(ahp_hpack_encoder_t* encoder,
+                                  const char* name,
+                                  size_t name_length,
+                                  const char* value,
+                                  size_t value_length,
+                                  int* name_index) {
+  // static table: 相同名称的条目相邻
+  int index = ahp_static_header_index(name, name_length);
+  *name_index = index;
+  if (index > 0) {
+    ahp_strlen_t* static_name = ahp_static_index_table[index].name;
+    for (; index <= AHP_STATIC_INDEX_TABLE_SIZE && ahp_static_index_table[index].name == static_name; index++) {
+      ahp_strlen_t* static_value = ahp_static_index_table[index].value;
+      if (static_value != NULL && (size_t)static_value->len == value_length &&
+          memcmp(static_value->str, value, value_length) == 0) {
+        return index;
+      }
+    }
+  }
+
+  // dynamic table: 由新到旧
+  ahp_hpack_table_t* table = &encoder->table;
+  for (uint32_t i = 1; i <= table->entry_count; i++) {
+    ahp_hpack_entry_t* entry = ahp_hpack_table_entry(table, i);
+    if (entry->name_length != name_length) {
+      continue;
+    }
+    char* str = ahp_hpack_table_name(table, entry);
+    if (memcmp(str, name, name_length) != 0) {
+      continue;
+    }
+    if (entry->value_length == value_length && memcmp(str + name_length, value, value_length) == 0) {
+      return AHP_STATIC_INDEX_TABLE_SIZE + i;
+    }
+    if (*name_index == 0) {
+      *name_index = AHP_STATIC_INDEX_TABLE_SIZE + i;
+    }
+  }
+
+  return 0;
+}
+
+/**
+ * 编码一个 header, 名称转为小写
+ *
+ * 完全匹配静态表或动态表中的条目时以序号编码; 否则以字面量编码, 名称尽量以序号编码.
+ * 敏感的 header 以 never indexed 编码, 每个响应都不同或较大的 header 不加入动态表
+ */
+int ahp_hpack_encode_field(ahp_hpack_encoder_t* encoder,
+                           ahp_msgbuf_t* block,
+                           const char* name,
+                           size_t name_length,
+                           const char* value,
+                           size_t value_length) {
+  ahp_msgbuf_reset(&encoder->name_buffer);
+  int err = ahp_msgbuf_reserve(&encoder->name_buffer, name_length);
+  if (err != 0) {
+    return err;
+  }
+  char* lower = ahp_msgbuf_tail(&encoder->name_buffer);
+  for (size_t i = 0; i < name_length; i++) {
+    lower[i] = (char)to_lower((unsigned char)name[i]);
+  }
+  ahp_msgbuf_commit(&encoder->name_buffer, name_length);
+
+  int name_index;
+  int index = ahp_hpack_encoder_find(encoder, lower, name_length, value, value_length, &name_index);
+  if (index > 0) {
+    // indexed header field
+    return encode_integer(block, 0x80, 1, index);
+  }
+
+  int static_index = name_index <= AHP_STATIC_INDEX_TABLE_SIZE ? name_index : 0;
+  size_t size = name_length + value_length + AHP_HPACK_ENTRY_OVERHEAD;
+  int indexing = 0;
+  if (is_sensitive_header(static_index)) {
+    // literal header field never-indexed
+    err = encode_integer(block, 0x10, 4, name_index);
+  } else if (is_unique_header(static_index) || size > encoder->table.capacity / 4 * 3) {
+    // literal header field without indexing
+    err = encode_integer(block, 0x00, 4, name_index);
+  } else {
+    // literal header field with incremental indexing
+    err = encode_integer(block, 0x40, 2, name_index);
+    indexing = 1;
+  }
+  if (err == 0 && name_index == 0) {
+    err = encode_string(block, lower, name_length);
+  }
+  if (err == 0) {
+    err = encode_string(block, value, value_length);
+  }
+  if (err == 0 && indexing) {
+    err = ahp_hpack_table_add(&encoder->table, lower, name_length, value, value_length);
+  }
+  return err;
+}
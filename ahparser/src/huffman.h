@@ -16,6 +16,7 @@ typedef struct huffman_code {
 } huffman_code_t;
 
 extern huffman_code_t* ahp_huffman_decode_table[15];
+extern huffman_code_t ahp_huffman_encode_table[257];
 
 #ifdef __cplusplus
 }
@@ -9,6 +9,8 @@
  */
 #include "index.h"
 
+#include "alphabet.h"
+
 ahp_strlen_t HPACK_FIELD_AUTHORITY = {.str = ":authority", .len = 10};
 ahp_strlen_t HPACK_FIELD_METHOD = {.str = ":method", .len = 7};
 ahp_strlen_t HPACK_FIELD_PATH = {.str = ":path", .len = 5};
@@ -17,7 +19,7 @@ ahp_strlen_t HPACK_FIELD_STATUS = {.str = ":status", .len = 7};
 ahp_strlen_t HPACK_FIELD_ACCEPT_CHARSET = {.str = "accept-charset", .len = 14};
 ahp_strlen_t HPACK_FIELD_ACCEPT_ENCODING = {.str = "accept-encoding", .len = 15};
 ahp_strlen_t HPACK_FIELD_ACCEPT_LANGUAGE = {.str = "accept-language", .len = 15};
-ahp_strlen_t HPACK_FIELD_ACCEPT_RANGE = {.str = "accept-range", .len = 12};
+ahp_strlen_t HPACK_FIELD_ACCEPT_RANGES = {.str = "accept-ranges", .len = 13};
 ahp_strlen_t HPACK_FIELD_ACCEPT = {.str = "accept", .len = 6};
 ahp_strlen_t HPACK_FIELD_ACCESS_CONTROL_ALLOW_ORIGIN = {.str = "access-control-allow-origin", .len = 27};
 ahp_strlen_t HPACK_FIELD_AGE = {.str = "age", .len = 3};
@@ -73,13 +75,13 @@ ahp_strlen_t HPACK_VALUE_204 = {.str = "204", .len = 3};
 ahp_strlen_t HPACK_VALUE_206 = {.str = "206", .len = 3};
 ahp_strlen_t HPACK_VALUE_304 = {.str = "304", .len = 3};
 ahp_strlen_t HPACK_VALUE_400 = {.str = "400", .len = 3};
-ahp_strlen_t HPACK_VALUE_404 = {.str = "405", .len = 3};
+ahp_strlen_t HPACK_VALUE_404 = {.str = "404", .len = 3};
 ahp_strlen_t HPACK_VALUE_500 = {.str = "500", .len = 3};
-ahp_strlen_t HPACK_VALUE_GZIP_DEFALTE = {.str = "gzip, defalte", .len = 13};
+ahp_strlen_t HPACK_VALUE_GZIP_DEFLATE = {.str = "gzip, deflate", .len = 13};
 
-const size_t STATIC_INDEX_TABLE_SIZE = 61;
+const size_t STATIC_INDEX_TABLE_SIZE = AHP_STATIC_INDEX_TABLE_SIZE;
 
-ahp_header_index_t ahp_static_index_table[STATIC_INDEX_TABLE_SIZE + 1] = {
+ahp_header_index_t ahp_static_index_table[AHP_STATIC_INDEX_TABLE_SIZE + 1] = {
     /*  0 */ {.name = NULL, .value = NULL},
     /*  1 */ {.name = &HPACK_FIELD_AUTHORITY, .value = NULL},
     /*  2 */ {.name = &HPACK_FIELD_METHOD, .value = &HPACK_VALUE_GET},
@@ -91,14 +93,14 @@ ahp_header_index_t ahp_static_index_table[STATIC_INDEX_TABLE_SIZE + 1] = {
     /*  8 */ {.name = &HPACK_FIELD_STATUS, .value = &HPACK_VALUE_200},
     /*  9 */ {.name = &HPACK_FIELD_STATUS, .value = &HPACK_VALUE_204},
     /* 10 */ {.name = &HPACK_FIELD_STATUS, .value = &HPACK_VALUE_206},
-    /* 11 */ {.name = &HPACK_FIELD_STATUS, .value = &HPACK_VALUE_400},
-    /* 12 */ {.name = &HPACK_FIELD_STATUS, .value = &HPACK_VALUE_404},
-    /* 13 */ {.name = &HPACK_FIELD_STATUS, .value = &HPACK_VALUE_304},
+    /* 11 */ {.name = &HPACK_FIELD_STATUS, .value = &HPACK_VALUE_304},
+    /* 12 */ {.name = &HPACK_FIELD_STATUS, .value = &HPACK_VALUE_400},
+    /* 13 */ {.name = &HPACK_FIELD_STATUS, .value = &HPACK_VALUE_404},
     /* 14 */ {.name = &HPACK_FIELD_STATUS, .value = &HPACK_VALUE_500},
     /* 15 */ {.name = &HPACK_FIELD_ACCEPT_CHARSET, .value = NULL},
-    /* 16 */ {.name = &HPACK_FIELD_ACCEPT_ENCODING, .value = &HPACK_VALUE_GZIP_DEFALTE},
+    /* 16 */ {.name = &HPACK_FIELD_ACCEPT_ENCODING, .value = &HPACK_VALUE_GZIP_DEFLATE},
     /* 17 */ {.name = &HPACK_FIELD_ACCEPT_LANGUAGE, .value = NULL},
-    /* 18 */ {.name = &HPACK_FIELD_ACCEPT_RANGE, .value = NULL},
+    /* 18 */ {.name = &HPACK_FIELD_ACCEPT_RANGES, .value = NULL},
     /* 19 */ {.name = &HPACK_FIELD_ACCEPT, .value = NULL},
     /* 20 */ {.name = &HPACK_FIELD_ACCESS_CONTROL_ALLOW_ORIGIN, .value = NULL},
     /* 21 */ {.name = &HPACK_FIELD_AGE, .value = NULL},
@@ -143,3 +145,345 @@ ahp_header_index_t ahp_static_index_table[STATIC_INDEX_TABLE_SIZE + 1] = {
     /* 60 */ {.name = &HPACK_FIELD_VIA, .value = NULL},
     /* 61 */ {.name = &HPACK_FIELD_WWW_AUTHENTICATE, .value = NULL},
 };
+
+static inline int name_equals(const char* name, const char* lower, size_t len) {
+  for (size_t i = 0; i < len; i++) {
+    if (to_lower((unsigned char)name[i]) != (unsigned char)lower[i]) {
+      return 0;
+    }
+  }
+  return 1;
+}
+
+int ahp_static_header_index(const char* name, size_t len) {
+  if (len == 0) {
+    return 0;
+  }
+
+  // 按长度和首字符分派, 再比较完整名称 (不区分大小写)
+  switch (len) {
+    case 3:
+      switch (to_lower((unsigned char)name[0])) {
+        case 'a':
+          if (name_equals(name, "age", 3)) {
+            return 21;
+          }
+          break;
+        case 'v':
+          if (name_equals(name, "via", 3)) {
+            return 60;
+          }
+          break;
+      }
+      break;
+    case 4:
+      switch (to_lower((unsigned char)name[0])) {
+        case 'd':
+          if (name_equals(name, "date", 4)) {
+            return 33;
+          }
+          break;
+        case 'e':
+          if (name_equals(name, "etag", 4)) {
+            return 34;
+          }
+          break;
+        case 'f':
+          if (name_equals(name, "from", 4)) {
+            return 37;
+          }
+          break;
+        case 'h':
+          if (name_equals(name, "host", 4)) {
+            return 38;
+          }
+          break;
+        case 'l':
+          if (name_equals(name, "link", 4)) {
+            return 45;
+          }
+          break;
+        case 'v':
+          if (name_equals(name, "vary", 4)) {
+            return 59;
+          }
+          break;
+      }
+      break;
+    case 5:
+      switch (to_lower((unsigned char)name[0])) {
+        case ':':
+          if (name_equals(name, ":path", 5)) {
+            return 4;
+          }
+          break;
+        case 'a':
+          if (name_equals(name, "allow", 5)) {
+            return 22;
+          }
+          break;
+        case 'r':
+          if (name_equals(name, "range", 5)) {
+            return 50;
+          }
+          break;
+      }
+      break;
+    case 6:
+      switch (to_lower((unsigned char)name[0])) {
+        case 'a':
+          if (name_equals(name, "accept", 6)) {
+            return 19;
+          }
+          break;
+        case 'c':
+          if (name_equals(name, "cookie", 6)) {
+            return 32;
+          }
+          break;
+        case 'e':
+          if (name_equals(name, "expect", 6)) {
+            return 35;
+          }
+          break;
+        case 's':
+          if (name_equals(name, "server", 6)) {
+            return 54;
+          }
+          break;
+      }
+      break;
+    case 7:
+      switch (to_lower((unsigned char)name[0])) {
+        case ':':
+          if (name_equals(name, ":method", 7)) {
+            return 2;
+          }
+          if (name_equals(name, ":scheme", 7)) {
+            return 6;
+          }
+          if (name_equals(name, ":status", 7)) {
+            return 8;
+          }
+          break;
+        case 'e':
+          if (name_equals(name, "expires", 7)) {
+            return 36;
+          }
+          break;
+        case 'r':
+          if (name_equals(name, "referer", 7)) {
+            return 51;
+          }
+          if (name_equals(name, "refresh", 7)) {
+            return 52;
+          }
+          break;
+      }
+      break;
+    case 8:
+      switch (to_lower((unsigned char)name[0])) {
+        case 'i':
+          if (name_equals(name, "if-match", 8)) {
+            return 39;
+          }
+          if (name_equals(name, "if-range", 8)) {
+            return 42;
+          }
+          break;
+        case 'l':
+          if (name_equals(name, "location", 8)) {
+            return 46;
+          }
+          break;
+      }
+      break;
+    case 10:
+      switch (to_lower((unsigned char)name[0])) {
+        case ':':
+          if (name_equals(name, ":authority", 10)) {
+            return 1;
+          }
+          break;
+        case 's':
+          if (name_equals(name, "set-cookie", 10)) {
+            return 55;
+          }
+          break;
+        case 'u':
+          if (name_equals(name, "user-agent", 10)) {
+            return 58;
+          }
+          break;
+      }
+      break;
+    case 11:
+      switch (to_lower((unsigned char)name[0])) {
+        case 'r':
+          if (name_equals(name, "retry-after", 11)) {
+            return 53;
+          }
+          break;
+      }
+      break;
+    case 12:
+      switch (to_lower((unsigned char)name[0])) {
+        case 'c':
+          if (name_equals(name, "content-type", 12)) {
+            return 31;
+          }
+          break;
+        case 'm':
+          if (name_equals(name, "max-forwards", 12)) {
+            return 47;
+          }
+          break;
+      }
+      break;
+    case 13:
+      switch (to_lower((unsigned char)name[0])) {
+        case 'a':
+          if (name_equals(name, "accept-ranges", 13)) {
+            return 18;
+          }
+          if (name_equals(name, "authorization", 13)) {
+            return 23;
+          }
+          break;
+        case 'c':
+          if (name_equals(name, "cache-control", 13)) {
+            return 24;
+          }
+          if (name_equals(name, "content-range", 13)) {
+            return 30;
+          }
+          break;
+        case 'i':
+          if (name_equals(name, "if-none-match", 13)) {
+            return 41;
+          }
+          break;
+        case 'l':
+          if (name_equals(name, "last-modified", 13)) {
+            return 44;
+          }
+          break;
+      }
+      break;
+    case 14:
+      switch (to_lower((unsigned char)name[0])) {
+        case 'a':
+          if (name_equals(name, "accept-charset", 14)) {
+            return 15;
+          }
+          break;
+        case 'c':
+          if (name_equals(name, "content-length", 14)) {
+            return 28;
+          }
+          break;
+      }
+      break;
+    case 15:
+      switch (to_lower((unsigned char)name[0])) {
+        case 'a':
+          if (name_equals(name, "accept-encoding", 15)) {
+            return 16;
+          }
+          if (name_equals(name, "accept-language", 15)) {
+            return 17;
+          }
+          break;
+      }
+      break;
+    case 16:
+      switch (to_lower((unsigned char)name[0])) {
+        case 'c':
+          if (name_equals(name, "content-encoding", 16)) {
+            return 26;
+          }
+          if (name_equals(name, "content-language", 16)) {
+            return 27;
+          }
+          if (name_equals(name, "content-location", 16)) {
+            return 29;
+          }
+          break;
+        case 'w':
+          if (name_equals(name, "www-authenticate", 16)) {
+            return 61;
+          }
+          break;
+      }
+      break;
+    case 17:
+      switch (to_lower((unsigned char)name[0])) {
+        case 'i':
+          if (name_equals(name, "if-modified-since", 17)) {
+            return 40;
+          }
+          break;
+        case 't':
+          if (name_equals(name, "transfer-encoding", 17)) {
+            return 57;
+          }
+          break;
+      }
+      break;
+    case 18:
+      switch (to_lower((unsigned char)name[0])) {
+        case 'p':
+          if (name_equals(name, "proxy-authenticate", 18)) {
+            return 48;
+          }
+          break;
+      }
+      break;
+    case 19:
+      switch (to_lower((unsigned char)name[0])) {
+        case 'c':
+          if (name_equals(name, "content-disposition", 19)) {
+            return 25;
+          }
+          break;
+        case 'i':
+          if (name_equals(name, "if-unmodified-since", 19)) {
+            return 43;
+          }
+          break;
+        case 'p':
+          if (name_equals(name, "proxy-authorization", 19)) {
+            return 49;
+          }
+          break;
+      }
+      break;
+    case 25:
+      switch (to_lower((unsigned char)name[0])) {
+        case 's':
+          if (name_equals(name, "strict-transport-security", 25)) {
+            return 56;
+          }
+          break;
+      }
+      break;
+    case 27:
+      switch (to_lower((unsigned char)name[0])) {
+        case 'a':
+          if (name_equals(name, "access-control-allow-origin", 27)) {
+            return 20;
+          }
+          break;
+      }
+      break;
+  }
+
+  return 0;
+}
+
+const ahp_strlen_t* ahp_static_header_name(int index) {
+  if (index <= 0 || index > AHP_STATIC_INDEX_TABLE_SIZE) {
+    return NULL;
+  }
+  return ahp_static_index_table[index].name;
+}
@@ -6,6 +6,7 @@
 #ifndef AHPARSER_INDEX_H_
 #define AHPARSER_INDEX_H_
 
+#include "ahparser/http.h"
 #include "ahparser/strlen.h"
 
 #ifdef __cplusplus
@@ -18,7 +19,7 @@ typedef struct ahp_header_index {
 } ahp_header_index_t;
 
 extern const size_t STATIC_INDEX_TABLE_SIZE;
-extern ahp_header_index_t ahp_static_index_table[];
+extern ahp_header_index_t ahp_static_index_table[AHP_STATIC_INDEX_TABLE_SIZE + 1];
 
 #ifdef __cplusplus
 }
@@ -46,7 +46,7 @@ void ahp_msgbuf_free(ahp_msgbuf_t* buf) {
   buf->size = buf->start = buf->end = 0;
 }
 
-int ahp_msgbuf_append(ahp_msgbuf_t* buf, const char* data, size_t len) {
+int ahp_msgbuf_reserve(ahp_msgbuf_t* buf, size_t len) {
   size_t remains_len = buf->end - buf->start;  // 缓冲区中剩余数据长度
 
   // 调整缓冲区
@@ -86,6 +86,15 @@ int ahp_msgbuf_append(ahp_msgbuf_t* buf, const char* data, size_t len) {
     }
   }
 
+  return 0;
+}
+
+int ahp_msgbuf_append(ahp_msgbuf_t* buf, const char* data, size_t len) {
+  int err = ahp_msgbuf_reserve(buf, len);
+  if (err != 0) {
+    return err;
+  }
+
   // 拷贝数据到缓冲区
   if (len < 32) {
     char* write = buf->base + buf->end;
@@ -41,33 +41,31 @@ int parse_hex(strbuf_t* buf, ahp_strlen_t* str) {
  * 从报文中提取一行 ( 包含 CRLF )
  */
 int ahp_consume_line(strbuf_t* msg, strbuf_t* line) {
-  unsigned char* cur = strbuf_pos(msg);
   unsigned char* end = strbuf_end(msg);
 
-  while (cur < end) {
-    if (*cur == AHP_RULES_CR) {
-      cur++;
-      if (cur == end) {
-        return EAGAIN;
-      }
-      if (*cur == AHP_RULES_LF) {
-        // received CRLF
-        cur++;
-        if (line != NULL) {
-          strbuf_init_with_buf(line, strbuf_pos(msg), cur - strbuf_pos(msg));
-        }
-        strbuf_rewind(msg, cur);  // 调整 buf
-        return 0;
-      } else {
-        // 在 http 报文头中, \r 后面必须紧接着 \n 凑成 CRLF 对
-        return EBADMSG;
-      }
-    }
-    cur++;
+  // memchr 以字长或向量指令查找
+  unsigned char* cur = memchr(strbuf_pos(msg), AHP_RULES_CR, end - strbuf_pos(msg));
+  if (cur == NULL) {
+    // wait more data
+    return EAGAIN;
   }
 
-  // wait more data
-  return EAGAIN;
+  cur++;
+  if (cur == end) {
+    return EAGAIN;
+  }
+  if (*cur != AHP_RULES_LF) {
+    // 在 http 报文头中, \r 后面必须紧接着 \n 凑成 CRLF 对
+    return EBADMSG;
+  }
+
+  // received CRLF
+  cur++;
+  if (line != NULL) {
+    strbuf_init_with_buf(line, strbuf_pos(msg), cur - strbuf_pos(msg));
+  }
+  strbuf_rewind(msg, cur);  // 调整 buf
+  return 0;
 }
 
 /**
@@ -246,7 +244,7 @@ int parse_uri(strbuf_t* buf, ahp_strlen_t* str) {
    */
 
   // 获得合法字符的序列，未验证 uri 的合法性
-  return strbuf_consume_expectc(buf, AHP_RULES_URL, AHP_RULES_SP, str);
+  return strbuf_scan_expectc(buf, AHP_RULES_URL, &AHP_RANGES_URL, AHP_RULES_SP, str);
 }
 
 /**
@@ -312,6 +310,9 @@ int ahp_parse_request_line(ahp_parser_t* parser, strbuf_t* msg) {
   if (parse_uri(msg, &uri) != 0) {
     return EBADMSG;
   }
+  if (parser->max_uri_length > 0 && (long)uri.len > parser->max_uri_length) {
+    return ENAMETOOLONG;
+  }
 
   // HTTP-Version
   ahp_version_t version;
@@ -329,7 +330,49 @@ int ahp_parse_request_line(ahp_parser_t* parser, strbuf_t* msg) {
   return 0;
 }
 
-int ahp_parse_message_header(ahp_parser_t* parser, strbuf_t* msg) {
+/**
+ * 检查不完整的请求行是否已超出限制, 超出时不必等待其余数据
+ */
+int ahp_check_partial_request_line(ahp_parser_t* parser, strbuf_t* msg) {
+  unsigned char* start = strbuf_pos(msg);
+  long length = strbuf_remain_length(msg);
+
+  if (parser->max_uri_length > 0) {
+    // 第一个 SP 之后为 uri
+    unsigned char* uri = memchr(start, AHP_RULES_SP, length);
+    if (uri != NULL) {
+      uri++;
+      long remain = length - (uri - start);
+      unsigned char* uri_end = memchr(uri, AHP_RULES_SP, remain);
+      if ((uri_end != NULL ? uri_end - uri : remain) > parser->max_uri_length) {
+        return ENAMETOOLONG;
+      }
+    }
+  }
+
+  if (parser->max_header_size > 0 && length > parser->max_header_size) {
+    return EMSGSIZE;
+  }
+
+  return EAGAIN;
+}
+
+/**
+ * 报文头 (或 chunk 头, trailer) 不完整时, 检查从 start 开始已收到的数据是否超长
+ */
+int ahp_check_header_size(ahp_parser_t* parser, strbuf_t* msg, unsigned char* start) {
+  if (parser->max_header_size > 0 && strbuf_end(msg) - start > parser->max_header_size) {
+    return EMSGSIZE;
+  }
+  return EAGAIN;
+}
+
+/**
+ * 解码请求头
+ *
+ * 设置了 on_message_header 时逐个回调, 否则将名称和值相对于 block 的位置记录到 parser->headers 中
+ */
+int ahp_parse_message_header(ahp_parser_t* parser, strbuf_t* msg, unsigned char* block) {
   /*
    * In Section 3.2 of [RFC7230], the definition of Message Headers as shown below:
    *
@@ -345,7 +388,7 @@ int ahp_parse_message_header(ahp_parser_t* parser, strbuf_t* msg) {
    */
 
   ahp_strlen_t name;
-  if (strbuf_consume_expectc(msg, AHP_RULES_TCHAR, ':', &name) != 0) {
+  if (strbuf_scan_expectc(msg, AHP_RULES_TCHAR, &AHP_RANGES_TCHAR, ':', &name) != 0) {
     return EBADMSG;
   }
 
@@ -357,7 +400,8 @@ int ahp_parse_message_header(ahp_parser_t* parser, strbuf_t* msg) {
 
   int has_fold = 0;
   for (;;) {
-    if (strbuf_consume_expectc(msg, AHP_RULES_ETEXT, '\r', &value) != 0 || strbuf_expectc(msg, '\n') != 0) {
+    if (strbuf_scan_expectc(msg, AHP_RULES_ETEXT, &AHP_RANGES_ETEXT, '\r', &value) != 0 ||
+        strbuf_expectc(msg, '\n') != 0) {
       return EBADMSG;
     }
 
@@ -375,6 +419,7 @@ int ahp_parse_message_header(ahp_parser_t* parser, strbuf_t* msg) {
     if (!AHP_RULES_FLOD[*(end - 1)]) {
       break;
     }
+    end--;
   }
 
   value.str = (char*)start;
@@ -398,12 +443,32 @@ int ahp_parse_message_header(ahp_parser_t* parser, strbuf_t* msg) {
       }
     }
     value.len = (char*)start - value.str;
+
+    // 以 SP 填充移动后空出的位置, 再次解码该行时得到相同的结果
+    for (; start < end; start++) {
+      *start = ' ';
+    }
   }
 
-  if (parser->on_message_header(parser, &name, &value) != 0) {
-    return EBADMSG;
+  if (parser->on_message_header != NULL) {
+    if (parser->on_message_header(parser, &name, &value) != 0) {
+      return EBADMSG;
+    }
+    return 0;
   }
 
+  if (parser->header_count >= AHP_MAX_HEADERS ||
+      (parser->max_header_count > 0 && parser->header_count >= parser->max_header_count)) {
+    return EMSGSIZE;
+  }
+
+  ahp_header_span_t* span = &parser->headers[parser->header_count++];
+  span->name_offset = (uint32_t)((unsigned char*)name.str - block);
+  span->name_length = (uint32_t)name.len;
+  span->value_offset = (uint32_t)((unsigned char*)value.str - block);
+  span->value_length = (uint32_t)value.len;
+  span->name_index = (uint32_t)ahp_static_header_index(name.str, name.len);
+
   return 0;
 }
 
@@ -436,6 +501,9 @@ int ahp_parse_request(ahp_parser_t* parser, ahp_msgbuf_t* msg) {
         // 从缓冲区中读取一行
         err = ahp_consume_line(&message, &line);
         if (err) {
+          if (err == EAGAIN) {
+            err = ahp_check_partial_request_line(parser, &message);
+          }
           goto error;
         }
 
@@ -446,37 +514,60 @@ int ahp_parse_request(ahp_parser_t* parser, ahp_msgbuf_t* msg) {
         }
 
         parser->state = AHP_PARSER_STATE_PARSE_MESSAGE_HEADER;
+        parser->header_count = 0;
+        parser->header_parsed_length = 0;
       }
 
       case AHP_PARSER_STATE_PARSE_MESSAGE_HEADER: {
-        unsigned char* start = strbuf_pos(&message);
+        unsigned char* block = strbuf_pos(&message);
+        unsigned char* start = block;
+        // 逐个回调时, 数据不完整只回退到当前 header; 只记录位置时, 回退到报文头块的起始位置,
+        // 保证报文头块在缓冲区中是连续的, 并记下已解码的长度, 下次从未完成的 header 继续解码
+        unsigned char* resume = parser->on_message_header != NULL ? NULL : block;
         strbuf_t line;
+        if (resume != NULL && parser->header_parsed_length > 0) {
+          start = block + parser->header_parsed_length;
+          strbuf_rewind(&message, start);
+        }
         for (;;) {
           // 从缓冲区中读取一行
           err = ahp_consume_line(&message, &line);
           if (err) {
             if (err == EAGAIN) {
-              strbuf_rewind(&message, start);
+              err = ahp_check_header_size(parser, &message, block);
+              if (resume != NULL) {
+                parser->header_parsed_length = start - block;
+              }
+              strbuf_rewind(&message, resume != NULL ? resume : start);
             }
             goto error;
           }
 
           if (line.size <= 2) {
             // 空行 ( 连续两个 crlf ), request header 结束
+            parser->header_block = (const char*)block;
+            parser->header_block_length = strbuf_pos(&message) - block;
+            if (parser->max_header_size > 0 && parser->header_block_length > parser->max_header_size) {
+              err = EMSGSIZE;
+              goto error;
+            }
             goto success;
           }
 
           // 因为 LWS 的关系，crlf 不能做为 header 的分界符，因此要多看一个 OCTET
           int ch = strbuf_peek(&message);
           if (ch == EOF) {
-            err = EAGAIN;
-            strbuf_rewind(&message, start);
+            err = ahp_check_header_size(parser, &message, block);
+            if (resume != NULL) {
+              parser->header_parsed_length = start - block;
+            }
+            strbuf_rewind(&message, resume != NULL ? resume : start);
             goto error;
           } else if (ch != AHP_RULES_SP && ch != AHP_RULES_HT) {
             strbuf_init_with_buf(&line, start, strbuf_pos(&message) - start);
 
             // 解析消息头
-            err = ahp_parse_message_header(parser, &line);
+            err = ahp_parse_message_header(parser, &line, block);
             if (err) {
               goto error;
             }
@@ -498,6 +589,7 @@ error:
 
 success:
   parser->state = AHP_PARSER_STATE_IDLE;
+  parser->header_parsed_length = 0;
   err = 0;
   goto finally;
 
@@ -509,6 +601,9 @@ finally:
 int ahp_parse_length_body(ahp_parser_t* parser, strbuf_t* msg) {
   // 按长度定位 body
   if (parser->expected_length > 0) {
+    if (parser->max_body_size > 0 && parser->body_length + parser->expected_length > parser->max_body_size) {
+      return EFBIG;
+    }
     long size = strbuf_remain_length(msg);
     if (size > parser->expected_length) {
       size = parser->expected_length;
@@ -519,6 +614,7 @@ int ahp_parse_length_body(ahp_parser_t* parser, strbuf_t* msg) {
       return EBADMSG;
     }
     parser->expected_length -= size;
+    parser->body_length += size;
     if (parser->expected_length > 0) {
       return EAGAIN;
     }
@@ -541,10 +637,22 @@ int ahp_parse_chunked_size(ahp_parser_t* parser, strbuf_t* msg) {
   int ch = strbuf_peek(msg);
   if (ch != '\r' && ch != ';') {
     return EBADMSG;
-  } else {
-    parser->expected_length = htoi(&chunk_size);
-    return 0;
   }
+
+  // 去掉前导 0 后超过 15 位的长度会使 long 溢出
+  while (chunk_size.len > 1 && *chunk_size.str == '0') {
+    chunk_size.str++;
+    chunk_size.len--;
+  }
+  if (chunk_size.len > 15) {
+    return EFBIG;
+  }
+
+  parser->expected_length = htoi(&chunk_size);
+  if (parser->max_body_size > 0 && parser->body_length + parser->expected_length > parser->max_body_size) {
+    return EFBIG;
+  }
+  return 0;
 }
 
 int ahp_parse_chunked_ext(ahp_parser_t* parser, strbuf_t* msg) {
@@ -589,6 +697,7 @@ int ahp_parse_chunked_data(ahp_parser_t* parser, strbuf_t* msg) {
       return EBADMSG;
     }
     parser->expected_length -= size;
+    parser->body_length += size;
     if (parser->expected_length > 0) {
       return EAGAIN;
     }
@@ -615,6 +724,7 @@ int ahp_parse_chunked_trailer(ahp_parser_t* parser, strbuf_t* msg) {
     err = ahp_consume_line(msg, &line);
     if (err) {
       if (err == EAGAIN) {
+        err = ahp_check_header_size(parser, msg, start);
         strbuf_rewind(msg, start);
       }
       return err;
@@ -679,6 +789,9 @@ int ahp_parse_body(ahp_parser_t* parser, ahp_msgbuf_t* msg) {
         strbuf_t line;
         err = ahp_consume_line(&message, &line);
         if (err) {
+          if (err == EAGAIN) {
+            err = ahp_check_header_size(parser, &message, strbuf_pos(&message));
+          }
           goto error;
         }
 
@@ -745,6 +858,7 @@ int ahp_parse_body_length(ahp_parser_t* parser, ahp_msgbuf_t* msg, long length)
 
   // 初始化
   parser->expected_length = length;
+  parser->body_length = 0;
   parser->state = AHP_PARSER_STATE_PARSE_BODY;
 
   return ahp_parse_body(parser, msg);
@@ -757,6 +871,7 @@ int ahp_parse_body_chunked(ahp_parser_t* parser, ahp_msgbuf_t* msg) {
   }
 
   // 初始化
+  parser->body_length = 0;
   parser->state = AHP_PARSER_STATE_PARSE_CHUNKED_HEAD;
 
   return ahp_parse_body(parser, msg);
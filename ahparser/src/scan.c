@@ -0,0 +1,206 @@
+/**
+ * file:         scan.c
+ * author:       James Yin<ywhjames@hotmail.com>
+ * description:  vectorized scanning
+ *
+ * 按区间成块判断字符是否合法, 区间外的字节和不足一块的部分查表判断. x86-64 上使用 SSE2 (基础指令集) 每次判断 16 字节,
+ * 指定 AHP_SCAN=avx2 且 CPU 支持时每次判断 32 字节; 其它平台每次读取 8 字节, 以整数运算 (SWAR) 判断.
+ */
+#include "scan.h"
+
+#include <stdint.h>
+#include <stdlib.h>
+#include <string.h>
+
+#if defined(__x86_64__) && (defined(__GNUC__) || defined(__clang__))
+#define AHP_SCAN_X86 1
+#include <immintrin.h>
+#endif
+
+// clang-format off
+const ahp_scan_ranges_t AHP_RANGES_TCHAR = {
+  .count = 4,
+  .lo = {0x5e, 0x41, 0x30, 0x2d},  // ^_` a-z, A-Z, 0-9, -.
+  .hi = {0x7a, 0x5a, 0x39, 0x2e},
+};
+
+const ahp_scan_ranges_t AHP_RANGES_ETEXT = {
+  .count = 1,
+  .lo = {0x20},  // SP VCHAR
+  .hi = {0x7e},
+};
+
+const ahp_scan_ranges_t AHP_RANGES_URL = {
+  .count = 4,
+  .lo = {0x61, 0x3f, 0x23, 0x3d},  // a-z, ?@ A-Z, #$%&'()*+,-./ 0-9 :;, =
+  .hi = {0x7a, 0x5a, 0x3b, 0x3d},
+};
+// clang-format on
+
+/**
+ * 查表判断从 pos 开始的字节, 直到遇到不合法的字节或 stop
+ */
+static inline const unsigned char* skip_table(const unsigned char* pos,
+                                              const unsigned char* stop,
+                                              const ahp_alphabet_t accept) {
+  while (pos < stop && accept[*pos]) {
+    pos++;
+  }
+  return pos;
+}
+
+#define ONES 0x0101010101010101ULL
+#define HIGHS 0x8080808080808080ULL
+
+/**
+ * 每次 8 字节: 字节均为 ASCII 时, b + (0x80 - lo) 的最高位表示 b >= lo, b + (0x7f - hi) 的最高位表示 b > hi,
+ * 各字节的加法都不会向相邻字节进位
+ */
+static const unsigned char* scan_skip_swar(const unsigned char* pos,
+                                           const unsigned char* end,
+                                           const ahp_alphabet_t accept,
+                                           const ahp_scan_ranges_t* ranges) {
+  while (end - pos >= 8) {
+    uint64_t word;
+    memcpy(&word, pos, 8);
+    uint64_t in = 0;
+    for (int i = 0; i < ranges->count; i++) {
+      uint64_t ge = word + ONES * (0x80 - ranges->lo[i]);
+      uint64_t gt = word + ONES * (0x7f - ranges->hi[i]);
+      in |= ge & ~gt;
+    }
+    if ((word & HIGHS) != 0 || (in & HIGHS) != HIGHS) {
+      // 块中有区间外的字节, 查表判断整块
+      const unsigned char* stop = pos + 8;
+      pos = skip_table(pos, stop, accept);
+      if (pos < stop) {
+        return pos;
+      }
+    } else {
+      pos += 8;
+    }
+  }
+  return skip_table(pos, end, accept);
+}
+
+#ifdef AHP_SCAN_X86
+
+/**
+ * 每次 16 字节: 以 b - lo <= hi - lo (无符号比较) 判断 b 是否在区间内
+ */
+static const unsigned char* scan_skip_sse2(const unsigned char* pos,
+                                           const unsigned char* end,
+                                           const ahp_alphabet_t accept,
+                                           const ahp_scan_ranges_t* ranges) {
+  if (end - pos < 16) {
+    return skip_table(pos, end, accept);
+  }
+
+  __m128i lo[AHP_SCAN_MAX_RANGES], width[AHP_SCAN_MAX_RANGES];
+  for (int i = 0; i < ranges->count; i++) {
+    lo[i] = _mm_set1_epi8((char)ranges->lo[i]);
+    width[i] = _mm_set1_epi8((char)(ranges->hi[i] - ranges->lo[i]));
+  }
+
+  while (end - pos >= 16) {
+    __m128i block = _mm_loadu_si128((const __m128i*)pos);
+    __m128i in = _mm_setzero_si128();
+    for (int i = 0; i < ranges->count; i++) {
+      __m128i offset = _mm_sub_epi8(block, lo[i]);
+      in = _mm_or_si128(in, _mm_cmpeq_epi8(_mm_max_epu8(offset, width[i]), width[i]));
+    }
+    unsigned int mask = ~(unsigned int)_mm_movemask_epi8(in) & 0xffff;
+    if (mask != 0) {
+      // 从第一个区间外的字节开始查表判断余下的块
+      const unsigned char* stop = pos + 16;
+      pos = skip_table(pos + __builtin_ctz(mask), stop, accept);
+      if (pos < stop) {
+        return pos;
+      }
+    } else {
+      pos += 16;
+    }
+  }
+  return skip_table(pos, end, accept);
+}
+
+/**
+ * 每次 32 字节, 同 SSE2 实现
+ */
+__attribute__((target("avx2"))) static const unsigned char* scan_skip_avx2(const unsigned char* pos,
+                                                                            const unsigned char* end,
+                                                                            const ahp_alphabet_t accept,
+                                                                            const ahp_scan_ranges_t* ranges) {
+  if (end - pos < 32) {
+    return scan_skip_sse2(pos, end, accept, ranges);
+  }
+
+  __m256i lo[AHP_SCAN_MAX_RANGES], width[AHP_SCAN_MAX_RANGES];
+  for (int i = 0; i < ranges->count; i++) {
+    lo[i] = _mm256_set1_epi8((char)ranges->lo[i]);
+    width[i] = _mm256_set1_epi8((char)(ranges->hi[i] - ranges->lo[i]));
+  }
+
+  while (end - pos >= 32) {
+    __m256i block = _mm256_loadu_si256((const __m256i*)pos);
+    __m256i in = _mm256_setzero_si256();
+    for (int i = 0; i < ranges->count; i++) {
+      __m256i offset = _mm256_sub_epi8(block, lo[i]);
+      in = _mm256_or_si256(in, _mm256_cmpeq_epi8(_mm256_max_epu8(offset, width[i]), width[i]));
+    }
+    unsigned int mask = ~(unsigned int)_mm256_movemask_epi8(in);
+    if (mask != 0) {
+      const unsigned char* stop = pos + 32;
+      pos = skip_table(pos + __builtin_ctz(mask), stop, accept);
+      if (pos < stop) {
+        return pos;
+      }
+    } else {
+      pos += 32;
+    }
+  }
+  // 不足 32 字节的部分
+  return scan_skip_sse2(pos, end, accept, ranges);
+}
+
+#endif  // AHP_SCAN_X86
+
+static const char* scan_impl = NULL;
+
+static const unsigned char* scan_skip_resolve(const unsigned char* pos,
+                                              const unsigned char* end,
+                                              const ahp_alphabet_t accept,
+                                              const ahp_scan_ranges_t* ranges) {
+  ahp_scan_impl();
+  return ahp_scan_skip(pos, end, accept, ranges);
+}
+
+ahp_scan_skip_func ahp_scan_skip = scan_skip_resolve;
+
+const char* ahp_scan_impl(void) {
+  if (scan_impl == NULL) {
+    // 环境变量 AHP_SCAN 可指定实现 (swar/sse2/avx2), 用于测试和对比
+    const char* prefer = getenv("AHP_SCAN");
+    if (prefer == NULL) {
+      prefer = "";
+    }
+#ifdef AHP_SCAN_X86
+    __builtin_cpu_init();
+    if (strcmp(prefer, "swar") == 0) {
+      ahp_scan_skip = scan_skip_swar;
+      scan_impl = "swar";
+    } else if (strcmp(prefer, "avx2") == 0 && __builtin_cpu_supports("avx2")) {
+      // 请求头中的字段大多不足 32 字节, 且切换到 AVX2 有额外开销, 实测不如 SSE2, 仅在指定时使用
+      ahp_scan_skip = scan_skip_avx2;
+      scan_impl = "avx2";
+    } else {
+      ahp_scan_skip = scan_skip_sse2;
+      scan_impl = "sse2";
+    }
+#else
+    ahp_scan_skip = scan_skip_swar;
+    scan_impl = "swar";
+#endif
+  }
+  return scan_impl;
+}
@@ -0,0 +1,55 @@
+/**
+ * file:         scan.h
+ * author:       James Yin<ywhjames@hotmail.com>
+ * description:  vectorized scanning
+ */
+#ifndef AHPARSER_SCAN_H_
+#define AHPARSER_SCAN_H_
+
+#include "alphabet.h"
+
+#ifdef __cplusplus
+extern "C" {
+#endif
+
+#define AHP_SCAN_MAX_RANGES 4
+
+/**
+ * 由若干闭区间 [lo, hi] 组成的字符集, 用于成块判断字符是否合法
+ *
+ * 区间应为对应字母表的子集, 且只包含 ASCII 字符 (hi < 0x80). 区间外的字节由字母表逐个判断
+ */
+typedef struct ahp_scan_ranges {
+  int count;
+  unsigned char lo[AHP_SCAN_MAX_RANGES];
+  unsigned char hi[AHP_SCAN_MAX_RANGES];
+} ahp_scan_ranges_t;
+
+extern const ahp_scan_ranges_t AHP_RANGES_TCHAR;
+extern const ahp_scan_ranges_t AHP_RANGES_ETEXT;
+extern const ahp_scan_ranges_t AHP_RANGES_URL;
+
+typedef const unsigned char* (*ahp_scan_skip_func)(const unsigned char* pos,
+                                                  const unsigned char* end,
+                                                  const ahp_alphabet_t accept,
+                                                  const ahp_scan_ranges_t* ranges);
+
+/**
+ * 返回 [pos, end) 中第一个不在 accept 中的字节的位置, 没有时返回 end
+ *
+ * ranges 中的字节成块跳过, 块中 ranges 以外的字节和不足一块的尾部查表判断.
+ * 首次调用时选择实现: x86-64 上默认为 SSE2, 其它平台为每次 8 字节的通用实现. 环境变量 AHP_SCAN 可指定实现,
+ * 指定 avx2 时检查 CPU 是否支持
+ */
+extern ahp_scan_skip_func ahp_scan_skip;
+
+/**
+ * 当前使用的实现的名称: "avx2", "sse2" 或 "swar"
+ */
+const char* ahp_scan_impl(void);
+
+#ifdef __cplusplus
+}
+#endif
+
+#endif  // AHPARSER_SCAN_H_
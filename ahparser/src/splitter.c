@@ -46,6 +46,23 @@ static inline uint32_t parse_uint31(char* data) {
   return 0x7FFFFFFF & parse_uint32(data);
 }
 
+static inline void pack_uint24(char* data, uint32_t value) {
+  uint8_t* field = (uint8_t*)data;
+  // Big-Endian, 24bits
+  field[0] = (uint8_t)(value >> 16);
+  field[1] = (uint8_t)(value >> 8);
+  field[2] = (uint8_t)value;
+}
+
+static inline void pack_uint31(char* data, uint32_t value) {
+  uint8_t* field = (uint8_t*)data;
+  // Big-Endian, 32bits, 保留位为 0
+  field[0] = (uint8_t)((value >> 24) & 0x7F);
+  field[1] = (uint8_t)(value >> 16);
+  field[2] = (uint8_t)(value >> 8);
+  field[3] = (uint8_t)value;
+}
+
 int ahp_parse_data_frame(ahp_splitter_t* splitter, uint8_t flags, ahp_strlen_t* payload, void* frame) {
   /*
    *    +---------------+
@@ -114,7 +131,8 @@ int ahp_parse_priority_frame(ahp_splitter_t* splitter, uint8_t flags, ahp_strlen
    *    |   Weight (8)  |
    *    +-+-------------+
    */
-  return EBADMSG;
+  // RFC 9218 废弃了 RFC 7540 的优先级方案, 忽略 PRIORITY 帧
+  return 0;
 }
 
 int ahp_parse_rst_stream_frame(ahp_splitter_t* splitter, uint8_t flags, ahp_strlen_t* payload, void* frame) {
@@ -123,7 +141,7 @@ int ahp_parse_rst_stream_frame(ahp_splitter_t* splitter, uint8_t flags, ahp_strl
    *    |                        Error Code (32)                        |
    *    +---------------------------------------------------------------+
    */
-  return EBADMSG;
+  return splitter->on_rst_stream_frame(splitter, frame, parse_uint32(payload->str));
 }
 
 int ahp_parse_settings_frame(ahp_splitter_t* splitter, uint8_t flags, ahp_strlen_t* payload, void* frame) {
@@ -173,7 +191,7 @@ int ahp_parse_ping_frame(ahp_splitter_t* splitter, uint8_t flags, ahp_strlen_t*
    *    |                                                               |
    *    +---------------------------------------------------------------+
    */
-  return EBADMSG;
+  return splitter->on_ping_frame(splitter, frame, payload);
 }
 
 int ahp_parse_goway_frame(ahp_splitter_t* splitter, uint8_t flags, ahp_strlen_t* payload, void* frame) {
@@ -195,7 +213,7 @@ int ahp_parse_window_update_frame(ahp_splitter_t* splitter, uint8_t flags, ahp_s
    *    |R|              Window Size Increment (31)                     |
    *    +-+-------------------------------------------------------------+
    */
-  uint32_t increment = parse_uint31(frame);
+  uint32_t increment = parse_uint31(payload->str);
   int err = splitter->on_window_update_frame(splitter, frame, increment);
   if (err != 0) {
     return err;
@@ -209,12 +227,21 @@ int ahp_parse_continuation_frame(ahp_splitter_t* splitter, uint8_t flags, ahp_st
    *    |                   Header Block Fragment (*)                 ...
    *    +---------------------------------------------------------------+
    */
-  return EBADMSG;
+  // 与 HEADERS 帧的片段拼接为同一个请求头块
+  return splitter->on_headers_frame(splitter, frame, payload);
 }
 
 int ahp_check_frame(uint8_t type, uint8_t flags, uint32_t identifier, ahp_strlen_t* payload, uint32_t length) {
   int error = 0;
   switch (type) {
+    case AHP_FRAME_TYPE_DATA:
+      // DATA frames MUST be associated with a stream. If a DATA frame is received whose stream identifier field is 0x0,
+      // the recipient MUST respond with a connection error (Section 5.4.1) of type PROTOCOL_ERROR.
+      if (identifier == 0) {
+        error = AHP_ERROR_PROTOCOL_ERROR;
+        break;
+      }
+      break;
     case AHP_FRAME_TYPE_SETTINGS:
       // SETTINGS frames always apply to a connection, never a single stream. The stream identifier for a SETTINGS frame
       // MUST be zero (0x0). If an endpoint receives a SETTINGS frame whose stream identifier field is anything other
@@ -238,17 +265,86 @@ int ahp_check_frame(uint8_t type, uint8_t flags, uint32_t identifier, ahp_strlen
         break;
       }
       break;
+    case AHP_FRAME_TYPE_PRIORITY:
+      // The PRIORITY frame always identifies a stream. If a PRIORITY frame is received with a stream identifier of 0x0,
+      // the recipient MUST respond with a connection error (Section 5.4.1) of type PROTOCOL_ERROR.
+      if (identifier == 0) {
+        error = AHP_ERROR_PROTOCOL_ERROR;
+        break;
+      }
+      // A PRIORITY frame with a length other than 5 octets MUST be treated as a stream error (Section 5.4.2) of type
+      // FRAME_SIZE_ERROR. (帧已被忽略, 此处按连接错误处理)
+      if (length != 5) {
+        error = AHP_ERROR_FRAME_SIZE_ERROR;
+        break;
+      }
+      break;
+    case AHP_FRAME_TYPE_RST_STREAM:
+      // RST_STREAM frames MUST be associated with a stream. If a RST_STREAM frame is received with a stream identifier
+      // of 0x0, the recipient MUST treat this as a connection error (Section 5.4.1) of type PROTOCOL_ERROR.
+      // A RST_STREAM frame with a length other than 4 octets MUST be treated as a connection error (Section 5.4.1) of
+      // type FRAME_SIZE_ERROR.
+      if (identifier == 0) {
+        error = AHP_ERROR_PROTOCOL_ERROR;
+        break;
+      }
+      if (length != 4) {
+        error = AHP_ERROR_FRAME_SIZE_ERROR;
+        break;
+      }
+      break;
+    case AHP_FRAME_TYPE_PING:
+      // PING frames are not associated with any individual stream. If a PING frame is received with a stream identifier
+      // field value other than 0x0, the recipient MUST respond with a connection error (Section 5.4.1) of type
+      // PROTOCOL_ERROR. Receipt of a PING frame with a length field value other than 8 MUST be treated as a connection
+      // error (Section 5.4.1) of type FRAME_SIZE_ERROR.
+      if (identifier != 0) {
+        error = AHP_ERROR_PROTOCOL_ERROR;
+        break;
+      }
+      if (length != 8) {
+        error = AHP_ERROR_FRAME_SIZE_ERROR;
+        break;
+      }
+      break;
     case AHP_FRAME_TYPE_WINDOW_UPDATE:
+      // A WINDOW_UPDATE frame with a length other than 4 octets MUST be treated as a connection error (Section 5.4.1)
+      // of type FRAME_SIZE_ERROR.
       if (length != 4) {
         error = AHP_ERROR_FRAME_SIZE_ERROR;
         break;
       }
+      break;
+    case AHP_FRAME_TYPE_PRIORITY_UPDATE:
+      // The PRIORITY_UPDATE frame MUST be sent on stream 0. If a PRIORITY_UPDATE frame is received with a stream ID
+      // other than 0x0, the recipient MUST respond with a connection error of type PROTOCOL_ERROR. (RFC 9218 7.1)
+      if (identifier != 0) {
+        error = AHP_ERROR_PROTOCOL_ERROR;
+        break;
+      }
+      if (length < 4) {
+        error = AHP_ERROR_FRAME_SIZE_ERROR;
+        break;
+      }
+      break;
     default:
       break;
   }
   return -error;
 }
 
+int ahp_parse_priority_update_frame(ahp_splitter_t* splitter, uint8_t flags, ahp_strlen_t* payload, void* frame) {
+  /*
+   *    +-+-------------------------------------------------------------+
+   *    |R|                Prioritized Stream ID (31)                   |
+   *    +-+-------------------------------------------------------------+
+   *    |                  Priority Field Value (*)                   ...
+   *    +---------------------------------------------------------------+
+   */
+  ahp_strlen_t priority_field_value = {.str = payload->str + 4, .len = payload->len - 4};
+  return splitter->on_priority_update_frame(splitter, frame, parse_uint31(payload->str), &priority_field_value);
+}
+
 typedef int (*ahp_parse_frame_func)(ahp_splitter_t*, uint8_t, ahp_strlen_t*, void*);
 const ahp_parse_frame_func parser_table[] = {
     ahp_parse_data_frame,          ahp_parse_headers_frame,      ahp_parse_priority_frame, ahp_parse_rst_stream_frame,
@@ -280,13 +376,24 @@ int ahp_split_frame(ahp_splitter_t* splitter, ahp_msgbuf_t* msg) {
     char* packet = ahp_msgbuf_data(msg);
 
     uint32_t length = parse_uint24(packet);
+    if (splitter->max_frame_size > 0 && length > splitter->max_frame_size) {
+      // 不等待超长的负载, 直接作为 FRAME_SIZE_ERROR 连接错误
+      return -AHP_ERROR_FRAME_SIZE_ERROR;
+    }
     if (len < length + 9) {
       return EAGAIN;
     }
 
     uint8_t type = parse_uint8(packet + 3);
-    if (type > AHP_FRAME_TYPE_CONTINUAION) {
-      return EBADMSG;
+    ahp_parse_frame_func parse_frame;
+    if (type <= AHP_FRAME_TYPE_CONTINUAION) {
+      parse_frame = parser_table[type];
+    } else if (type == AHP_FRAME_TYPE_PRIORITY_UPDATE) {
+      parse_frame = ahp_parse_priority_update_frame;
+    } else {
+      // Implementations MUST ignore and discard any frame that has a type that is unknown.
+      ahp_msgbuf_forward(msg, length + 9);
+      continue;
     }
 
     uint8_t flags = parse_uint8(packet + 4);
@@ -305,7 +412,7 @@ int ahp_split_frame(ahp_splitter_t* splitter, ahp_msgbuf_t* msg) {
       return EINVAL;
     }
 
-    err = parser_table[type](splitter, flags, &payload, frame);
+    err = parse_frame(splitter, flags, &payload, frame);
     if (err == 0) {
       err = splitter->on_frame_received(splitter, frame);
     }
@@ -319,3 +426,19 @@ int ahp_split_frame(ahp_splitter_t* splitter, ahp_msgbuf_t* msg) {
     ahp_msgbuf_forward(msg, length + 9);
   } while (1);
 }
+
+int ahp_append_frame_header(ahp_msgbuf_t* msg, uint32_t length, uint8_t type, uint8_t flags, uint32_t identifier) {
+  int err = ahp_msgbuf_reserve(msg, AHP_FRAME_HEADER_SIZE);
+  if (err != 0) {
+    return err;
+  }
+
+  char* header = ahp_msgbuf_tail(msg);
+  pack_uint24(header, length);
+  header[3] = (char)type;
+  header[4] = (char)flags;
+  pack_uint31(header + 5, identifier);
+  ahp_msgbuf_commit(msg, AHP_FRAME_HEADER_SIZE);
+
+  return 0;
+}
@@ -53,6 +53,33 @@ int strbuf_consume_expectc(strbuf_t* buf, const ahp_alphabet_t accept, const int
   return -1;
 }
 
+/**
+ * 同 strbuf_consume_expectc, ranges 中的字符成块跳过, 用于较长的字段
+ */
+int strbuf_scan_expectc(strbuf_t* buf,
+                        const ahp_alphabet_t accept,
+                        const ahp_scan_ranges_t* ranges,
+                        const int stop,
+                        ahp_strlen_t* str) {
+  unsigned char* start = buf->pos;
+
+  buf->pos = (unsigned char*)ahp_scan_skip(buf->pos, buf->end, accept, ranges);
+  int ch = strbuf_peek(buf);
+  if (ch == stop) {  // stop 接受 EOF
+    if (str != NULL) {
+      str->str = (char*)start;
+      str->len = buf->pos - start;
+    }
+    if (ch != EOF) {
+      strbuf_forward(buf);
+    }
+    return 0;
+  }
+
+  buf->pos = start;
+  return -1;
+}
+
 int strbuf_expect(strbuf_t* buf, const char* accept, long len) {
   long buf_len = buf->end - buf->pos;
   if (buf_len >= len && strncmp((char*)buf->pos, accept, len) == 0) {
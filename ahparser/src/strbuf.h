@@ -12,6 +12,7 @@
 #include "ahparser/strlen.h"
 
 #include "alphabet.h"
+#include "scan.h"
 
 #ifdef __cplusplus
 extern "C" {
@@ -120,6 +121,11 @@ static inline int strbuf_consume(strbuf_t* buf, const ahp_alphabet_t accept, ahp
 
 int strbuf_consume_expect(strbuf_t* buf, const ahp_alphabet_t accept, const ahp_alphabet_t stop, ahp_strlen_t* str);
 int strbuf_consume_expectc(strbuf_t* buf, const ahp_alphabet_t accept, const int stop, ahp_strlen_t* str);
+int strbuf_scan_expectc(strbuf_t* buf,
+                        const ahp_alphabet_t accept,
+                        const ahp_scan_ranges_t* ranges,
+                        const int stop,
+                        ahp_strlen_t* str);
 
 static inline int strbuf_consume_len(strbuf_t* buf, long len, ahp_strlen_t* str) {
   if (buf->end - buf->pos >= len) {
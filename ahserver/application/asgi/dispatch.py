@@ -51,9 +51,10 @@ class ASGIDispatcher(HttpDispatcher):
             "raw_path": path,
             "query_string": query,
             "root_path": "",
-            "headers": request.headers.lower_items(),
+            "headers": request.lower_items(),
             "client": None,
             "server": (self.server_name, self.server_port),
+            "extensions": {"http.response.pathsend": {}, "http.response.zerocopysend": {}},
         }
 
         return scope
@@ -20,6 +20,18 @@ def main(args=None):
         "-n", "--worker-nums", dest="worker_nums", metavar="NUM", default=1, type="int", help="worker number"
     )
 
+    parser.add_option(
+        "--cpu-affinity", dest="cpu_affinity", action="store_true", default=False, help="pin each worker to a cpu"
+    )
+
+    parser.add_option(
+        "--reuse-port",
+        dest="reuse_port",
+        action="store_true",
+        default=False,
+        help="each worker listens on its own SO_REUSEPORT socket",
+    )
+
     # ssl params
     parser.add_option("--https", dest="enable_https", action="store_true", default=False, help="enable https mode")
     parser.add_option("--cert-path", dest="certfile", metavar="PATH", help="cert file path")
@@ -49,6 +61,8 @@ def main(args=None):
         enable_https=options.enable_https,
         certfile=options.certfile,
         keyfile=options.keyfile,
+        cpu_affinity=options.cpu_affinity,
+        reuse_port=options.reuse_port,
     )
 
 
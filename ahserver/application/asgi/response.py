@@ -2,8 +2,11 @@
 
 __all__ = ["ASGIHttpResponse"]
 
+import asyncio
+
 from ahserver.server.protocol import HttpStatus
-from ahserver.server.response import SGIHttpResponse
+from ahserver.server.response import FileWrapper, SGIHttpResponse
+from ahserver.util.iterator import AsyncIteratorWrapper
 from ahserver.util.pipe import AsyncPipe
 
 try:
@@ -18,6 +21,8 @@ if TYPE_CHECKING:
 
 
 class ASGIHttpResponse(SGIHttpResponse):
+    __slots__ = ("loop", "headers_sent", "body_pipe")
+
     def __init__(self, request, loop=None):  # type: (HttpRequest, AbstractEventLoop) -> None
         super(ASGIHttpResponse, self).__init__(request)
         self.loop = loop
@@ -29,6 +34,10 @@ class ASGIHttpResponse(SGIHttpResponse):
             await self._send_body(message)
         elif message["type"] == "http.response.start":
             self._send_start(message)
+        elif message["type"] == "http.response.pathsend":
+            await self._send_path(message)
+        elif message["type"] == "http.response.zerocopysend":
+            self._send_file(message)
         else:
             raise Exception("Unknown message type")
 
@@ -41,5 +50,22 @@ class ASGIHttpResponse(SGIHttpResponse):
         if not message.get("more_body", False):
             await self.body_pipe.close()
 
+    async def _send_path(self, message):
+        # ASGI pathsend 扩展; 打开文件可能阻塞 (如网络文件系统), 在线程池中进行
+        loop = self.loop if self.loop is not None else asyncio.get_running_loop()
+        self.file = FileWrapper(await loop.run_in_executor(None, open, message["path"], "rb"), offset=0)
+
+    def _send_file(self, message):
+        # ASGI zerocopysend 扩展, 文件须为响应的全部 body
+        if message.get("more_body", False):
+            raise Exception("More body after zerocopysend is not supported")
+        self.file = FileWrapper(message["file"], offset=message.get("offset"), count=message.get("count"))
+
     def body_iterator(self):  # type: () -> AsyncIterator[bytes]
+        if self.file is not None:
+            return AsyncIteratorWrapper(self.file, loop=self.loop)
         return self.body_pipe
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
@@ -0,0 +1,249 @@
+# encoding=utf-8
+
+__all__ = ["Supervisor"]
+
+import multiprocessing
+import os
+import signal
+import time
+
+from multiprocessing.connection import wait
+
+try:
+    from typing import TYPE_CHECKING
+except Exception:
+    TYPE_CHECKING = False
+
+if TYPE_CHECKING:
+    from multiprocessing.process import BaseProcess
+    from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+signames = {int(v): v.name for _, v in signal.__dict__.items() if isinstance(v, signal.Signals)}
+
+# worker 运行超过该时长 (秒) 后退出, 不再视为连续失败
+STABLE_UPTIME = 10.0
+
+
+def _run_worker(target, kwargs, cpu):  # type: (Callable[..., Any], Dict[str, Any], Optional[int]) -> None
+    # 还原从父进程继承的信号处理, 由 worker 自行设置
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    if hasattr(signal, "SIGHUP"):
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, signal.SIG_IGN)
+
+    if cpu is not None:
+        os.sched_setaffinity(0, {cpu})
+    target(**kwargs)
+
+
+class _WorkerSlot:
+    """worker 槽位, 记录槽位上 worker 的运行和失败情况"""
+
+    def __init__(self, index, cpu=None):  # type: (int, Optional[int]) -> None
+        self.index = index
+        self.cpu = cpu
+        self.process = None  # type: Optional[BaseProcess]
+        self.started_at = 0.0
+        self.failures = 0  # 连续失败次数
+        self.respawn_at = None  # type: Optional[float]
+
+
+class Supervisor:
+    """pre-fork 多进程管理
+
+    启动 worker_nums 个 worker 进程执行 target(**kwargs), worker 异常退出时按指数退避重新拉起.
+    cpu_affinity 为 True 时, 依次将各 worker 绑定到当前进程可用的 cpu 上.
+
+    信号:
+        SIGTERM/SIGINT: 通知所有 worker 优雅关闭, 等待其退出
+        SIGHUP: 滚动重启, 先启动新的 worker, reload_delay 秒后再通知旧的 worker 优雅关闭
+        SIGUSR1: 转发给所有 worker, 由 worker 输出运行统计
+    """
+
+    def __init__(
+        self,
+        target,
+        kwargs,
+        worker_nums,
+        cpu_affinity=False,
+        backoff_base=0.5,
+        backoff_max=30.0,
+        reload_delay=1.0,
+    ):
+        # type: (Callable[..., Any], Dict[str, Any], int, bool, float, float, float) -> None
+        self.target = target
+        self.kwargs = kwargs
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.reload_delay = reload_delay
+
+        cpus = None  # type: Optional[List[int]]
+        if cpu_affinity:
+            if hasattr(os, "sched_setaffinity"):
+                cpus = sorted(os.sched_getaffinity(0))
+            else:
+                print("CPU affinity is not supported on this platform")
+
+        self.slots = [_WorkerSlot(i, cpus[i % len(cpus)] if cpus else None) for i in range(worker_nums)]
+
+        # 滚动重启中被替换下来的 worker, 及通知其关闭的时间 (已通知为 None)
+        self.retiring = []  # type: List[Tuple[BaseProcess, Optional[float]]]
+
+        self.terminating = False
+        self.reload_requested = False
+
+        # 信号处理函数通过 pipe 唤醒监控循环
+        self._wakeup_fds = None  # type: Optional[Tuple[int, int]]
+
+    def run(self):  # type: () -> None
+        """启动所有 worker, 并监控直至全部退出"""
+        self._wakeup_fds = os.pipe()
+        for fd in self._wakeup_fds:
+            os.set_blocking(fd, False)
+
+        signal.signal(signal.SIGINT, self._on_stop)
+        signal.signal(signal.SIGTERM, self._on_stop)
+        if hasattr(signal, "SIGHUP"):
+            signal.signal(signal.SIGHUP, self._on_reload)
+        if hasattr(signal, "SIGUSR1"):
+            signal.signal(signal.SIGUSR1, self._on_report)
+
+        try:
+            for slot in self.slots:
+                self._spawn(slot)
+
+            self._monitor()
+        finally:
+            for fd in self._wakeup_fds:
+                os.close(fd)
+            self._wakeup_fds = None
+
+    def _monitor(self):  # type: () -> None
+        while True:
+            if self.reload_requested:
+                self.reload_requested = False
+                if not self.terminating:
+                    self._reload()
+
+            running = [slot for slot in self.slots if slot.process is not None]
+            pending = [slot for slot in self.slots if slot.respawn_at is not None]
+            if not running and not self.retiring and (self.terminating or not pending):
+                break
+
+            deadlines = [deadline for _, deadline in self.retiring if deadline is not None]
+            if not self.terminating:
+                deadlines.extend(slot.respawn_at for slot in pending)
+            timeout = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+
+            sentinels = [slot.process.sentinel for slot in running] + [process.sentinel for process, _ in self.retiring]
+            wait(sentinels + [self._wakeup_fds[0]], timeout)
+            try:
+                os.read(self._wakeup_fds[0], 64)
+            except OSError:
+                pass
+
+            for slot in running:
+                if not slot.process.is_alive():
+                    self._on_exit(slot)
+
+            self._retire()
+
+            if not self.terminating:
+                now = time.monotonic()
+                for slot in pending:
+                    if slot.respawn_at is not None and slot.respawn_at <= now:
+                        self._spawn(slot)
+
+    def _wakeup(self):  # type: () -> None
+        if self._wakeup_fds is not None:
+            try:
+                os.write(self._wakeup_fds[1], b"\0")
+            except OSError:
+                pass
+
+    def _on_stop(self, sig, frame):
+        if not self.terminating:
+            self.terminating = True
+            print("Termination request received")
+
+        for slot in self.slots:
+            slot.respawn_at = None
+            if slot.process is not None:
+                slot.process.terminate()
+        for process, _ in self.retiring:
+            process.terminate()
+
+        self._wakeup()
+
+    def _on_reload(self, sig, frame):
+        self.reload_requested = True
+        self._wakeup()
+
+    def _reload(self):  # type: () -> None
+        """滚动重启: 新的 worker 与旧的 worker 共用监听端口, 旧的 worker 延迟关闭"""
+        print("Reloading workers")
+
+        terminate_at = time.monotonic() + self.reload_delay
+        for slot in self.slots:
+            if slot.process is not None:
+                self.retiring.append((slot.process, terminate_at))
+                slot.process = None
+            slot.failures = 0
+            self._spawn(slot)
+
+    def _retire(self):  # type: () -> None
+        now = time.monotonic()
+        retiring = []
+        for process, terminate_at in self.retiring:
+            if not process.is_alive():
+                process.join()
+                continue
+            if terminate_at is not None and terminate_at <= now:
+                if not self.terminating:
+                    process.terminate()  # worker 收到 SIGTERM 后优雅关闭
+                terminate_at = None
+            retiring.append((process, terminate_at))
+        self.retiring = retiring
+
+    def _on_report(self, sig, frame):
+        for slot in self.slots:
+            if slot.process is not None and slot.process.pid is not None:
+                try:
+                    os.kill(slot.process.pid, sig)
+                except OSError:
+                    pass
+
+    def _spawn(self, slot):  # type: (_WorkerSlot) -> None
+        slot.respawn_at = None
+        slot.process = multiprocessing.Process(target=_run_worker, args=(self.target, self.kwargs, slot.cpu))
+        slot.process.daemon = True
+        slot.process.start()
+        slot.started_at = time.monotonic()
+
+    def _on_exit(self, slot):  # type: (_WorkerSlot) -> None
+        process, slot.process = slot.process, None
+        process.join()
+
+        exitcode = process.exitcode
+        if exitcode > 0:
+            print("Worker {} exited with code {}".format(slot.index, exitcode))
+        elif exitcode < 0:
+            try:
+                signame = signames[-exitcode]
+                print("Worker {} crashed on signal {}!".format(slot.index, signame))
+            except KeyError:
+                print("Worker {} crashed with unknown code {}!".format(slot.index, exitcode))
+
+        if self.terminating or exitcode == 0:
+            return
+
+        # 异常退出, 退避后重新拉起
+        if time.monotonic() - slot.started_at >= STABLE_UPTIME:
+            slot.failures = 0
+        delay = min(self.backoff_base * (2 ** slot.failures), self.backoff_max)
+        slot.failures += 1
+        slot.respawn_at = time.monotonic() + delay
+        print("Respawn worker {} in {:.1f}s".format(slot.index, delay))
@@ -11,6 +11,7 @@ from .response import WSGIHttpResponse
 from ahserver.server.constant import LATIN1_ENCODING
 from ahserver.server.dispatch import HttpDispatcher
 from ahserver.server.protocol import HttpHeader
+from ahserver.server.response import FileWrapper
 from ahserver.util.stream import InputStreamWrapper
 
 try:
@@ -31,6 +32,20 @@ def unicode_to_wsgi(u):
     return u.encode(enc, esc).decode(LATIN1_ENCODING)
 
 
+# header 名称到 CGI 变量名的缓存. 解析器对常见的 header 名称共用同一 bytes 对象, 查找时直接命中
+_cgi_names = {}  # type: Dict[bytes, str]
+_CGI_NAMES_LIMIT = 256
+
+
+def _cgi_name(field_name):  # type: (bytes) -> str
+    name = _cgi_names.get(field_name)
+    if name is None:
+        name = "HTTP_{}".format(field_name.decode(LATIN1_ENCODING).upper().replace("-", "_"))
+        if len(_cgi_names) < _CGI_NAMES_LIMIT:
+            _cgi_names[field_name] = name
+    return name
+
+
 class WSGIDispatcher(HttpDispatcher):
     def __init__(self, loop, application, server_name, server_port, on_https=False, max_workers=None):
         self.loop = loop
@@ -57,16 +72,13 @@ class WSGIDispatcher(HttpDispatcher):
         environ["SERVER_PROTOCOL"] = "HTTP/{}".format(request.version)
 
         # HTTP_Variables
-        for field_name, field_value in request.headers.lower_items():
+        for field_name, field_value in request.lower_items():
             if field_name == HttpHeader.CONTENT_LENGTH:
                 environ["CONTENT_LENGTH"] = field_value.decode(LATIN1_ENCODING)
             elif field_name == HttpHeader.CONTENT_TYPE:
                 environ["CONTENT_TYPE"] = field_value.decode(LATIN1_ENCODING)
             else:
-                field_name = field_name.decode(LATIN1_ENCODING).upper().replace("-", "_")
-                field_name = "HTTP_{}".format(field_name)
-                field_value = field_value.decode(LATIN1_ENCODING)
-                environ[field_name] = field_value
+                environ[_cgi_name(field_name)] = field_value.decode(LATIN1_ENCODING)
 
         if request.get(HttpHeader.TRANSFER_ENCODING) == b"chunked":
             environ["wsgi.input_terminated"] = True
@@ -82,10 +94,14 @@ class WSGIDispatcher(HttpDispatcher):
         environ["wsgi.multiprocess"] = True
         environ["wsgi.run_once"] = False
 
+        #
+        # Optional WSGI variables
+
+        environ["wsgi.file_wrapper"] = FileWrapper
+
         return environ
 
     async def dispatch(self, request):  # type: (HttpRequest) -> WSGIHttpResponse
-        # TODO: HTTP 1.1 Expect/Continue
         response = WSGIHttpResponse(request, self.loop, self.executor)
         environ = self.get_environ(request)
         result = await self.loop.run_in_executor(self.executor, self.application, environ, response.start_response)
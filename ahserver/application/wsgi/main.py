@@ -23,6 +23,18 @@ def main(args=None):
         "-t", "--thread-nums", dest="thread_nums", metavar="NUM", default=None, type="int", help="thread number"
     )
 
+    parser.add_option(
+        "--cpu-affinity", dest="cpu_affinity", action="store_true", default=False, help="pin each worker to a cpu"
+    )
+
+    parser.add_option(
+        "--reuse-port",
+        dest="reuse_port",
+        action="store_true",
+        default=False,
+        help="each worker listens on its own SO_REUSEPORT socket",
+    )
+
     # ssl params
     parser.add_option("--https", dest="enable_https", action="store_true", default=False, help="enable https mode")
     parser.add_option("--cert-path", dest="certfile", metavar="PATH", help="cert file path")
@@ -53,6 +65,8 @@ def main(args=None):
         enable_https=options.enable_https,
         certfile=options.certfile,
         keyfile=options.keyfile,
+        cpu_affinity=options.cpu_affinity,
+        reuse_port=options.reuse_port,
     )
 
 
@@ -2,7 +2,7 @@
 
 __all__ = ["WSGIHttpResponse"]
 
-from ahserver.server.response import SGIHttpResponse
+from ahserver.server.response import FileWrapper, SGIHttpResponse
 from ahserver.util.iterator import AsyncIteratorWrapper
 
 try:
@@ -18,6 +18,8 @@ if TYPE_CHECKING:
 
 
 class WSGIHttpResponse(SGIHttpResponse):
+    __slots__ = ("loop", "executor", "headers_sent", "result")
+
     def __init__(self, request, loop=None, executor=None):
         # type: (HttpRequest, AbstractEventLoop, Executor) -> None
         super(WSGIHttpResponse, self).__init__(request)
@@ -47,6 +49,9 @@ class WSGIHttpResponse(SGIHttpResponse):
 
     def set_result(self, result):  # type: (Iterable[bytes]) -> None
         self.result = result
+        # wsgi.file_wrapper 包装的文件, 可以零拷贝发送
+        if isinstance(result, FileWrapper) and result.fileno() is not None:
+            self.file = result
 
     def body_iterator(self):  # type: () -> AsyncIterator[bytes]
         return AsyncIteratorWrapper(self.result, loop=self.loop, executor=self.executor)
@@ -2,14 +2,12 @@
 
 __all__ = ["server"]
 
-import multiprocessing
 import os
 import signal
 import socket
 import sys
 
-
-signames = {int(v): v.name for _, v in signal.__dict__.items() if isinstance(v, signal.Signals)}
+from ..supervisor import Supervisor
 
 
 def create_ssl_context(certfile, keyfile):
@@ -40,9 +38,12 @@ def server(
     certfile=None,
     keyfile=None,
     loop=None,
+    config=None,
+    cpu_affinity=False,
+    reuse_port=False,
 ):
 
-    kwargs = {"app": app, "host": host, "port": port, "loop": loop, "max_workers": thread_nums}
+    kwargs = {"app": app, "host": host, "port": port, "loop": loop, "max_workers": thread_nums, "config": config}
 
     if enable_https:
         kwargs["ssl_context"] = create_ssl_context(certfile=certfile, keyfile=keyfile)
@@ -50,50 +51,34 @@ def server(
     # create socket
     sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port and worker_nums > 1:
+        # SO_REUSEPORT: 每个 worker 各自监听, 由内核分配连接
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        except (AttributeError, OSError):
+            print("SO_REUSEPORT is not supported, fallback to shared socket")
+            reuse_port = False
+    else:
+        reuse_port = False
     sock.bind((host, port))
-    kwargs["sock"] = sock
+
+    if reuse_port:
+        # 父进程只占用端口, 不监听
+        kwargs["sock"] = None
+        kwargs["reuse_port"] = True
+    else:
+        kwargs["sock"] = sock
 
     if worker_nums <= 1:  # single-process
         serve(**kwargs)
     else:  # multi-process
-        os.set_inheritable(sock.fileno(), True)  # 子进程继承 socket
-
-        workers = set()
-        terminating = False
-
-        def stop(sig, frame):
-            nonlocal terminating  # nonlocal允许在内嵌的函数中修改闭包变量
-
-            if not terminating:
-                terminating = True
-                print("Termination request received")
-
-            for w in workers:
-                w.terminate()
-
-        signal.signal(signal.SIGINT, stop)
-        signal.signal(signal.SIGTERM, stop)
-
-        # 创建 worker 子进程
-        for _ in range(1):
-            worker = multiprocessing.Process(target=serve, kwargs=kwargs)
-            worker.daemon = True
-            worker.start()
-            workers.add(worker)
+        if not reuse_port:
+            os.set_inheritable(sock.fileno(), True)  # 子进程继承 socket
 
-        sock.close()  # 父进程要主动关闭 socket
-
-        for worker in workers:
-            worker.join()
-
-            if worker.exitcode > 0:
-                print("Worker exited with code {}".format(worker.exitcode))
-            elif worker.exitcode < 0:
-                try:
-                    signame = signames[-worker.exitcode]
-                    print("Worker crashed on signal {}!".format(signame))
-                except KeyError:
-                    print("Worker crashed with unknown code {}!".format(worker.exitcode))
+        try:
+            Supervisor(serve, kwargs, worker_nums, cpu_affinity=cpu_affinity).run()
+        finally:
+            sock.close()  # worker 可能被重新拉起, 父进程在全部 worker 退出后才关闭 socket
 
 
 def import_application(path):
@@ -119,7 +104,7 @@ def import_application(path):
     return target
 
 
-def serve(app, host, port, sock, ssl_context=None, loop=None, max_workers=None):
+def serve(app, host, port, sock, ssl_context=None, loop=None, max_workers=None, config=None, reuse_port=False):
     import asyncio
     from ahserver.server import HttpServer
     from ahserver.network.asyncio import HttpProtocolFactory
@@ -131,7 +116,7 @@ def serve(app, host, port, sock, ssl_context=None, loop=None, max_workers=None):
     if loop is None:
         loop = asyncio.get_event_loop()
 
-    http_server = HttpServer()
+    http_server = HttpServer(config)
     http_server.add_dispatcher(
         WSGIDispatcher(loop, app, host, port, on_https=ssl_context is not None, max_workers=max_workers)
     )
@@ -140,13 +125,38 @@ def serve(app, host, port, sock, ssl_context=None, loop=None, max_workers=None):
 
     # 创建 TCP Server
     if sock is None:
-        server_coro = loop.create_server(protocol_factory=protocol_factory, host=host, port=port)
+        server_coro = loop.create_server(
+            protocol_factory=protocol_factory, host=host, port=port, reuse_port=reuse_port or None
+        )
     else:
         server_coro = loop.create_server(protocol_factory=protocol_factory, sock=sock)
     server = loop.run_until_complete(server_coro)
 
-    loop.add_signal_handler(signal.SIGTERM, loop.stop)
-    loop.add_signal_handler(signal.SIGINT, loop.stop)
+    stopping = False
+
+    async def graceful_shutdown():
+        # 停止接受新连接, 等待进行中的请求完成
+        server.close()
+        await http_server.shutdown(http_server.config.shutdown_timeout)
+        loop.stop()
+
+    def stop():
+        nonlocal stopping
+
+        if stopping:  # 再次收到信号时立即退出
+            loop.stop()
+        else:
+            stopping = True
+            loop.create_task(graceful_shutdown())
+
+    loop.add_signal_handler(signal.SIGTERM, stop)
+    loop.add_signal_handler(signal.SIGINT, stop)
+
+    def report():
+        print("Worker {} accepted {} connections".format(os.getpid(), http_server.accepted_connections), flush=True)
+
+    if hasattr(signal, "SIGUSR1"):
+        loop.add_signal_handler(signal.SIGUSR1, report)
 
     try:
         loop.run_forever()
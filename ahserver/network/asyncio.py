@@ -1,10 +1,11 @@
 # encoding=utf-8
 
-__all__ = ["HttpProtocol", "HttpProtocolFactory"]
+__all__ = ["HttpProtocol", "HttpBufferedProtocol", "HttpProtocolFactory"]
 
 import asyncio
+import logging
 
-from asyncio.protocols import Protocol
+from asyncio.protocols import BufferedProtocol, Protocol
 from asyncio.sslproto import SSLProtocol
 
 try:
@@ -22,7 +23,9 @@ except Exception:
     TYPE_CHECKING = False
 
 if TYPE_CHECKING:
+    from asyncio import TimerHandle
     from asyncio.transports import Transport
+    from typing import BinaryIO, Optional, Tuple
     from ssl import SSLContext
     from ..server.connection import Connection
     from ..server.server import HttpServer
@@ -34,11 +37,14 @@ class HttpProtocol(Protocol):
     Note: 每个 socket 连接 (TCPTransport 对象) 都会创建一个 protocol 实例
     """
 
-    def __init__(self, connection, on_ssl=False):
-        # type: (Connection, bool) -> None
+    def __init__(self, connection, on_ssl=False, write_limits=None, drain_timeout=None):
+        # type: (Connection, bool, Optional[Tuple[int, int]], Optional[float]) -> None
         self.connection = connection
         self.on_ssl = on_ssl
+        self.write_limits = write_limits
+        self.drain_timeout = drain_timeout
         self._transport = None
+        self._drain_timer = None  # type: Optional[TimerHandle]
 
     def connection_made(self, transport):  # type: (Transport) -> None
         """连接建立"""
@@ -46,6 +52,11 @@ class HttpProtocol(Protocol):
         # 注入 transport
         self._transport = transport
 
+        # 写缓冲水位
+        if self.write_limits is not None:
+            high, low = self.write_limits
+            transport.set_write_buffer_limits(high=high, low=low)
+
         # TLS 应用层协议协商
         if self.on_ssl:
             ssl_object = self._transport.get_extra_info("ssl_object")
@@ -58,12 +69,58 @@ class HttpProtocol(Protocol):
         else:
             selected = None
 
-        return self.connection.made(transport.close, transport.write, selected)
+        return self.connection.made(
+            transport.close,
+            transport.write,
+            selected,
+            transport.writelines,
+            self.sendfile,
+            transport.pause_reading,
+            transport.resume_reading,
+        )
+
+    async def sendfile(self, file, offset, count):  # type: (BinaryIO, int, int) -> None
+        """使用 sendfile 零拷贝发送文件
+
+        TLS 连接或事件循环不支持时引发 NotImplementedError
+        """
+        if self.on_ssl:
+            raise NotImplementedError()
+
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.sendfile(self._transport, file, offset, count, fallback=False)
+        except asyncio.SendfileNotAvailableError:
+            raise NotImplementedError()
 
     def connection_lost(self, exc):  # type: (Exception) -> None
         """连接断开"""
+        self._cancel_drain_timer()
         return self.connection.lost()
 
+    def pause_writing(self):
+        """写缓冲超过 high water"""
+        if self.drain_timeout is not None and self._drain_timer is None:
+            loop = asyncio.get_running_loop()
+            self._drain_timer = loop.call_later(self.drain_timeout, self._evict)
+        return self.connection.pause_writing()
+
+    def resume_writing(self):
+        """写缓冲回落到 low water 以下"""
+        self._cancel_drain_timer()
+        return self.connection.resume_writing()
+
+    def _cancel_drain_timer(self):
+        if self._drain_timer is not None:
+            self._drain_timer.cancel()
+            self._drain_timer = None
+
+    def _evict(self):
+        """写缓冲长时间无法排空 (对端读取过慢), 强制断开连接"""
+        self._drain_timer = None
+        logging.warning("write buffer is not drained in %s seconds, abort connection.", self.drain_timeout)
+        self._transport.abort()
+
     def data_received(self, data):  # type: (bytes) -> None
         """数据到达"""
         return self.connection.data_received(data)
@@ -76,15 +133,37 @@ class HttpProtocol(Protocol):
         self._transport.close()
 
 
+class HttpBufferedProtocol(HttpProtocol, BufferedProtocol):
+    """Http 协议实现 (BufferedProtocol)
+
+    socket 数据直接读入连接的 message buffer (ahp_msgbuf_t), 省去每次读取时 bytes 对象的分配和拷贝
+    """
+
+    def get_buffer(self, sizehint):  # type: (int) -> memoryview
+        """获取接收缓冲区"""
+        return self.connection.get_buffer(sizehint)
+
+    def buffer_updated(self, nbytes):  # type: (int) -> None
+        """数据已写入接收缓冲区"""
+        return self.connection.buffer_updated(nbytes)
+
+
 class HttpProtocolFactory:
-    def __init__(self, server, ssl_context=None):  # type: (HttpServer, SSLContext) -> None
+    def __init__(self, server, ssl_context=None, buffered=True):  # type: (HttpServer, SSLContext, bool) -> None
         self.server = server
         self.ssl_context = ssl_context
+        self.protocol_class = HttpBufferedProtocol if buffered else HttpProtocol
+
+        config = server.config
+        self.write_limits = (config.write_high_water, config.write_low_water)
+        self.drain_timeout = config.write_drain_timeout
 
     def create_protocol(self):  # type: () -> Protocol
         connection = self.server.new_connection()
         if self.ssl_context is not None:
-            protocol = HttpProtocol(connection, on_ssl=True)
+            protocol = self.protocol_class(
+                connection, on_ssl=True, write_limits=self.write_limits, drain_timeout=self.drain_timeout
+            )
             protocol = SSLProtocol(
                 loop=asyncio.get_running_loop(),
                 app_protocol=protocol,
@@ -93,7 +172,9 @@ class HttpProtocolFactory:
                 server_side=True,
             )
         else:
-            protocol = HttpProtocol(connection, on_ssl=False)
+            protocol = self.protocol_class(
+                connection, on_ssl=False, write_limits=self.write_limits, drain_timeout=self.drain_timeout
+            )
         return protocol
 
     def __call__(self):  # type: () -> Protocol
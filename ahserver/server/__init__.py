@@ -1,7 +1,8 @@
 # encoding=utf-8
 
-__all__ = ["HttpRequest", "HttpResponse", "HttpServer"]
+__all__ = ["HttpRequest", "HttpResponse", "HttpServer", "HttpServerConfig"]
 
+from .config import HttpServerConfig
 from .request import HttpRequest
 from .response import HttpResponse
 from .server import HttpServer
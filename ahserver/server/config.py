@@ -0,0 +1,71 @@
+# encoding=utf-8
+
+__all__ = ["HttpServerConfig"]
+
+from .constant import SIZE_20KB, SIZE_64KB
+
+try:
+    from typing import TYPE_CHECKING
+except Exception:
+    TYPE_CHECKING = False
+
+if TYPE_CHECKING:
+    from typing import Any, Optional
+
+
+class HttpServerConfig:
+    """服务器配置
+
+    未指定的配置项使用默认值, 未知的配置项会引发 TypeError:
+
+        config = HttpServerConfig(write_high_water=1024 * 1024)
+    """
+
+    def __init__(self, **kwargs):  # type: (Any) -> None
+        # 写缓冲水位: transport 缓冲超过 high water 时暂停写出响应 body, 回落到 low water 以下时恢复
+        self.write_high_water = 4 * SIZE_64KB
+        self.write_low_water = SIZE_64KB
+        # 写缓冲持续高于 high water 的最长时间 (秒), 超时后断开连接; None 表示不限制
+        self.write_drain_timeout = 60.0
+
+        # http1.1 pipeline 中允许同时处理的请求数, 1 表示逐个处理
+        self.pipeline_depth = 8
+
+        # 请求 body 超过该大小后, 其余部分写入临时文件; None 表示全部保存在内存中
+        self.body_spool_threshold = SIZE_20KB
+
+        # 请求报文大小限制, None 表示不限制. 超出限制的请求在接收完整之前即被拒绝并关闭连接:
+        #   max_uri_length: 请求行中 uri 的最大长度, 超出时回复 414
+        #   max_header_size: 请求行, 以及请求头块的最大长度, 超出时回复 431
+        #   max_header_count: 请求头的最大数量, 超出时回复 431
+        #   max_body_size: 请求 body 的最大长度, 超出时回复 413
+        self.max_uri_length = 8 * 1024
+        self.max_header_size = SIZE_64KB
+        self.max_header_count = 100
+        self.max_body_size = None  # type: Optional[int]
+
+        # http2 中本端通告的 SETTINGS_HEADER_TABLE_SIZE, 即对端编码请求头时可使用的 HPACK 动态表大小;
+        # 本端编码响应头时使用的动态表大小也不超过此值
+        self.http2_header_table_size = 4096
+        # http2 的接收窗口 (流控): http2_initial_window_size 为本端通告的 SETTINGS_INITIAL_WINDOW_SIZE, 也是连接的
+        # 初始接收窗口; 接收大 body 时窗口按估算的带宽时延积自动增长, 至多为 http2_max_window_size, None 表示不自动增长
+        self.http2_initial_window_size = 65535
+        self.http2_max_window_size = 16 * 1024 * 1024  # type: Optional[int]
+
+        # 连接超时 (秒), None 表示不限制
+        #   keep_alive_timeout: 连接空闲 (没有正在处理的请求) 的最长时间
+        #   header_timeout: 从收到请求的第一个字节到 header 接收完整的最长时间
+        #   body_timeout: 接收 body 时, 两次数据到达之间的最长间隔
+        self.keep_alive_timeout = 60.0
+        self.header_timeout = 30.0
+        self.body_timeout = 60.0
+        # 超时控制使用的时间轮精度 (秒)
+        self.timer_resolution = 1.0
+
+        # 优雅关闭时等待进行中的请求完成的最长时间 (秒), 超时后强制关闭连接; None 表示不限制
+        self.shutdown_timeout = 30.0
+
+        for name, value in kwargs.items():
+            if not hasattr(self, name):
+                raise TypeError("Unknown config item: {}".format(name))
+            setattr(self, name, value)
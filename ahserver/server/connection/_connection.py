@@ -8,7 +8,9 @@ except Exception:
     TYPE_CHECKING = False
 
 if TYPE_CHECKING:
-    from typing import Callable
+    from typing import Awaitable, BinaryIO, Callable, List
+
+    SendfileDelegate = Callable[[BinaryIO, int, int], Awaitable[None]]
 
 
 def _close():  # type: () -> None
@@ -19,25 +21,87 @@ def _send(data):  # type: (bytes) -> None
     raise NotImplementedError()
 
 
+def _send_lines(lines):  # type: (List[bytes]) -> None
+    raise NotImplementedError()
+
+
+async def _sendfile(file, offset, count):  # type: (BinaryIO, int, int) -> None
+    raise NotImplementedError()
+
+
+def _pause_reading():  # type: () -> None
+    pass
+
+
+def _resume_reading():  # type: () -> None
+    pass
+
+
 class Connection:
     def __init__(self):  # type: () -> None
         self.close = _close
         self.send = _send
+        self.send_lines = _send_lines
+        self.sendfile = _sendfile
+        self.pause_reading = _pause_reading
+        self.resume_reading = _resume_reading
+
+    def made(
+        self,
+        close_delegate,  # type: Callable[[], None]
+        send_delegate,  # type: Callable[[bytes], None]
+        selected_protocol=None,  # type: str
+        send_lines_delegate=None,  # type: Callable[[List[bytes]], None]
+        sendfile_delegate=None,  # type: SendfileDelegate
+        pause_reading_delegate=None,  # type: Callable[[], None]
+        resume_reading_delegate=None,  # type: Callable[[], None]
+    ):
+        # type: (...) -> None
+        """连接建立
 
-    def made(self, close_delegate, send_delegate, selected_protocol=None):
-        # type: (Callable[[], None], Callable[[bytes], None], str) -> None
-        """连接建立"""
+        sendfile_delegate 零拷贝发送文件, 不支持时引发 NotImplementedError;
+        pause_reading_delegate/resume_reading_delegate 暂停/恢复读取, 未提供时不暂停
+        """
         self.close = close_delegate
         self.send = send_delegate
+        if send_lines_delegate is not None:
+            self.send_lines = send_lines_delegate
+        else:
+            self.send_lines = lambda lines: send_delegate(b"".join(lines))
+        if sendfile_delegate is not None:
+            self.sendfile = sendfile_delegate
+        if pause_reading_delegate is not None and resume_reading_delegate is not None:
+            self.pause_reading = pause_reading_delegate
+            self.resume_reading = resume_reading_delegate
 
     def data_received(self, data):  # type: (bytes) -> None
         """数据到达"""
         pass
 
+    def get_buffer(self, sizehint):  # type: (int) -> memoryview
+        """获取接收缓冲区 (BufferedProtocol)"""
+        raise NotImplementedError()
+
+    def buffer_updated(self, nbytes):  # type: (int) -> None
+        """数据已写入接收缓冲区 (BufferedProtocol)"""
+        pass
+
     def eof_received(self):
         """对端关闭"""
         return None
 
+    def pause_writing(self):
+        """暂停写出"""
+        pass
+
+    def resume_writing(self):
+        """恢复写出"""
+        pass
+
+    def shutdown(self):
+        """优雅关闭: 不再接受新请求, 进行中的请求完成后关闭连接"""
+        self.close()
+
     def lost(self):
         """连接断开"""
         pass
@@ -11,7 +11,8 @@ except Exception:
     TYPE_CHECKING = False
 
 if TYPE_CHECKING:
-    from typing import Callable
+    from typing import Callable, List
+    from ._connection import SendfileDelegate
     from ..server import HttpServer
 
 
@@ -26,25 +27,67 @@ class HttpConnection(Connection):
         self.server = server
         self.protocol_stack = None
 
-    def made(self, close_delegate, send_delegate, selected_protocol):
-        # type: (Callable[[], None], Callable[[bytes], None], str) -> None
+    def made(
+        self,
+        close_delegate,  # type: Callable[[], None]
+        send_delegate,  # type: Callable[[bytes], None]
+        selected_protocol,  # type: str
+        send_lines_delegate=None,  # type: Callable[[List[bytes]], None]
+        sendfile_delegate=None,  # type: SendfileDelegate
+        pause_reading_delegate=None,  # type: Callable[[], None]
+        resume_reading_delegate=None,  # type: Callable[[], None]
+    ):
+        # type: (...) -> None
         """连接建立
 
         注入委托和连接信息
         """
-        super(HttpConnection, self).made(close_delegate, send_delegate, selected_protocol)
+        super(HttpConnection, self).made(
+            close_delegate,
+            send_delegate,
+            selected_protocol,
+            send_lines_delegate,
+            sendfile_delegate,
+            pause_reading_delegate,
+            resume_reading_delegate,
+        )
         self.protocol_stack = HttpProtocolStack(
             self.server, self, selected_protocol is not None, selected_protocol == "h2"
         )
+        self.server.connection_made(self)
+        if self.server.is_draining:
+            self.protocol_stack.shutdown()
 
     def data_received(self, data):  # type: (bytes) -> None
         """数据到达"""
         self.protocol_stack.data_received(data)
 
+    def get_buffer(self, sizehint):  # type: (int) -> memoryview
+        """获取接收缓冲区"""
+        return self.protocol_stack.get_buffer(sizehint)
+
+    def buffer_updated(self, nbytes):  # type: (int) -> None
+        """数据已写入接收缓冲区"""
+        self.protocol_stack.buffer_updated(nbytes)
+
     def eof_received(self):
         """对端关闭"""
         return self.protocol_stack.eof_received()
 
+    def pause_writing(self):
+        """暂停写出"""
+        self.protocol_stack.pause_writing()
+
+    def resume_writing(self):
+        """恢复写出"""
+        self.protocol_stack.resume_writing()
+
+    def shutdown(self):
+        """优雅关闭"""
+        if self.protocol_stack is not None:
+            self.protocol_stack.shutdown()
+
     def lost(self):
         """连接断开"""
         self.protocol_stack.lost()
+        self.server.connection_lost(self)
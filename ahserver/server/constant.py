@@ -3,3 +3,7 @@
 LATIN1_ENCODING = "iso-8859-1"
 
 SIZE_20KB = 20 * 1024
+SIZE_64KB = 64 * 1024
+
+# 每次 socket 读取时, message buffer 至少预留的可写空间
+RECV_BUFFER_SIZE = 16 * 1024
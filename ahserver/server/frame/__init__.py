@@ -4,6 +4,8 @@ __all__ = [
     "create_frame",
     "HttpFrameType",
     "HttpFrameFlag",
+    "HttpErrorCode",
+    "HttpSettingsParameter",
     "HttpFrame",
     "HttpDataFrame",
     "HttpHeadersFrame",
@@ -15,10 +17,11 @@ __all__ = [
     "HttpGoawayFrame",
     "HttpWindowUpdateFrame",
     "HttpContinuationFrame",
+    "HttpPriorityUpdateFrame",
 ]
 
 
-from ._frame import HttpFrameType, HttpFrameFlag, HttpFrame
+from ._frame import HttpFrameType, HttpFrameFlag, HttpErrorCode, HttpSettingsParameter, HttpFrame
 from .frames import (
     HttpDataFrame,
     HttpHeadersFrame,
@@ -30,5 +33,6 @@ from .frames import (
     HttpGoawayFrame,
     HttpWindowUpdateFrame,
     HttpContinuationFrame,
+    HttpPriorityUpdateFrame,
 )
 from .factory import create_frame
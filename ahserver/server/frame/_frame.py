@@ -1,6 +1,6 @@
 # encoding=utf8
 
-__all__ = ["HttpFrameType", "HttpFrameFlag", "HttpFrame"]
+__all__ = ["HttpFrameType", "HttpFrameFlag", "HttpErrorCode", "HttpSettingsParameter", "HttpFrame"]
 
 from abc import ABCMeta
 from six import add_metaclass
@@ -25,6 +25,7 @@ class HttpFrameType:
     GOAWAY = 7
     WINDOW_UPDATE = 8
     CONTINUATION = 9
+    PRIORITY_UPDATE = 0x10  # RFC 9218
 
 
 class HttpFrameFlag:
@@ -35,6 +36,37 @@ class HttpFrameFlag:
     PRIORITY = 0x20
 
 
+class HttpErrorCode:
+    """RST_STREAM 和 GOAWAY 帧中的错误码"""
+
+    NO_ERROR = 0x00
+    PROTOCOL_ERROR = 0x01
+    INTERNAL_ERROR = 0x02
+    FLOW_CONTROL_ERROR = 0x03
+    SETTINGS_TIMEOUT = 0x04
+    STREAM_CLOSED = 0x05
+    FRAME_SIZE_ERROR = 0x06
+    REFUSED_STREAM = 0x07
+    CANCEL = 0x08
+    COMPRESSION_ERROR = 0x09
+    CONNECT_ERROR = 0x0A
+    ENHANCE_YOUR_CALM = 0x0B
+    INADEQUATE_SECURITY = 0x0C
+    HTTP_1_1_REQUIRED = 0x0D
+
+
+class HttpSettingsParameter:
+    """SETTINGS 帧中的参数"""
+
+    HEADER_TABLE_SIZE = 0x01
+    ENABLE_PUSH = 0x02
+    MAX_CONCURRENT_STREAMS = 0x03
+    INITIAL_WINDOW_SIZE = 0x04
+    MAX_FRAME_SIZE = 0x05
+    MAX_HEADER_LIST_SIZE = 0x06
+    NO_RFC7540_PRIORITIES = 0x09  # RFC 9218
+
+
 @add_metaclass(ABCMeta)
 class HttpFrame:
     """frame in http/2"""
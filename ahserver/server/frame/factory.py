@@ -14,6 +14,7 @@ from .frames import (
     HttpGoawayFrame,
     HttpWindowUpdateFrame,
     HttpContinuationFrame,
+    HttpPriorityUpdateFrame,
 )
 
 try:
@@ -36,6 +37,7 @@ _type2class_map_ = {
     HttpFrameType.GOAWAY: HttpGoawayFrame,
     HttpFrameType.WINDOW_UPDATE: HttpWindowUpdateFrame,
     HttpFrameType.CONTINUATION: HttpContinuationFrame,
+    HttpFrameType.PRIORITY_UPDATE: HttpPriorityUpdateFrame,
 }
 
 
@@ -11,6 +11,7 @@ __all__ = [
     "HttpGoawayFrame",
     "HttpWindowUpdateFrame",
     "HttpContinuationFrame",
+    "HttpPriorityUpdateFrame",
 ]
 
 from ._frame import HttpFrame
@@ -29,6 +30,7 @@ class HttpDataFrame(HttpFrame):
     def __init__(self, type, flags, identifier):  # type: (int, int, int) -> None
         super(HttpDataFrame, self).__init__(type, flags, identifier)
         self.data = None  # type: bytes
+        self.length = 0  # 负载长度 (含填充), 计入流控窗口
 
 
 class HttpHeadersFrame(HttpFrame):
@@ -45,6 +47,7 @@ class HttpPriorityFrame(HttpFrame):
 class HttpRstStreamFrame(HttpFrame):
     def __init__(self, type, flags, identifier):  # type: (int, int, int) -> None
         super(HttpRstStreamFrame, self).__init__(type, flags, identifier)
+        self.error_code = 0
 
 
 class HttpSettingsFrame(HttpFrame):
@@ -61,6 +64,7 @@ class HttpPushPromiseFrame(HttpFrame):
 class HttpPingFrame(HttpFrame):
     def __init__(self, type, flags, identifier):  # type: (int, int, int) -> None
         super(HttpPingFrame, self).__init__(type, flags, identifier)
+        self.data = None  # type: bytes
 
 
 class HttpGoawayFrame(HttpFrame):
@@ -78,3 +82,10 @@ class HttpContinuationFrame(HttpFrame):
     def __init__(self, type, flags, identifier):  # type: (int, int, int) -> None
         super(HttpContinuationFrame, self).__init__(type, flags, identifier)
         self.request = None  # type: HttpRequest
+
+
+class HttpPriorityUpdateFrame(HttpFrame):
+    def __init__(self, type, flags, identifier):  # type: (int, int, int) -> None
+        super(HttpPriorityUpdateFrame, self).__init__(type, flags, identifier)
+        self.prioritized_stream_id = 0
+        self.priority_field_value = b""
@@ -2,7 +2,10 @@
 
 __all__ = ["HeadersDict"]
 
-from collections import MutableMapping
+try:
+    from collections.abc import MutableMapping
+except ImportError:
+    from collections import MutableMapping
 
 from ..util.dict import CaseInsensitiveDict
 from .constant import LATIN1_ENCODING
@@ -13,7 +16,7 @@ except Exception:
     TYPE_CHECKING = False
 
 if TYPE_CHECKING:
-    from typing import Any, AnyStr, Iterator
+    from typing import Any, AnyStr, Iterable, Iterator, Optional, Tuple
 
 
 def _to_latin1(val):  # type: (Any) -> bytes
@@ -26,24 +29,53 @@ def _to_latin1(val):  # type: (Any) -> bytes
 
 
 class HeadersDict(MutableMapping):
+    __slots__ = ("_headers", "_header_table")
+
     def __init__(self):
         super(HeadersDict, self).__init__()
-        self.headers = CaseInsensitiveDict()
+        self._headers = None  # type: Optional[CaseInsensitiveDict]
+        self._header_table = None  # type: Any  # 解析器生成的只读请求头表, 修改时才转存到 dict
+
+    @property
+    def headers(self):  # type: () -> CaseInsensitiveDict
+        if self._headers is None:
+            self._headers = CaseInsensitiveDict()
+            table, self._header_table = self._header_table, None
+            if table is not None:
+                for field_name, field_value in table.items():
+                    self._headers[field_name] = field_value
+        return self._headers
+
+    def attach_header_table(self, table):  # type: (Any) -> None
+        """使用解析器生成的请求头表, header 的名称和值在访问时才生成"""
+        self._headers = None
+        self._header_table = table
 
     def __contains__(self, field_name):  # type: (Any) -> bool
         key = _to_latin1(field_name)
+        if self._header_table is not None:
+            return key in self._header_table
         return key in self.headers
 
     def __setitem__(self, field_name, field_value):  # type: (Any, AnyStr) -> None
         key = _to_latin1(field_name)
         val = _to_latin1(field_value)
-        if key in self.headers:
-            self.headers[key] += b"," + val
+        headers = self.headers
+        if key in headers:
+            headers[key] += b"," + val
         else:
-            self.headers[key] = val
+            headers[key] = val
+
+    def add_lowercase(self, field_name, field_value):  # type: (bytes, bytes) -> None
+        """添加 header, field_name 须是小写的 bytes, 由解析器调用, 省去名称的转换"""
+        headers = self.headers
+        value = headers.lower_get(field_name)
+        headers.lower_set(field_name, field_value if value is None else value + b"," + field_value)
 
     def __getitem__(self, field_name):  # type: (Any) -> bytes
         key = _to_latin1(field_name)
+        if self._header_table is not None:
+            return self._header_table[key]
         return self.headers[key]
 
     def __delitem__(self, field_name):  # type: (Any) -> None
@@ -51,6 +83,13 @@ class HeadersDict(MutableMapping):
         del self.headers[key]
 
     def __iter__(self):  # type: () -> Iterator[bytes]
+        if self._header_table is not None:
+            return iter(self._header_table)
         return self.headers.__iter__()
 
+    def lower_items(self):  # type: () -> Iterable[Tuple[bytes, bytes]]
+        if self._header_table is not None:
+            return self._header_table.lower_items()
+        return self.headers.lower_items()
+
     __len__ = None
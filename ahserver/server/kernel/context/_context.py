@@ -23,12 +23,25 @@ if TYPE_CHECKING:
 class HttpContext:
     def __init__(self, protocol_stack):  # type: (HttpProtocolStack) -> None
         self.protocol_stack = protocol_stack
-        self.send = self.protocol_stack.connection.send
+        # 经由连接级输出缓冲写出, 见 CorkedWriter
+        self.send = self.protocol_stack.writer.write
 
     @abstractmethod
     def parse(self):  # type: () -> int
         raise NotImplementedError()
 
+    def flush(self):  # type: () -> None
+        """将 context 自行累积的数据交给输出缓冲"""
+        pass
+
+    def close(self):  # type: () -> None
+        """连接断开或切换协议时释放 context 持有的资源"""
+        pass
+
+    def shutdown(self):  # type: () -> None
+        """优雅关闭: 不再接受新请求, 进行中的请求完成后关闭连接"""
+        self.protocol_stack.close()
+
     def create_request(self):  # type: () -> HttpRequest
         return HttpRequest()
 
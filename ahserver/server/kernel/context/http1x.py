@@ -2,14 +2,16 @@
 
 __all__ = ["Http1xContext"]
 
+import functools
 import logging
 
 from asyncio import CancelledError
 
-from ahserver.server.constant import LATIN1_ENCODING
+from ahserver.server.constant import LATIN1_ENCODING, SIZE_64KB
 from ahserver.server.parser import H1Parser
+from ahserver.server.parser.h1parser import PHASE_IDLE, PHASE_HEADER, PHASE_BODY
 from ahserver.server.protocol import HttpVersion, HttpStatus, HttpHeader, PopularHeaders
-from ahserver.server.response import HttpResponse, SGIHttpResponse
+from ahserver.server.response import HttpResponse, SGIHttpResponse, server_version
 
 from ._context import HttpContext
 
@@ -19,12 +21,39 @@ except Exception:
     TYPE_CHECKING = False
 
 if TYPE_CHECKING:
-    from asyncio import Task
-    from typing import Optional
+    from asyncio import Future
+    from typing import Any, Callable, Coroutine, Optional, Set, Tuple
+    from ahserver.server.headersdict import HeadersDict
     from ahserver.server.request import HttpRequest
+    from ahserver.util.timer import TimerWheelHandle
     from ..httpproto import HttpProtocolStack
 
 
+# 请求头读取超时时回复的响应
+_REQUEST_TIMEOUT_RESPONSE = b"HTTP/1.1 408 Request Timeout\r\nConnection: close\r\nContent-Length: 0\r\n\r\n"
+
+# 客户端等待 100 Continue 时, 应用开始读取 body 后发送的中间响应
+_CONTINUE_RESPONSE = b"HTTP/1.1 100 Continue\r\n\r\n"
+
+# 请求超出大小限制时回复的响应, 以状态码索引
+_REQUEST_REJECTED_RESPONSES = {
+    status: "HTTP/1.1 {}\r\nConnection: close\r\nContent-Length: 0\r\n\r\n".format(status).encode(LATIN1_ENCODING)
+    for status in (
+        HttpStatus.PAYLOAD_TOO_LARGE,
+        HttpStatus.URI_TOO_LONG,
+        HttpStatus.REQUEST_HEADER_FIELDS_TOO_LARGE,
+    )
+}
+
+
+def _connection_options(headers):  # type: (HeadersDict) -> Set[bytes]
+    """解析 Connection 头中的选项"""
+    value = headers.get(HttpHeader.CONNECTION)
+    if not value:
+        return set()
+    return {option.strip().lower() for option in value.split(b",")}
+
+
 class Http1xContext(HttpContext):
     def __init__(self, protocol_stack):  # type: (HttpProtocolStack) -> None
         super(Http1xContext, self).__init__(protocol_stack)
@@ -34,28 +63,184 @@ class Http1xContext(HttpContext):
             self.create_request,
             self.on_request,
             self.protocol_stack.on_http2_preface,
+            self.protocol_stack.server.config.pipeline_depth,
+            self.protocol_stack.server.config.body_spool_threshold,
         )
+        config = self.protocol_stack.server.config
+        self.parser.set_limits(
+            config.max_uri_length,
+            config.max_header_size,
+            config.max_header_count,
+            config.max_body_size,
+        )
+
+        # http1.1 pipeline: 最后一个请求的响应完成信号, 响应按请求顺序写出
+        self._response_tail = None  # type: Optional[Future]
+        # 是否正在写出响应
+        self._sending_response = False
+        # pipeline 已满时, 后续请求留在缓冲区中; 积压超过此长度即暂停读取, 释放 pipeline 位置后恢复
+        self._backlog_limit = (config.max_header_size or SIZE_64KB) * config.pipeline_depth
+        self._backlog_paused = False
+
+        # 连接超时: 根据读取阶段 (空闲/读 header/读 body) 设置定时器
+        self._timer = None  # type: Optional[TimerWheelHandle]
+        self._timer_phase = None  # type: Optional[int]
+        self._update_timer()
 
     def send_data(self, *args):  # type: (...) -> None
         for data in args:
             self.send(data)
 
     def parse(self):  # type: () -> int
-        return self.parser.parse()
+        err = self.parser.parse()
+        if err == 0:
+            self._update_timer()
+            self._update_backlog()
+        else:
+            status = self.parser.error_status
+            if status is not None and self.parser.preceding_inflight == 0 and not self._sending_response:
+                # 之前的响应均已写出, 且被拒绝的请求 (如 chunked body 超长) 尚未开始响应时, 告知客户端请求被拒绝,
+                # 随后关闭连接, 应用稍后返回的响应被丢弃
+                self.send(_REQUEST_REJECTED_RESPONSES[status])
+        return err
+
+    def close(self):  # type: () -> None
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._backlog_paused:
+            self._backlog_paused = False
+            self.protocol_stack.resume_reading()
+
+    def _update_backlog(self):  # type: () -> None
+        """pipeline 已满且缓冲区中积压过多时暂停读取, 否则恢复"""
+        paused = self.parser.pipeline_full and self.protocol_stack.message_buffer.length > self._backlog_limit
+        if paused == self._backlog_paused:
+            return
+        self._backlog_paused = paused
+        if paused:
+            self.protocol_stack.pause_reading()
+        else:
+            self.protocol_stack.resume_reading()
+
+    def shutdown(self):  # type: () -> None
+        if self.parser.phase == PHASE_IDLE:
+            self.protocol_stack.close()
+        # 否则在最后一个待响应请求的响应中告知客户端关闭连接, 见 keep_alive
+
+    def _update_timer(self):  # type: () -> None
+        """根据连接的读取阶段调整超时定时器"""
+        if self.protocol_stack.is_closing:
+            return
+
+        phase = self.parser.phase
+        if phase == self._timer_phase and phase != PHASE_BODY:
+            # header 超时从请求的第一个字节开始计算, 不因后续数据到达而延长
+            return
+
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._timer_phase = phase
+
+        config = self.protocol_stack.server.config
+        if phase == PHASE_IDLE:
+            timeout = config.keep_alive_timeout
+        elif phase == PHASE_HEADER:
+            timeout = config.header_timeout
+        elif phase == PHASE_BODY:
+            timeout = config.body_timeout
+        else:
+            # 请求处理中, 不限制时间
+            timeout = None
+
+        if timeout is not None:
+            self._timer = self.protocol_stack.server.timer_wheel.call_later(timeout, self._on_timeout, phase)
+
+    def _on_timeout(self, phase):  # type: (int) -> None
+        self._timer = None
+        if self.protocol_stack.is_closing:
+            return
+
+        if phase == PHASE_HEADER and self._response_tail is None:
+            # 没有待写出的响应时, 告知客户端请求超时
+            self.send(_REQUEST_TIMEOUT_RESPONSE)
+
+        logging.debug("connection timeout on phase: %d", phase)
+        self.protocol_stack.close()
 
     def on_request(self, request):  # type: (HttpRequest) -> None
         # 收到 http 请求
 
         if request.version != HttpVersion.V10 and request.version != HttpVersion.V11:
-            response = HttpResponse(request, HttpStatus.HTTP_VERSION_NOT_UNSUPPORTED, PopularHeaders.CONNECTION_CLOSE)
-            self.send_response(response)
+            self._reject(request, HttpStatus.HTTP_VERSION_NOT_UNSUPPORTED)
             return
 
+        # body 写入临时文件跟不上接收时暂停读取
+        request.body.set_flow_control(self._body_flow_control)
+
         # upgrade
         if HttpHeader.UPGRADE in request and self.on_upgrade(request):
             return
 
-        super(Http1xContext, self).on_request(request, self._respond)
+        # http1.0 的请求忽略 Expect
+        expect = request.get(HttpHeader.EXPECT)
+        if expect is not None and request.version == HttpVersion.V11:
+            if expect.lower() != b"100-continue":
+                self._reject(request, HttpStatus.EXPECTATION_FAILED)
+                return
+            # 应用读取 body 时才发送 100 Continue; 应用不读取 body 直接响应时, 客户端不必发送 body
+            request.body.expect_continue(functools.partial(self._send_continue, self._response_tail))
+
+        super(Http1xContext, self).on_request(request, self._respond_in_order())
+
+    def _body_flow_control(self, paused):  # type: (bool) -> None
+        if paused:
+            self.protocol_stack.pause_reading()
+        else:
+            self.protocol_stack.resume_reading()
+
+    def _reject(self, request, status):  # type: (HttpRequest, HttpStatus) -> None
+        """不交给应用处理, 直接回复错误响应并关闭连接"""
+        response = HttpResponse(request, status, PopularHeaders.CONNECTION_CLOSE)
+        future = self.protocol_stack.loop.create_future()
+        future.set_result(response)
+        self.protocol_stack.loop.create_task(self._respond_in_order()(future))
+
+    def _send_continue(self, previous):  # type: (Optional[Future]) -> None
+        """发送 100 Continue, previous 为前一个请求的响应完成信号"""
+        if previous is not None and not previous.done():
+            # 中间响应同样要在前一个请求的响应之后写出
+            previous.add_done_callback(lambda _: self._send_continue(None))
+            return
+
+        # 应用已开始写出最终响应时, 不再发送中间响应
+        if not self.protocol_stack.is_closing and not self._sending_response:
+            self.send(_CONTINUE_RESPONSE)
+            self.protocol_stack.flush()
+
+    def _respond_in_order(self):  # type: () -> Callable[[Future[Optional[HttpResponse]]], Coroutine[Any, Any, None]]
+        """为请求分配响应次序
+
+        pipeline 中的请求并发 dispatch, 但响应必须严格按照请求的顺序写出
+        """
+        previous = self._response_tail
+        done = self.protocol_stack.loop.create_future()
+        self._response_tail = done
+
+        async def respond(task):  # type: (Future[Optional[HttpResponse]]) -> None
+            try:
+                if previous is not None:
+                    # 等待前一个请求的响应写出
+                    await previous
+                await self._respond(task)
+            finally:
+                if not done.done():
+                    done.set_result(None)
+                if self._response_tail is done:
+                    self._response_tail = None
+
+        return respond
 
     def on_upgrade(self, request):
         identifier = request[HttpHeader.UPGRADE]
@@ -96,6 +281,16 @@ class Http1xContext(HttpContext):
         for field_name, field_value in header_dict.items():
             self.send_data(field_name, b": ", field_value, b"\r\n")
 
+        # 默认响应头
+        default_headers = self.protocol_stack.server.default_headers
+        if HttpHeader.DATE not in header_dict and HttpHeader.SERVER not in header_dict:
+            self.send(default_headers.render())
+        else:
+            if HttpHeader.DATE not in header_dict:
+                self.send_data(HttpHeader.DATE, b": ", default_headers.date, b"\r\n")
+            if HttpHeader.SERVER not in header_dict:
+                self.send_data(HttpHeader.SERVER, b": ", server_version, b"\r\n")
+
     def send_status_and_headers(self, response):  # type: (HttpResponse) -> None
         self.send_status_line(response)
         self.send_headers(response)
@@ -108,23 +303,92 @@ class Http1xContext(HttpContext):
     def send_last_chunk(self):
         self.send(b"0\r\n\r\n")
 
-    async def send_sgi_response(self, response):  # type: (SGIHttpResponse) -> None
+    def keep_alive(self, response, delimited=True):  # type: (HttpResponse, bool) -> bool
+        """确定响应后是否保持连接, 并据此设置响应的 Connection 头
+
+        http1.1 默认保持连接, http1.0 仅在请求带有 Connection: keep-alive 时保持连接.
+        delimited 表示响应 body 的长度能否由客户端界定, 否则只能以关闭连接结束 body
+        """
+        request = response.request
+        options = _connection_options(request)
+        if request.version == HttpVersion.V10:
+            keep_alive = b"keep-alive" in options
+        else:
+            keep_alive = b"close" not in options
+
+        response_options = _connection_options(response)
+        if keep_alive:
+            keep_alive = delimited and b"close" not in response_options
+        if keep_alive and request.body.awaiting_continue:
+            # 未发送 100 Continue 即已响应, 客户端可能不再发送 body, 无法确定下一个请求的起始位置
+            keep_alive = False
+        if keep_alive and self.protocol_stack.is_draining:
+            # 优雅关闭中, 最后一个待响应的请求完成后关闭连接
+            keep_alive = self.parser.inflight > 1
+
+        if not keep_alive:
+            if b"close" not in response_options:
+                if HttpHeader.CONNECTION in response:
+                    del response[HttpHeader.CONNECTION]
+                response[HttpHeader.CONNECTION] = b"close"
+        elif request.version == HttpVersion.V10 and b"keep-alive" not in response_options:
+            response[HttpHeader.CONNECTION] = b"keep-alive"
+
+        return keep_alive
+
+    def _prepare_sgi_headers(self, response, has_body):  # type: (SGIHttpResponse, bool) -> Tuple[bool, bool]
+        """确定 body 的传输方式, 返回 (是否 chunked, 是否保持连接)"""
+        send_chunked = False
+        delimited = True
+        if response.headers.get(HttpHeader.TRANSFER_ENCODING) == b"chunked":
+            send_chunked = True
+        elif HttpHeader.CONTENT_LENGTH not in response.headers:
+            if not has_body:
+                if str(response.status)[:3] not in ("204", "304"):
+                    response.headers[HttpHeader.CONTENT_LENGTH] = b"0"
+            elif response.request.version == HttpVersion.V10:
+                # http1.0 不支持 chunked, 以关闭连接结束 body
+                delimited = False
+            else:
+                send_chunked = True
+                response.headers[HttpHeader.TRANSFER_ENCODING] = b"chunked"
+
+        return send_chunked, self.keep_alive(response, delimited)
+
+    async def send_file_response(self, response):  # type: (SGIHttpResponse) -> bool
+        offset, count = response.file.span()
+
+        content_length = response.headers.get(HttpHeader.CONTENT_LENGTH)
+        if content_length is not None and int(content_length) <= count:
+            # 只发送 Content-Length 声明的部分
+            count = int(content_length)
+        else:
+            if content_length is not None:
+                # 声明的长度超出文件的发送范围, 客户端将一直等待缺少的字节, 或把下一个响应当作 body:
+                # 以实际发送的长度为准
+                del response.headers[HttpHeader.CONTENT_LENGTH]
+            response.headers[HttpHeader.CONTENT_LENGTH] = str(count).encode(LATIN1_ENCODING)
+
+        keep_alive = self.keep_alive(response)
+
+        self.send_status_and_headers(response)
+
+        if count > 0:
+            await self.protocol_stack.sendfile(response.file.file, offset, count)
+
+        return keep_alive
+
+    async def send_sgi_response(self, response):  # type: (SGIHttpResponse) -> bool
         headers_sent = False
         send_chunked = False
+        keep_alive = False
 
         async for body in response.body:
             if not body:  # don't send headers until body appears
                 continue
 
             if not headers_sent:
-                response.normalize_headers()
-
-                if response.headers.get(HttpHeader.TRANSFER_ENCODING) == b"chunked":
-                    send_chunked = True
-                elif HttpHeader.CONTENT_LENGTH not in response.headers:
-                    send_chunked = True
-                    response.headers[HttpHeader.TRANSFER_ENCODING] = b"chunked"
-
+                send_chunked, keep_alive = self._prepare_sgi_headers(response, True)
                 self.send_status_and_headers(response)
 
                 headers_sent = True
@@ -134,49 +398,72 @@ class Http1xContext(HttpContext):
             else:
                 self.send_data(body)
 
+            # 流控: 写缓冲过高时等待排空
+            await self.protocol_stack.drain()
+
         if not headers_sent:  # send headers now if body was empty
+            send_chunked, keep_alive = self._prepare_sgi_headers(response, False)
             self.send_status_and_headers(response)
 
         if send_chunked:
             self.send_last_chunk()
 
-    def send_raw_response(self, response):  # type: (HttpResponse) -> None
+        return keep_alive
+
+    def send_raw_response(self, response):  # type: (HttpResponse) -> bool
         body = response.body
 
         if HttpHeader.CONTENT_LENGTH not in response.headers:
             if body is not None:
                 response.headers[HttpHeader.CONTENT_LENGTH] = str(len(body)).encode(LATIN1_ENCODING)
             else:
-                response.headers[HttpHeader.CONTENT_LENGTH] = 0
+                response.headers[HttpHeader.CONTENT_LENGTH] = b"0"
+
+        keep_alive = self.keep_alive(response)
 
         self.send_status_and_headers(response)
 
         if body is not None:
             self.send_data(body)
 
-    async def send_response(self, response):  # type: (HttpResponse) -> None
+        return keep_alive
+
+    async def send_response(self, response):  # type: (HttpResponse) -> bool
+        """写出响应, 返回是否保持连接"""
         # write response
         if isinstance(response, SGIHttpResponse):
             try:
+                if response.file is not None:
+                    return await self.send_file_response(response)
                 return await self.send_sgi_response(response)
             finally:
                 response.close()
         else:
             return self.send_raw_response(response)
 
-    async def _respond(self, task):  # type: (Task[Optional[HttpResponse]]) -> None
+    async def _respond(self, task):  # type: (Future[Optional[HttpResponse]]) -> None
         """dispatch 任务回调，回复 http 响应"""
         try:
             response = task.result()
-            if response is not None:
-                await self.send_response(response)
-                # close connect
-                if response.get(HttpHeader.CONNECTION) == "close":
-                    self.protocol_stack.connection.close()
+            if response is not None and not self.protocol_stack.is_closing:
+                self._sending_response = True
+                keep_alive = await self.send_response(response)
+                if keep_alive:
+                    self.protocol_stack.flush()
+                else:
+                    # close connect
+                    self.protocol_stack.close()
         except CancelledError:
             logging.debug("task is cancelled.")
+        except ConnectionResetError:
+            logging.debug("connection is lost.")
         except Exception:
             logging.exception("encounter unexpected exception.")
         finally:
-            # TODO: http1.1 pipeline
-            self.parser.free()
+            self._sending_response = False
+            # 释放 pipeline 位置, 继续解析排队的请求
+            self.parser.release()
+            if not self.protocol_stack.is_closing:
+                self.protocol_stack.parse()
+                if self.protocol_stack.is_draining and self.parser.phase == PHASE_IDLE:
+                    self.protocol_stack.close()
@@ -2,13 +2,16 @@
 
 __all__ = ["Http2Context"]
 
-from ahserver.server.frame import create_frame, HttpFrameType
-from ahserver.server.parser import H2Parser
+from collections import OrderedDict
+
+from ahserver.server.frame import create_frame, HttpErrorCode, HttpFrameType, HttpSettingsParameter
+from ahserver.server.parser import H2FrameWriter, H2Parser, HpackEncoder
 from ahserver.server.protocol import HttpVersion
 from ahserver.server.request import HttpRequest
 
 from ._context import HttpContext
-from ..stream.http2 import Http2PlainStream, Http2SuperStream, StreamState
+from ..stream.http2 import MAX_WINDOW_SIZE, Http2PlainStream, Http2SuperStream, StreamState
+from ..stream.scheduler import Http2WriteScheduler
 
 try:
     from typing import TYPE_CHECKING
@@ -16,26 +19,93 @@ except Exception:
     TYPE_CHECKING = False
 
 if TYPE_CHECKING:
-    from typing import Dict
-    from ahserver.server.frame import HttpFrame, HttpHeadersFrame, HttpContinuationFrame
+    from asyncio import Handle, Task
+    from typing import Any, Callable, Coroutine, Dict, Optional, Set, Tuple
+    from ahserver.server.response import HttpResponse
+    from ahserver.server.frame import HttpFrame, HttpDataFrame, HttpHeadersFrame, HttpContinuationFrame
     from ..httpproto import HttpProtocolStack
     from ..stream.http2 import Http2Stream
 
 
+# SETTINGS_HEADER_TABLE_SIZE 的初始值
+DEFAULT_HEADER_TABLE_SIZE = 4096
+# SETTINGS_MAX_FRAME_SIZE 的初始值及上限
+DEFAULT_MAX_FRAME_SIZE = 16384
+MAX_FRAME_SIZE = 2 ** 24 - 1
+# SETTINGS_INITIAL_WINDOW_SIZE 的初始值, 也是连接流控窗口的初始大小
+DEFAULT_INITIAL_WINDOW_SIZE = 65535
+# 估算 BDP 所用 PING 帧的负载
+BDP_PING_DATA = b"ahs:bdp\x00"
+# 为尚未建立的流保存的 PRIORITY_UPDATE 的数量上限
+MAX_PENDING_PRIORITY_UPDATES = 100
+# 记录的本端以 RST_STREAM 终止的流的数量上限
+MAX_RESET_STREAMS = 100
+
+
+def _pack_setting(identifier, value):  # type: (int, int) -> bytes
+    return identifier.to_bytes(length=2, byteorder="big", signed=False) + value.to_bytes(
+        length=4, byteorder="big", signed=False
+    )
+
+
 class Http2Context(HttpContext):
     def __init__(self, protocol_stack):  # type: (HttpProtocolStack) -> None
         super(Http2Context, self).__init__(protocol_stack)
 
         self.splitter = H2Parser(self.protocol_stack.message_buffer, self.create_frame, self.frame_received)
+        config = self.protocol_stack.server.config
+        self.splitter.set_limits(config.max_header_size, config.max_header_count)
+        # 响应头的编码器, 各个流共用, 头块须按编码的顺序发送
+        self.encoder = HpackEncoder(config.http2_header_table_size)
+        # 对端通告的 SETTINGS_MAX_FRAME_SIZE, 发送的帧不能超过此大小
+        self.max_frame_size = DEFAULT_MAX_FRAME_SIZE
+
+        # 发送方向的流控 (RFC 7540 6.9): 连接的发送窗口, 以及对端通告的 SETTINGS_INITIAL_WINDOW_SIZE (流的初始发送窗口)
+        self.send_window = DEFAULT_INITIAL_WINDOW_SIZE
+        self.initial_send_window = DEFAULT_INITIAL_WINDOW_SIZE
+        # 各个流的 DATA 帧经由写调度器按优先级交错发送
+        self.scheduler = Http2WriteScheduler(self)
+        # 待写出的帧: 一轮事件循环迭代中产生的帧在迭代结束时以一次 writelines 写出,
+        # 累积超过 write_high_water 时立即写出
+        self.frame_writer = H2FrameWriter()
+        self._flush_threshold = config.write_high_water
+        self._flush_handle = None  # type: Optional[Handle]
+        # 先于 HEADERS 到达的 PRIORITY_UPDATE
+        self._priority_updates = {}  # type: Dict[int, Tuple[int, bool]]
+
+        # 接收方向的流控: 本端的接收窗口大小 (连接和各个流相同), 连接剩余的接收窗口, 以及已接收但尚未归还的字节数.
+        # 接收窗口按估算的 BDP 自动增长, 至多为 http2_max_window_size
+        self.recv_window_size = config.http2_initial_window_size
+        self.recv_window = DEFAULT_INITIAL_WINDOW_SIZE
+        self._recv_consumed = 0
+        self._max_recv_window_size = min(max(config.http2_max_window_size or 0, self.recv_window_size), MAX_WINDOW_SIZE)
+        # 有待归还接收窗口的流, 每次解析后批量发送 WINDOW_UPDATE
+        self._recv_consumed_streams = set()  # type: Set[Http2Stream]
+        # BDP 估算: PING 发出的时间 (None 表示没有未确认的 PING), 此后接收的字节数, 以及观测到的最大带宽
+        self._bdp_ping_time = None  # type: Optional[float]
+        self._bdp_bytes = 0
+        self._max_bandwidth = 0.0
+
         self.super_stream = Http2SuperStream(self, 0)
 
+        # 未关闭的流, 流关闭后即移除
         self.stream_table = {0: self.super_stream}  # type: Dict[int, Http2Stream]
+        # 已建立的最大流标识, 不大于此值且不在 stream_table 中的流已关闭
+        self._max_stream_id = 0
+        # 最近由本端以 RST_STREAM 终止的流, 对端此前已发出的帧到达时应忽略 (RFC 7540 5.1)
+        self._reset_streams = OrderedDict()  # type: OrderedDict[int, None]
+
+        # 正在处理的请求数
+        self._active_requests = 0
+        # 发送 GOAWAY 时的最大流标识, 此后新建的流将被忽略
+        self._last_stream_id = None  # type: Optional[int]
 
     def on_http1_request(self, request):
         stream = Http2PlainStream(self, 1)
         stream.state = StreamState.HALF_CLOSED_REMOTE
         stream.request = request
         self.stream_table[1] = stream
+        self._max_stream_id = 1
         self.on_request(request, stream._respond)
 
     def get_stream_request(self, identifier):
@@ -55,7 +125,8 @@ class Http2Context(HttpContext):
         elif frame_type == HttpFrameType.CONTINUATION:
             request = self.get_stream_request(identifier)
             if request is None:
-                return None
+                # 流已关闭, 仍须解码头块以保持 HPACK 动态表同步
+                request = HttpRequest(version=HttpVersion.V20)
             continuation_frame = create_frame(frame_type, flags, identifier)  # type: HttpContinuationFrame
             continuation_frame.request = request
             return continuation_frame
@@ -63,14 +134,238 @@ class Http2Context(HttpContext):
             return create_frame(frame_type, flags, identifier)
 
     def parse(self):  # type: () -> int
-        return self.splitter.parse()
+        err = self.splitter.parse()
+        if err != 0:
+            # 连接错误: 发送 GOAWAY 后关闭连接
+            self.super_stream.send_goaway(self._max_stream_id, self.splitter.error_code)
+            return err
+        self._update_recv_windows()
+        return err
+
+    def close(self):  # type: () -> None
+        # 连接断开, 唤醒等待发送的流, 丢弃未写出的帧
+        self.scheduler.close()
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self.frame_writer.take()
+
+    def write_frame(self, frame_type, flags, identifier, payload=None):
+        # type: (int, int, int, Optional[bytes]) -> None
+        frame_writer = self.frame_writer
+        frame_writer.write_frame(frame_type, flags, identifier, payload)
+        if frame_writer.size >= self._flush_threshold:
+            # 积压过多, 立即写出, 使 transport 的写缓冲水位及时反映
+            self.flush()
+        else:
+            self.schedule_flush()
+
+    def schedule_flush(self):  # type: () -> None
+        """在本轮事件循环迭代结束时写出累积的帧"""
+        if self._flush_handle is None:
+            self._flush_handle = self.protocol_stack.loop.call_soon(self._flush_frames)
+
+    def _flush_frames(self):  # type: () -> None
+        self._flush_handle = None
+        # 写调度器此时才分帧发送本轮就绪的 DATA 帧, 与同一轮中的 HEADERS, WINDOW_UPDATE 等帧一并写出
+        self.scheduler.pump()
+        self.flush()
+
+    def flush(self):  # type: () -> None
+        if self.frame_writer.size:
+            self.protocol_stack.writer.writelines(self.frame_writer.take())
+
+    def on_request(self, request, callback=None):
+        # type: (HttpRequest, Callable[[Task[Optional[HttpResponse]]], Coroutine[Any, Any, None]]) -> None
+        self._active_requests += 1
+
+        async def respond(task):  # type: (Task[Optional[HttpResponse]]) -> None
+            try:
+                if callback is not None:
+                    await callback(task)
+            finally:
+                self._active_requests -= 1
+                if self.protocol_stack.is_draining and self._active_requests == 0:
+                    self.protocol_stack.close()
+
+        super(Http2Context, self).on_request(request, respond)
+
+    def shutdown(self):  # type: () -> None
+        # GOAWAY: 告知对端不再接受新的流, 已建立的流继续处理
+        self._last_stream_id = self._max_stream_id
+        self.super_stream.send_goaway(self._last_stream_id)
+
+        if self._active_requests == 0:
+            self.protocol_stack.close()
+        else:
+            self.protocol_stack.flush()
 
     def frame_received(self, frame):  # type: (HttpFrame) -> int
+        if frame.type == HttpFrameType.DATA:
+            # 无论流的状态如何, DATA 帧都计入连接的接收窗口
+            err = self.data_frame_received(frame)
+            if err != 0:
+                return err
+
         stream = self.stream_table.get(frame.identifier)
         if stream is None:
+            if frame.identifier <= self._max_stream_id:
+                # 已关闭的流: DATA 帧以 STREAM_CLOSED 回应 (RFC 7540 6.1), 本端已发出 RST_STREAM 时忽略
+                if frame.type == HttpFrameType.DATA and frame.identifier not in self._reset_streams:
+                    self.write_frame(
+                        HttpFrameType.RST_STREAM,
+                        0,
+                        frame.identifier,
+                        HttpErrorCode.STREAM_CLOSED.to_bytes(length=4, byteorder="big", signed=False),
+                    )
+                    self.stream_reset(frame.identifier)
+                return 0
+            if frame.type != HttpFrameType.HEADERS:
+                # 尚未建立的流 (如 PRIORITY 帧)
+                return 0
+            if self._last_stream_id is not None and frame.identifier > self._last_stream_id:
+                # GOAWAY 之后的新流
+                return 0
             stream = Http2PlainStream(self, frame.identifier)
             self.stream_table[frame.identifier] = stream
+            self._max_stream_id = frame.identifier
+            err = stream.frame_received(frame)
+            priority = self._priority_updates.pop(frame.identifier, None)
+            if priority is not None:
+                # PRIORITY_UPDATE 优先于请求的 priority 头
+                stream.urgency, stream.incremental = priority
+            return err
         return stream.frame_received(frame)
 
+    def stream_closed(self, stream):  # type: (Http2Stream) -> None
+        self.stream_table.pop(stream.identifier, None)
+        self._recv_consumed_streams.discard(stream)
+
+    def stream_reset(self, identifier):  # type: (int) -> None
+        """本端发出了 RST_STREAM, 记录流标识"""
+        self._reset_streams[identifier] = None
+        if len(self._reset_streams) > MAX_RESET_STREAMS:
+            self._reset_streams.popitem(last=False)
+
+    def priority_updated(self, identifier, urgency, incremental):  # type: (int, int, bool) -> None
+        """对端以 PRIORITY_UPDATE 调整流的优先级"""
+        stream = self.stream_table.get(identifier)
+        if stream is not None:
+            self.scheduler.reprioritize(stream, urgency, incremental)
+        elif identifier > self._max_stream_id and len(self._priority_updates) < MAX_PENDING_PRIORITY_UPDATES:
+            # 流尚未建立, 保存至收到其 HEADERS
+            self._priority_updates[identifier] = (urgency, incremental)
+
+    def increase_send_window(self, increment):  # type: (int) -> bool
+        """对端扩大连接的发送窗口, 窗口超过上限时返回 False"""
+        self.send_window += increment
+        if self.send_window > MAX_WINDOW_SIZE:
+            return False
+        if self.send_window > 0:
+            self.scheduler.connection_window_updated()
+        return True
+
+    def data_frame_received(self, frame):  # type: (HttpDataFrame) -> int
+        if frame.length > self.recv_window:
+            # 超出连接的接收窗口
+            return -HttpErrorCode.FLOW_CONTROL_ERROR
+        self.recv_window -= frame.length
+        self._recv_consumed += frame.length
+        if frame.length > 0:
+            self._sample_bdp(frame.length)
+        return 0
+
+    def recv_window_consumed(self, stream):  # type: (Http2Stream) -> None
+        """流接收了 DATA 帧, 解析结束后检查是否归还其接收窗口"""
+        self._recv_consumed_streams.add(stream)
+
+    def _update_recv_windows(self):  # type: () -> None
+        # 数据交给应用后即归还接收窗口 (body 超过阈值的部分写入临时文件, 不会持续占用内存). 每次解析后批量处理,
+        # 且已接收的字节数达到窗口的一半时才发送 WINDOW_UPDATE, 避免逐帧发送
+        threshold = self.recv_window_size // 2
+        if self._recv_consumed >= threshold:
+            self.super_stream.send_window_update(self._recv_consumed)
+            self.recv_window += self._recv_consumed
+            self._recv_consumed = 0
+        if self._recv_consumed_streams:
+            for stream in self._recv_consumed_streams:
+                stream.update_recv_window(threshold)
+            self._recv_consumed_streams.clear()
+
+    def _sample_bdp(self, length):  # type: (int) -> None
+        # 收到数据时发出 PING, 至收到其确认为止接收的字节数即一个 RTT 内的接收量, 作为 BDP 的样本
+        if self._bdp_ping_time is None:
+            if self.recv_window_size >= self._max_recv_window_size:
+                return
+            self._bdp_ping_time = self.protocol_stack.loop.time()
+            self._bdp_bytes = 0
+            self.super_stream.send_frame(HttpFrameType.PING, 0, BDP_PING_DATA)
+        self._bdp_bytes += length
+
+    def ping_acknowledged(self, data):  # type: (bytes) -> None
+        if data != BDP_PING_DATA or self._bdp_ping_time is None:
+            return
+        rtt = max(self.protocol_stack.loop.time() - self._bdp_ping_time, 1e-6)
+        self._bdp_ping_time = None
+        sample = self._bdp_bytes
+        bandwidth = sample / rtt
+        if bandwidth > self._max_bandwidth:
+            self._max_bandwidth = bandwidth
+        # 一个 RTT 内的接收量接近接收窗口, 且带宽达到新高时, 认为窗口限制了吞吐: 将窗口扩大为样本的两倍
+        if sample * 3 >= self.recv_window_size * 2 and bandwidth >= self._max_bandwidth:
+            self._grow_recv_window(min(sample * 2, self._max_recv_window_size))
+
+    def _grow_recv_window(self, size):  # type: (int) -> None
+        delta = size - self.recv_window_size
+        if delta <= 0:
+            return
+        self.recv_window_size = size
+        # 连接的接收窗口以 WINDOW_UPDATE 扩大, 流的接收窗口以新的 SETTINGS_INITIAL_WINDOW_SIZE 扩大
+        self.recv_window += delta
+        self.super_stream.send_window_update(delta)
+        self.super_stream.send_frame(
+            HttpFrameType.SETTINGS, 0, _pack_setting(HttpSettingsParameter.INITIAL_WINDOW_SIZE, size)
+        )
+        for stream in self.stream_table.values():
+            stream.recv_window += delta
+
     def send_preface(self):
-        self.super_stream.send_frame(HttpFrameType.SETTINGS, 0)
+        settings = b""
+        header_table_size = self.protocol_stack.server.config.http2_header_table_size
+        if header_table_size != DEFAULT_HEADER_TABLE_SIZE:
+            settings += _pack_setting(HttpSettingsParameter.HEADER_TABLE_SIZE, header_table_size)
+        if self.recv_window_size != DEFAULT_INITIAL_WINDOW_SIZE:
+            settings += _pack_setting(HttpSettingsParameter.INITIAL_WINDOW_SIZE, self.recv_window_size)
+        # 只使用 RFC 9218 的优先级
+        settings += _pack_setting(HttpSettingsParameter.NO_RFC7540_PRIORITIES, 1)
+        self.super_stream.send_frame(HttpFrameType.SETTINGS, 0, settings)
+        if self.recv_window_size > self.recv_window:
+            # 连接的接收窗口不受 SETTINGS 影响, 只能以 WINDOW_UPDATE 扩大
+            self.super_stream.send_window_update(self.recv_window_size - self.recv_window)
+            self.recv_window = self.recv_window_size
+
+    def settings_received(self, settings):  # type: (Dict[int, int]) -> int
+        """应用对端通告的 SETTINGS, 参数无效时返回 http2 错误码取反"""
+        header_table_size = settings.get(HttpSettingsParameter.HEADER_TABLE_SIZE)
+        if header_table_size is not None:
+            self.encoder.set_max_table_size(header_table_size)
+        max_frame_size = settings.get(HttpSettingsParameter.MAX_FRAME_SIZE)
+        if max_frame_size is not None:
+            if not DEFAULT_MAX_FRAME_SIZE <= max_frame_size <= MAX_FRAME_SIZE:
+                return -HttpErrorCode.PROTOCOL_ERROR
+            self.max_frame_size = max_frame_size
+        initial_window_size = settings.get(HttpSettingsParameter.INITIAL_WINDOW_SIZE)
+        if initial_window_size is not None:
+            if initial_window_size > MAX_WINDOW_SIZE:
+                return -HttpErrorCode.FLOW_CONTROL_ERROR
+            # 按新旧值之差调整各个流的发送窗口, 窗口可能因此变为负值
+            delta = initial_window_size - self.initial_send_window
+            self.initial_send_window = initial_window_size
+            for stream in self.stream_table.values():
+                if stream is not self.super_stream and not stream.increase_send_window(delta):
+                    return -HttpErrorCode.FLOW_CONTROL_ERROR
+        return 0
+
+    def settings_acknowledged(self):  # type: () -> None
+        # 对端确认本端的 SETTINGS 后, 其编码请求头时才会遵守新的动态表大小上限
+        self.splitter.set_header_table_size(self.protocol_stack.server.config.http2_header_table_size)
@@ -0,0 +1,70 @@
+# encoding=utf-8
+
+__all__ = ["CorkedWriter"]
+
+from ..constant import SIZE_64KB
+
+try:
+    from typing import TYPE_CHECKING
+except Exception:
+    TYPE_CHECKING = False
+
+if TYPE_CHECKING:
+    from asyncio import AbstractEventLoop, Handle
+    from typing import Callable, List, Optional
+
+
+class CorkedWriter:
+    """连接级输出缓冲 (cork)
+
+    暂存同一轮 event loop 迭代中产生的报文片段 (status line, headers, body chunk ...),
+    在迭代结束时 (或响应结束时) 以一次 writelines 写入 transport.
+    """
+
+    def __init__(self, loop, send_lines, high_water=SIZE_64KB):
+        # type: (AbstractEventLoop, Callable[[List[bytes]], None], int) -> None
+        self._loop = loop
+        self._send_lines = send_lines
+        self._high_water = high_water
+
+        self._chunks = []  # type: List[bytes]
+        self._size = 0
+        self._flush_handle = None  # type: Optional[Handle]
+
+    def write(self, data):  # type: (bytes) -> None
+        if not data:
+            return
+
+        self._chunks.append(data)
+        self._size += len(data)
+
+        if self._size >= self._high_water:
+            # 积压过多, 立即写出
+            self.flush()
+        elif self._flush_handle is None:
+            # 在本轮迭代结束时写出
+            self._flush_handle = self._loop.call_soon(self.flush)
+
+    def writelines(self, chunks):  # type: (List[bytes]) -> None
+        """立即写出一批已合并的片段 (如 http2 连接在一轮迭代中累积的帧), 暂存的数据先于其写出"""
+        if self._chunks:
+            self._chunks.extend(chunks)
+            self.flush()
+        else:
+            self._send_lines(chunks)
+
+    def flush(self):  # type: () -> None
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        if self._chunks:
+            chunks, self._chunks, self._size = self._chunks, [], 0
+            self._send_lines(chunks)
+
+    def discard(self):  # type: () -> None
+        """丢弃未写出的数据 (连接已断开)"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self._chunks, self._size = [], 0
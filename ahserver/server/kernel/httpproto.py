@@ -3,12 +3,16 @@
 __all__ = ["HttpProtocolStack"]
 
 import asyncio
+import os
 
+from collections import deque
 from inspect import iscoroutinefunction
 
+from ..constant import RECV_BUFFER_SIZE, SIZE_64KB
 from ..parser import Buffer
 from ..protocol import HttpHeader
 from ..request import HttpRequest
+from .cork import CorkedWriter
 from .context.http1x import Http1xContext
 from .context.http2 import Http2Context
 
@@ -18,8 +22,8 @@ except Exception:
     TYPE_CHECKING = False
 
 if TYPE_CHECKING:
-    from asyncio import AbstractEventLoop, Task
-    from typing import Any, Callable, Coroutine, Optional
+    from asyncio import AbstractEventLoop, Future, Handle, Task
+    from typing import Any, BinaryIO, Callable, Coroutine, Deque, List, Optional
     from ..response import HttpResponse
     from ..server import HttpServer
     from ..connection.http import HttpConnection
@@ -39,25 +43,194 @@ class HttpProtocolStack:
         self.is_h2 = is_h2
 
         self.message_buffer = Buffer()
-        self.context = Http1xContext(self)
+        server.date_cache.start(loop)
+        self.writer = CorkedWriter(loop, connection.send_lines)
 
         self.request_before_upgrade = None
 
         self._task_pool = set()
 
+        # 连接正在关闭 (或已断开), 不再解析和响应后续请求
+        self.is_closing = False
+        # 优雅关闭中, 进行中的请求完成后关闭连接
+        self.is_draining = False
+
+        # 读取流控: 暂停读取的请求数, 为 0 时恢复读取
+        self._read_pausers = 0
+
+        # 写出流控
+        self._write_paused = False
+        self._connection_lost = False
+        self._drain_waiters = deque()  # type: Deque[Future]
+
+        # message buffer 不能扩容时使用的临时接收缓冲区, 及尚未追加到 message buffer 的数据
+        self._spare_buffer = None  # type: Optional[bytearray]
+        self._pending_data = []  # type: List[bytes]
+        self._pending_handle = None  # type: Optional[Handle]
+
+        self.context = Http1xContext(self)
+
     def data_received(self, data):  # type: (bytes) -> None
         """数据到达"""
 
-        print(data)
-
         # 追加到buffer
         self.message_buffer.append(data)
 
+        self.parse()
+
+    def get_buffer(self, sizehint):  # type: (int) -> memoryview
+        """交出 message buffer 尾部的可写空间, socket 数据直接读入其中"""
+
+        if sizehint < RECV_BUFFER_SIZE:
+            sizehint = RECV_BUFFER_SIZE
+
+        if self.message_buffer.exported:
+            # 上次交出的 memoryview 尚未释放 (如 SSLProtocol 在 buffer_updated 之后重入读取),
+            # 此时 message buffer 不能扩容, 改用临时缓冲区接收
+            self._spare_buffer = bytearray(sizehint)
+            return memoryview(self._spare_buffer)
+
+        self._append_pending_data()
+        self.message_buffer.reserve(sizehint)
+        return memoryview(self.message_buffer)
+
+    def buffer_updated(self, nbytes):  # type: (int) -> None
+        """数据已读入 message buffer"""
+
+        if self._spare_buffer is not None:
+            self._pending_data.append(bytes(self._spare_buffer[:nbytes]))
+            self._spare_buffer = None
+            if self.message_buffer.exported:
+                # 等待 memoryview 释放后再追加和解析; 对端可能已发完请求, 不能等到下一次 get_buffer
+                self._schedule_pending_data()
+                return
+            self._append_pending_data()
+        else:
+            self.message_buffer.commit(nbytes)
+
+        self.parse()
+
+    def _schedule_pending_data(self):  # type: () -> None
+        if self._pending_handle is None:
+            self._pending_handle = self.loop.call_soon(self._parse_pending_data)
+
+    def _parse_pending_data(self):  # type: () -> None
+        self._pending_handle = None
+        if self._connection_lost or not self._pending_data:
+            # 连接已断开, 或数据已在 get_buffer 中追加
+            return
+        if self.message_buffer.exported:
+            # memoryview 仍未释放 (如 transport 仍在读取循环中), 下一轮迭代再试
+            self._schedule_pending_data()
+            return
+        self._append_pending_data()
+        self.parse()
+
+    def _append_pending_data(self):  # type: () -> None
+        for data in self._pending_data:
+            self.message_buffer.append(data)
+        self._pending_data.clear()
+
+    def parse(self):  # type: () -> None
         # 解协议
         err = self.context.parse()
         if err != 0:
             # 解析出错，断开连接
-            self.connection.close()
+            self.close()
+
+    def flush(self):  # type: () -> None
+        self.context.flush()
+        self.writer.flush()
+
+    def close(self):  # type: () -> None
+        """写出缓冲数据后关闭连接"""
+        self.is_closing = True
+        self.flush()
+        self.connection.close()
+
+    def shutdown(self):  # type: () -> None
+        """优雅关闭: 不再接受新请求, 进行中的请求完成后关闭连接"""
+        if self.is_closing or self.is_draining:
+            return
+        self.is_draining = True
+        self.context.shutdown()
+
+    async def sendfile(self, file, offset, count):  # type: (BinaryIO, int, int) -> None
+        """发送文件中 offset 起的 count 字节
+
+        优先使用 sendfile 零拷贝发送, 不支持时 (如 TLS) 分块读取发送
+        """
+        # 先写出 cork 中的数据 (响应头)
+        self.flush()
+
+        try:
+            return await self.connection.sendfile(file, offset, count)
+        except NotImplementedError:
+            pass
+
+        fd = file.fileno()
+        while count > 0:
+            data = await self.loop.run_in_executor(None, os.pread, fd, min(count, SIZE_64KB), offset)
+            if not data:
+                break
+            offset += len(data)
+            count -= len(data)
+            self.writer.write(data)
+            await self.drain()
+
+    def pause_reading(self):  # type: () -> None
+        """暂停读取 socket 数据, 如请求 body 写入临时文件跟不上接收时; 与 resume_reading 成对调用"""
+        self._read_pausers += 1
+        if self._read_pausers == 1 and not self._connection_lost:
+            self.connection.pause_reading()
+
+    def resume_reading(self):  # type: () -> None
+        """恢复读取 socket 数据"""
+        self._read_pausers -= 1
+        if self._read_pausers == 0 and not self._connection_lost:
+            self.connection.resume_reading()
+
+    @property
+    def write_paused(self):  # type: () -> bool
+        """transport 写缓冲是否高于 high water"""
+        return self._write_paused
+
+    def pause_writing(self):  # type: () -> None
+        """transport 写缓冲超过 high water"""
+        self._write_paused = True
+
+    def resume_writing(self):  # type: () -> None
+        """transport 写缓冲回落到 low water 以下"""
+        self._write_paused = False
+        self._wake_drain_waiters()
+
+    async def drain(self):  # type: () -> None
+        """等待 transport 写缓冲回落
+
+        响应 body 的发送方应在每次写出后调用, 避免慢速客户端导致写缓冲无限增长
+        """
+        if self._connection_lost:
+            raise ConnectionResetError("Connection lost")
+        if not self._write_paused:
+            return
+
+        # 将 cork 中的数据交给 transport, 使其水位反映全部待写数据
+        self.flush()
+
+        waiter = self.loop.create_future()
+        self._drain_waiters.append(waiter)
+        try:
+            await waiter
+        finally:
+            self._drain_waiters.remove(waiter)
+
+    def _wake_drain_waiters(self, exc=None):  # type: (Optional[Exception]) -> None
+        for waiter in self._drain_waiters:
+            if not waiter.done():
+                if exc is None:
+                    waiter.set_result(None)
+                else:
+                    waiter.set_exception(exc)
 
     def eof_received(self):
         """对端关闭"""
@@ -65,6 +238,11 @@ class HttpProtocolStack:
 
     def lost(self):
         """连接断开"""
+        self.is_closing = True
+        self._connection_lost = True
+        self._wake_drain_waiters(ConnectionResetError("Connection lost"))
+        self.writer.discard()
+        self.context.close()
         for task in self._task_pool:
             task.cancel()
 
@@ -88,6 +266,7 @@ class HttpProtocolStack:
         """收到客户端的 http2 连接前言"""
 
         if self.is_h2:
+            self.context.close()
             self.context = Http2Context(self)
 
             # send connection preface(server side)
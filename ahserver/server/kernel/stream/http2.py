@@ -9,15 +9,22 @@ from ahserver.exception import AHServerProtocolError
 from ahserver.server.frame import (
     HttpFrameType,
     HttpFrameFlag,
+    HttpErrorCode,
     HttpDataFrame,
     HttpHeadersFrame,
+    HttpRstStreamFrame,
     HttpSettingsFrame,
+    HttpPingFrame,
     HttpWindowUpdateFrame,
     HttpContinuationFrame,
+    HttpPriorityUpdateFrame,
 )
+from ahserver.server.constant import LATIN1_ENCODING
+from ahserver.server.protocol import HttpHeader, HttpMethod
 from ahserver.server.response import HttpResponse, SGIHttpResponse
 
 from ._stream import HttpStream
+from .scheduler import DEFAULT_URGENCY, parse_priority
 
 try:
     from typing import TYPE_CHECKING
@@ -31,6 +38,20 @@ if TYPE_CHECKING:
     from ..context.http2 import Http2Context
 
 
+# 连接专用的 header, 不能出现在 http/2 的报文中 (RFC 7540 8.1.2.2)
+_CONNECTION_SPECIFIC_HEADERS = frozenset(
+    (HttpHeader.CONNECTION, b"keep-alive", b"proxy-connection", HttpHeader.TRANSFER_ENCODING, HttpHeader.UPGRADE)
+)
+
+# 流控窗口的上限 (RFC 7540 6.9.1)
+MAX_WINDOW_SIZE = 2 ** 31 - 1
+
+
+def _without_body(response):  # type: (HttpResponse) -> bool
+    """HEAD 请求的响应, 以及 204/304 响应, 不能带有 body (RFC 7540 8.1.2.6)"""
+    return response.request.method == HttpMethod.HEAD or str(response.status)[:3] in ("204", "304")
+
+
 class StreamState:
     """The State of Stream"""
 
@@ -91,93 +112,167 @@ class Http2Stream(HttpStream):
         super(Http2Stream, self).__init__(context)
         self.state = StreamState.IDLE
         self.identifier = identifier
-        self._identifier_bytes = identifier.to_bytes(length=4, byteorder="big", signed=False)
-        self.dependency = 0
+        # RFC 9218 的优先级, 由请求的 priority 头或 PRIORITY_UPDATE 帧指定
+        self.urgency = DEFAULT_URGENCY
+        self.incremental = False
+
+        # 流控: 发送窗口的初始值为对端通告的 SETTINGS_INITIAL_WINDOW_SIZE, 接收窗口的初始值为本端通告的值;
+        # _recv_consumed 为已接收, 尚未以 WINDOW_UPDATE 归还的字节数
+        self.send_window = context.initial_send_window
+        self.recv_window = context.recv_window_size
+        self._recv_consumed = 0
 
     def frame_received(self, frame):  # type: (HttpFrame) -> int
-        return self._trans_state_by_recv(frame.type)
+        return self._trans_state_by_recv(frame.type, frame.flags)
 
-    def _trans_state_by_recv(self, frame_type):  # type: (HttpFrameType) -> int
+    def _trans_state_by_recv(self, frame_type, flags):  # type: (int, int) -> int
+        end_stream = flags & HttpFrameFlag.END_STREAM and frame_type in (HttpFrameType.DATA, HttpFrameType.HEADERS)
         if self.state == StreamState.IDLE:
             if frame_type == HttpFrameType.HEADERS:
-                self.state = StreamState.OPEN
+                self.state = StreamState.HALF_CLOSED_REMOTE if end_stream else StreamState.OPEN
+                return 0
+        elif self.state == StreamState.OPEN:
+            if end_stream:
+                self.state = StreamState.HALF_CLOSED_REMOTE
+                return 0
+        elif self.state == StreamState.HALF_CLOSED_LOCAL:
+            if end_stream:
+                self._close()
                 return 0
 
         # raise AHServerProtocolError()
         return 0
 
-    def _trans_state_by_send(self, frame_type):  # type: (int) -> None
+    def _trans_state_by_send(self, frame_type, flags):  # type: (int, int) -> None
+        end_stream = flags & HttpFrameFlag.END_STREAM and frame_type in (HttpFrameType.DATA, HttpFrameType.HEADERS)
         if self.state == StreamState.IDLE:
             if frame_type == HttpFrameType.HEADERS:
-                self.state = StreamState.OPEN
+                self.state = StreamState.HALF_CLOSED_LOCAL if end_stream else StreamState.OPEN
                 return
         elif self.state == StreamState.RESERVED_LOCAL:
             pass
         elif self.state == StreamState.RESERVED_REMOTE:
             pass
         elif self.state == StreamState.OPEN:
-            pass
+            if end_stream:
+                self.state = StreamState.HALF_CLOSED_LOCAL
+                return
         elif self.state == StreamState.HALF_CLOSED_LOCAL:
             pass
         elif self.state == StreamState.HALF_CLOSED_REMOTE:
-            pass
+            if end_stream:
+                self._close()
+                return
         else:  # StreamState.CLOSED
             pass
 
         # raise AHServerProtocolError()
 
-    def send_frame(self, frame_type, flags, body=None):  # type: (int, int, bytes) -> None
-        self._trans_state_by_send(frame_type)
-
-        # send lenght
-        if body is not None:
-            length = len(body)
-        else:
-            length = 0
-        self.send_data(length.to_bytes(length=3, byteorder="big", signed=False))
-
-        # send type
-        self.send_data(frame_type.to_bytes(length=1, byteorder="big", signed=False))
-
-        # send flag
-        self.send_data(flags.to_bytes(length=1, byteorder="big", signed=False))
-
-        # send identifier
-        self.send_data(self._identifier_bytes)
-
-        # send body
-        if body is not None:
-            self.send_data(body)
-
-    def send_status_and_headers(self, response):  # type: (HttpResponse) -> None
-        # self.send_status_line(response)
-        # self.send_headers(response)
-        self.send(b"\r\n")
+    def _close(self):  # type: () -> None
+        """流进入 closed 状态, 此后不再收发帧"""
+        self.state = StreamState.CLOSED
+        self.context.stream_closed(self)
+
+    def send_frame(self, frame_type, flags, body=None):  # type: (int, int, Optional[bytes]) -> None
+        self._trans_state_by_send(frame_type, flags)
+        # 帧由 context 累积, 在本轮事件循环迭代结束时写出
+        self.context.write_frame(frame_type, flags, self.identifier, body)
+
+    def send_rst_stream(self, error_code):  # type: (int) -> None
+        """发送 RST_STREAM 帧, 立即终止流"""
+        self.send_frame(HttpFrameType.RST_STREAM, 0, error_code.to_bytes(length=4, byteorder="big", signed=False))
+        self.context.stream_reset(self.identifier)
+        self._close()
+
+    def send_window_update(self, increment):  # type: (int) -> None
+        """发送 WINDOW_UPDATE 帧, 扩大对端的发送窗口"""
+        self.send_frame(HttpFrameType.WINDOW_UPDATE, 0, increment.to_bytes(length=4, byteorder="big", signed=False))
+
+    def send_header_block(self, block, end_stream=False):  # type: (bytes, bool) -> None
+        """以 HEADERS 帧发送头块, 超过对端的 SETTINGS_MAX_FRAME_SIZE 时其余部分以 CONTINUATION 帧发送"""
+        flags = HttpFrameFlag.END_STREAM if end_stream else 0
+        max_frame_size = self.context.max_frame_size
+        if len(block) <= max_frame_size:
+            self.send_frame(HttpFrameType.HEADERS, flags | HttpFrameFlag.END_HEADERS, block)
+            return
+
+        # HEADERS 与 CONTINUATION 之间不能插入其它帧, 须连续发送
+        self.send_frame(HttpFrameType.HEADERS, flags, block[:max_frame_size])
+        for offset in range(max_frame_size, len(block), max_frame_size):
+            flags = HttpFrameFlag.END_HEADERS if offset + max_frame_size >= len(block) else 0
+            self.send_frame(HttpFrameType.CONTINUATION, flags, block[offset:offset + max_frame_size])
+
+    def send_status_and_headers(self, response, end_stream=False):  # type: (HttpResponse, bool) -> None
+        response.normalize_headers(self.context.protocol_stack.server.date_cache.value)
+        headers = [(b":status", str(response.status)[:3].encode(LATIN1_ENCODING))]
+        headers.extend(item for item in response.lower_items() if item[0] not in _CONNECTION_SPECIFIC_HEADERS)
+        self.send_header_block(self.context.encoder.encode(headers), end_stream)
+
+    def increase_send_window(self, increment):  # type: (int) -> bool
+        """对端扩大流的发送窗口, 窗口超过上限时返回 False"""
+        self.send_window += increment
+        if self.send_window > MAX_WINDOW_SIZE:
+            return False
+        if self.send_window > 0:
+            self.context.scheduler.stream_window_updated(self)
+        return True
+
+    async def send_data_frames(self, data, end_stream=False):  # type: (bytes, bool) -> None
+        """以 DATA 帧发送 body, 全部写出后返回
+
+        由连接的写调度器分帧, 按优先级与其它流交错发送, 发送窗口用尽时等待对端的 WINDOW_UPDATE
+        """
+        if self.state == StreamState.CLOSED:
+            raise ConnectionResetError("Stream closed")
+        if not data:
+            self.send_frame(HttpFrameType.DATA, HttpFrameFlag.END_STREAM if end_stream else 0)
+            return
+        await self.context.scheduler.send(self, data, end_stream)
 
     async def send_sgi_response(self, response):  # type: (SGIHttpResponse) -> None
+        if _without_body(response):
+            # 丢弃 body, 以 HEADERS 帧结束流
+            self.send_status_and_headers(response, end_stream=True)
+            return
+
         headers_sent = False
+        end_stream = False
+
+        # 已知 body 长度时, 在最后一个 DATA 帧上结束流, 否则以空的 DATA 帧结束流
+        content_length = response.headers.get(HttpHeader.CONTENT_LENGTH)
+        remaining = int(content_length) if content_length is not None else None
 
         async for body in response.body:
             if not body:  # don't send headers until body appears
                 continue
 
             if not headers_sent:
-                response.normalize_headers()
                 self.send_status_and_headers(response)
                 headers_sent = True
 
-            self.send_frame(HttpFrameType.DATA, 0, body)
+            if remaining is not None:
+                remaining -= len(body)
+                end_stream = remaining <= 0
+            await self.send_data_frames(body, end_stream)
+            if end_stream:
+                break
+
+            # 流控: 写缓冲过高时等待排空
+            await self.context.protocol_stack.drain()
 
         if not headers_sent:  # send headers now if body was empty
-            self.send_status_and_headers(response)
+            self.send_status_and_headers(response, end_stream=True)
+        elif not end_stream:
+            self.send_frame(HttpFrameType.DATA, HttpFrameFlag.END_STREAM)
 
-    def send_raw_response(self, response):  # type: (HttpResponse) -> None
+    async def send_raw_response(self, response):  # type: (HttpResponse) -> None
         body = response.body
 
-        self.send_status_and_headers(response)
-
-        if body is not None:
-            self.send_data(body)
+        if body and not _without_body(response):
+            self.send_status_and_headers(response)
+            await self.send_data_frames(body, end_stream=True)
+        else:
+            self.send_status_and_headers(response, end_stream=True)
 
     async def send_response(self, response):  # type: (HttpResponse) -> None
         # write response
@@ -187,16 +282,18 @@ class Http2Stream(HttpStream):
             finally:
                 response.close()
         else:
-            return self.send_raw_response(response)
+            return await self.send_raw_response(response)
 
     async def _respond(self, task):  # type: (Task[Optional[HttpResponse]]) -> None
         """dispatch 任务回调，回复 http 响应"""
         try:
             response = task.result()
-            if response is not None:
+            if response is not None and self.state != StreamState.CLOSED:
                 await self.send_response(response)
         except CancelledError:
             logging.debug("task is cancelled.")
+        except ConnectionResetError:
+            logging.debug("connection is lost.")
         except Exception:
             logging.exception("encounter unexpected exception.")
 
@@ -211,44 +308,161 @@ class Http2SuperStream(Http2Stream):
             return self.settings_frame_received(frame)
         elif frame.type == HttpFrameType.WINDOW_UPDATE:
             return self.window_update_frame_received(frame)
+        elif frame.type == HttpFrameType.PING:
+            return self.ping_frame_received(frame)
+        elif frame.type == HttpFrameType.PRIORITY_UPDATE:
+            return self.priority_update_frame_received(frame)
         return 0
 
     def settings_frame_received(self, frame):  # type: (HttpSettingsFrame) -> int
         if frame.flags & HttpFrameFlag.ACK:
+            self.context.settings_acknowledged()
             return 0
         else:
+            err = self.context.settings_received(frame.settings)
+            if err != 0:
+                return err
             self.send_frame(HttpFrameType.SETTINGS, HttpFrameFlag.ACK)
             return 0
 
     def window_update_frame_received(self, frame):  # type: (HttpWindowUpdateFrame) -> int
+        # 连接的发送窗口: 增量为 0 或窗口超过上限均为连接错误
+        if frame.increment == 0:
+            return -HttpErrorCode.PROTOCOL_ERROR
+        if not self.context.increase_send_window(frame.increment):
+            return -HttpErrorCode.FLOW_CONTROL_ERROR
+        return 0
+
+    def ping_frame_received(self, frame):  # type: (HttpPingFrame) -> int
+        if frame.flags & HttpFrameFlag.ACK:
+            self.context.ping_acknowledged(frame.data)
+        else:
+            self.send_frame(HttpFrameType.PING, HttpFrameFlag.ACK, frame.data)
+        return 0
+
+    def priority_update_frame_received(self, frame):  # type: (HttpPriorityUpdateFrame) -> int
+        if frame.prioritized_stream_id == 0:
+            return -HttpErrorCode.PROTOCOL_ERROR
+        urgency, incremental = parse_priority(frame.priority_field_value)
+        self.context.priority_updated(frame.prioritized_stream_id, urgency, incremental)
         return 0
 
+    def send_goaway(self, last_stream_id, error_code=0):  # type: (int, int) -> None
+        """发送 GOAWAY 帧, error_code 默认为 NO_ERROR"""
+        body = last_stream_id.to_bytes(length=4, byteorder="big", signed=False) + error_code.to_bytes(
+            length=4, byteorder="big", signed=False
+        )
+        self.send_frame(HttpFrameType.GOAWAY, 0, body)
+
 
 class Http2PlainStream(Http2Stream):
     def __init__(self, protocol_stack, identifier):
         # type: (Http2Context, int) -> None
         super(Http2PlainStream, self).__init__(protocol_stack, identifier)
         self.request = None
+        self.body_length = 0  # 已接收的 body 长度
+        self._recv_paused = False  # body 写入临时文件跟不上接收, 暂不归还接收窗口
 
     def frame_received(self, frame):  # type: (HttpFrame) -> int
         return self._frame_proc[frame.type](self, frame)
 
+    def _body_too_large(self, length):  # type: (int) -> bool
+        max_body_size = self.context.protocol_stack.server.config.max_body_size
+        return max_body_size is not None and length > max_body_size
+
+    def _close(self):  # type: () -> None
+        super(Http2PlainStream, self)._close()
+        # 放弃待发送的 body, 唤醒正在读取 body 的应用
+        self.context.scheduler.stream_closed(self)
+        if self.request is not None:
+            self.request.body.eof_received()
+
+    def update_recv_window(self, threshold):  # type: (int) -> None
+        """已接收的字节数达到 threshold 时, 以 WINDOW_UPDATE 归还流的接收窗口"""
+        if self._recv_paused or self._recv_consumed < threshold:
+            return
+        if self.state not in (StreamState.OPEN, StreamState.HALF_CLOSED_LOCAL):
+            # 对端已结束发送时无需归还
+            return
+        self.send_window_update(self._recv_consumed)
+        self.recv_window += self._recv_consumed
+        self._recv_consumed = 0
+
+    def _body_flow_control(self, paused):  # type: (bool) -> None
+        self._recv_paused = paused
+        if not paused:
+            self.update_recv_window(self.context.recv_window_size // 2)
+
     def data_frame_received(self, frame):  # type: (HttpDataFrame) -> int
+        if self.state == StreamState.HALF_CLOSED_REMOTE:
+            # 对端已结束发送, 又收到 DATA 帧 (RFC 7540 5.1)
+            self.send_rst_stream(HttpErrorCode.STREAM_CLOSED)
+            return 0
+        if self.state not in (StreamState.OPEN, StreamState.HALF_CLOSED_LOCAL):
+            return 0
+        if frame.length > self.recv_window:
+            # 超出流的接收窗口
+            self.send_rst_stream(HttpErrorCode.FLOW_CONTROL_ERROR)
+            return 0
+        self.recv_window -= frame.length
+        self._recv_consumed += frame.length
+        self.context.recv_window_consumed(self)
+
+        self.body_length += len(frame.data)
+        if self._body_too_large(self.body_length):
+            # body 超长, 终止流; 唤醒正在读取 body 的应用, 其响应不再发送
+            self.send_rst_stream(HttpErrorCode.CANCEL)
+            return 0
         self.request.body.write(frame.data)
+        if frame.flags & HttpFrameFlag.END_STREAM:
+            self._trans_state_by_recv(frame.type, frame.flags)
+            self.request.body.eof_received()
         return 0
 
     def headers_frame_received(self, frame):  # type: (HttpHeadersFrame) -> int
+        self._trans_state_by_recv(frame.type, frame.flags)
         if self.request is None:
             self.request = frame.request
+            priority = self.request.get(HttpHeader.PRIORITY)
+            if priority is not None:
+                self.urgency, self.incremental = parse_priority(priority)
+            if not frame.flags & HttpFrameFlag.END_STREAM:
+                content_length = self.request.get(HttpHeader.CONTENT_LENGTH)
+                if content_length is not None and self._body_too_large(int(content_length)):
+                    # body 超长, 不接收 body, 也不处理请求
+                    self.send_rst_stream(HttpErrorCode.CANCEL)
+                    return 0
+                # 之后有 DATA 帧; body 写入临时文件跟不上接收时, 暂停归还接收窗口, 对端至多再发送一个窗口的数据
+                body = self.request.create_body(self.context.protocol_stack.server.config.body_spool_threshold)
+                body.set_flow_control(self._body_flow_control)
             if frame.flags & HttpFrameFlag.END_HEADERS:
                 self.context.on_request(self.request, self._respond)
+        elif frame.flags & HttpFrameFlag.END_STREAM:
+            # trailer 之后 body 结束
+            self.request.body.eof_received()
         return 0
 
     def continuation_frame_received(self, frame):  # type: (HttpContinuationFrame) -> int
-        if frame.flags & HttpFrameFlag.END_HEADERS:
+        if frame.flags & HttpFrameFlag.END_HEADERS and self.state != StreamState.CLOSED:
             self.context.on_request(frame.request, self._respond)
         return 0
 
+    def rst_stream_frame_received(self, frame):  # type: (HttpRstStreamFrame) -> int
+        if self.state != StreamState.CLOSED:
+            logging.debug("stream %d is reset by peer, error code: %d", self.identifier, frame.error_code)
+            self._close()
+        return 0
+
+    def window_update_frame_received(self, frame):  # type: (HttpWindowUpdateFrame) -> int
+        # 流的发送窗口: 增量为 0 或窗口超过上限均为流错误
+        if self.state == StreamState.CLOSED:
+            return 0
+        if frame.increment == 0:
+            self.send_rst_stream(HttpErrorCode.PROTOCOL_ERROR)
+        elif not self.increase_send_window(frame.increment):
+            self.send_rst_stream(HttpErrorCode.FLOW_CONTROL_ERROR)
+        return 0
+
     _frame_proc = (
         # DATA = 0
         data_frame_received,
@@ -257,7 +471,7 @@ class Http2PlainStream(Http2Stream):
         # PRIORITY = 2
         Http2Stream.frame_received,
         # RST_STREAM = 3
-        Http2Stream.frame_received,
+        rst_stream_frame_received,
         # SETTINGS = 4
         Http2Stream.frame_received,
         # PUSH_PROMISE = 5
@@ -267,7 +481,7 @@ class Http2PlainStream(Http2Stream):
         # GOAWAY = 7
         Http2Stream.frame_received,
         # WINDOW_UPDATE = 8
-        Http2Stream.frame_received,
+        window_update_frame_received,
         # CONTINUATION = 9
         continuation_frame_received,
     )
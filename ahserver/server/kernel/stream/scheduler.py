@@ -0,0 +1,251 @@
+# encoding=utf-8
+
+__all__ = ["DEFAULT_URGENCY", "parse_priority", "Http2WriteScheduler"]
+
+from collections import deque
+
+from ahserver.server.frame import HttpFrameType, HttpFrameFlag
+
+try:
+    from typing import TYPE_CHECKING
+except Exception:
+    TYPE_CHECKING = False
+
+if TYPE_CHECKING:
+    from asyncio import Future, Task
+    from typing import Deque, Dict, List, Optional, Tuple
+    from ..context.http2 import Http2Context
+    from .http2 import Http2Stream
+
+
+# RFC 9218 的 urgency 取值 0 (最高) ~ 7 (最低), 默认为 3
+DEFAULT_URGENCY = 3
+URGENCY_LEVELS = 8
+# 各级 urgency 在加权轮转中的权重, 相邻两级相差一倍: 基本按 urgency 顺序发送, 低优先级的流也不会饿死
+_WEIGHTS = tuple(1 << (URGENCY_LEVELS - 1 - urgency) for urgency in range(URGENCY_LEVELS))
+
+
+def parse_priority(value):  # type: (bytes) -> Tuple[int, bool]
+    """解析 RFC 9218 的 Priority 字段 (structured field 中的 dictionary), 如 b"u=1, i"
+
+    只识别 u (urgency, 0~7) 和 i (incremental) 两个成员, 无法识别的成员或取值被忽略, 缺少的成员取默认值
+    """
+    urgency = DEFAULT_URGENCY
+    incremental = False
+    for member in value.split(b","):
+        # 丢弃成员的参数
+        key, _, item = member.split(b";", 1)[0].partition(b"=")
+        key = key.strip()
+        item = item.strip()
+        if key == b"u":
+            if item.isdigit() and int(item) < URGENCY_LEVELS:
+                urgency = int(item)
+        elif key == b"i":
+            if item in (b"", b"?1"):
+                incremental = True
+            elif item == b"?0":
+                incremental = False
+    return urgency, incremental
+
+
+class _PendingData:
+    """流待发送的一段 body"""
+
+    __slots__ = ("data", "view", "offset", "end_stream", "waiter", "queued")
+
+    def __init__(self, data, end_stream, waiter):  # type: (bytes, bool, Future) -> None
+        self.data = data
+        self.view = None  # type: Optional[memoryview]
+        self.offset = 0
+        self.end_stream = end_stream
+        self.waiter = waiter
+        self.queued = False  # 是否在就绪队列中
+
+
+class Http2WriteScheduler:
+    """http2 连接的 DATA 帧写调度器
+
+    各个流的 body 交由调度器分帧发送, 每帧不超过对端的 SETTINGS_MAX_FRAME_SIZE 以及连接和流的发送窗口.
+    就绪的流 (有待发送的数据, 且流的发送窗口未用尽) 按 RFC 9218 的 urgency 分级, 各级之间加权轮转 (smooth weighted
+    round-robin); 同一级中 incremental 的流逐帧轮转, 其余的流按流标识的顺序逐个发送.
+    发送在事件循环迭代结束, context 写出累积的帧之前进行 (见 pump), 每轮至多写出 write_high_water 字节,
+    使新就绪的流及时加入; transport 写缓冲过高时暂停, 排空后继续.
+    """
+
+    def __init__(self, context):  # type: (Http2Context) -> None
+        self.context = context
+        self._loop = context.protocol_stack.loop
+        self._budget = context.protocol_stack.server.config.write_high_water
+
+        self._pending = {}  # type: Dict[Http2Stream, _PendingData]
+        # 各级 urgency 的就绪队列, 以及加权轮转的当前权重
+        self._levels = [deque() for _ in range(URGENCY_LEVELS)]  # type: List[Deque[Http2Stream]]
+        self._current_weights = [0] * URGENCY_LEVELS
+
+        self._scheduled = False
+        self._drain_task = None  # type: Optional[Task]
+
+    async def send(self, stream, data, end_stream):  # type: (Http2Stream, bytes, bool) -> None
+        """发送流的一段 body, 全部写出后返回; 流被重置或连接断开时抛出 ConnectionResetError"""
+        context = self.context
+        if not self._pending and len(data) <= min(stream.send_window, context.send_window, context.max_frame_size):
+            # 没有其它待发送的流, 且一帧即可发完: 直接写出
+            stream.send_window -= len(data)
+            context.send_window -= len(data)
+            stream.send_frame(HttpFrameType.DATA, HttpFrameFlag.END_STREAM if end_stream else 0, data)
+            return
+
+        pending = _PendingData(data, end_stream, self._loop.create_future())
+        self._pending[stream] = pending
+        if stream.send_window > 0:
+            self._enqueue(stream, pending)
+            self._schedule()
+        await pending.waiter
+
+    def reprioritize(self, stream, urgency, incremental):  # type: (Http2Stream, int, bool) -> None
+        pending = self._pending.get(stream)
+        if pending is not None and pending.queued:
+            self._dequeue(stream, pending)
+            stream.urgency, stream.incremental = urgency, incremental
+            self._enqueue(stream, pending)
+        else:
+            stream.urgency, stream.incremental = urgency, incremental
+
+    def stream_window_updated(self, stream):  # type: (Http2Stream) -> None
+        """流的发送窗口扩大"""
+        pending = self._pending.get(stream)
+        if pending is not None and not pending.queued:
+            self._enqueue(stream, pending)
+            self._schedule()
+
+    def connection_window_updated(self):  # type: () -> None
+        """连接的发送窗口扩大"""
+        if self._pending:
+            self._schedule()
+
+    def stream_closed(self, stream):  # type: (Http2Stream) -> None
+        pending = self._pending.pop(stream, None)
+        if pending is not None:
+            if pending.queued:
+                self._dequeue(stream, pending)
+            if not pending.waiter.done():
+                pending.waiter.set_exception(ConnectionResetError("Stream closed"))
+
+    def close(self):  # type: () -> None
+        """连接断开, 放弃所有待发送的数据"""
+        self._scheduled = False
+        pending_list = list(self._pending.values())
+        self._pending.clear()
+        for level in self._levels:
+            level.clear()
+        for pending in pending_list:
+            if not pending.waiter.done():
+                pending.waiter.set_exception(ConnectionResetError("Connection lost"))
+
+    def _enqueue(self, stream, pending):  # type: (Http2Stream, _PendingData) -> None
+        pending.queued = True
+        level = self._levels[stream.urgency]
+        if not stream.incremental:
+            # 非 incremental 的流按流标识的顺序发送
+            for index, other in enumerate(level):
+                if not other.incremental and other.identifier > stream.identifier:
+                    level.insert(index, stream)
+                    return
+        level.append(stream)
+
+    def _dequeue(self, stream, pending):  # type: (Http2Stream, _PendingData) -> None
+        pending.queued = False
+        level = self._levels[stream.urgency]
+        level.remove(stream)
+        if not level:
+            self._current_weights[stream.urgency] = 0
+
+    def _schedule(self):  # type: () -> None
+        if not self._scheduled and self._drain_task is None:
+            self._scheduled = True
+            self.context.schedule_flush()
+
+    def _select(self):  # type: () -> int
+        """加权轮转选出下一帧所属的 urgency, 没有就绪的流时返回 -1"""
+        selected = -1
+        total = 0
+        levels = self._levels
+        current_weights = self._current_weights
+        for urgency in range(URGENCY_LEVELS):
+            if levels[urgency]:
+                current_weights[urgency] += _WEIGHTS[urgency]
+                total += _WEIGHTS[urgency]
+                if selected < 0 or current_weights[urgency] > current_weights[selected]:
+                    selected = urgency
+        if selected >= 0:
+            current_weights[selected] -= total
+        return selected
+
+    def pump(self):  # type: () -> None
+        """写出已安排的 DATA 帧, 由 context 在本轮事件循环迭代结束时调用"""
+        if not self._scheduled:
+            return
+        self._scheduled = False
+        context = self.context
+        protocol_stack = context.protocol_stack
+        written = 0
+        while written < self._budget and context.send_window > 0 and not protocol_stack.write_paused:
+            urgency = self._select()
+            if urgency < 0:
+                return
+            written += self._write_frame(urgency)
+
+        if context.send_window <= 0 or not any(self._levels):
+            # 等待连接的 WINDOW_UPDATE 或新的数据
+            return
+        if protocol_stack.write_paused:
+            self._drain_task = self._loop.create_task(self._resume_after_drain())
+        else:
+            self._schedule()
+
+    async def _resume_after_drain(self):  # type: () -> None
+        try:
+            await self.context.protocol_stack.drain()
+        except ConnectionResetError:
+            return
+        finally:
+            self._drain_task = None
+        self._schedule()
+
+    def _write_frame(self, urgency):  # type: (int) -> int
+        """写出 urgency 级中队首的流的一个 DATA 帧, 返回负载的长度"""
+        context = self.context
+        level = self._levels[urgency]
+        stream = level[0]
+        pending = self._pending[stream]
+        if stream.send_window <= 0:
+            # 对端减小了 SETTINGS_INITIAL_WINDOW_SIZE
+            self._dequeue(stream, pending)
+            return 0
+
+        remaining = len(pending.data) - pending.offset
+        size = min(remaining, stream.send_window, context.send_window, context.max_frame_size)
+        last = size == remaining
+        if last:
+            del self._pending[stream]
+            self._dequeue(stream, pending)
+        elif stream.send_window <= size:
+            # 流的发送窗口用尽, 等待其 WINDOW_UPDATE
+            self._dequeue(stream, pending)
+        elif stream.incremental:
+            level.rotate(-1)
+
+        flags = HttpFrameFlag.END_STREAM if last and pending.end_stream else 0
+        if size == len(pending.data):
+            stream.send_frame(HttpFrameType.DATA, flags, pending.data)
+        else:
+            if pending.view is None:
+                pending.view = memoryview(pending.data)
+            stream.send_frame(HttpFrameType.DATA, flags, pending.view[pending.offset:pending.offset + size])
+        pending.offset += size
+        stream.send_window -= size
+        context.send_window -= size
+
+        if last and not pending.waiter.done():
+            pending.waiter.set_result(None)
+        return size
@@ -1,11 +1,26 @@
 # encoding=utf-8
 
-__all__ = ["Buffer", "H1Parser", "H2Parser"]
+__all__ = ["Buffer", "H1Parser", "H2FrameWriter", "H2Parser", "HeaderTable", "HpackEncoder"]
 
 # load c lib
-from . import ahparser
+# 其它扩展模块引用 ahparser 中的符号, 需以 RTLD_GLOBAL 加载使其对之后加载的模块可见
+import os as _os
+import sys as _sys
+
+if hasattr(_sys, "setdlopenflags"):
+    _dlopen_flags = _sys.getdlopenflags()
+    _sys.setdlopenflags(_dlopen_flags | _os.RTLD_GLOBAL)
+    try:
+        from . import ahparser
+    finally:
+        _sys.setdlopenflags(_dlopen_flags)
+else:
+    from . import ahparser
 
 # export classes
 from .buffer import Buffer
 from .h1parser import H1Parser
 from .h2parser import H2Parser
+from .h2writer import H2FrameWriter
+from .headers import HeaderTable
+from .hpack import HpackEncoder
@@ -21,10 +21,14 @@ cdef extern from "ahparser/ahparser.h":
 
     int ahp_msgbuf_init(ahp_msgbuf_t *buf, long size)
     void ahp_msgbuf_free(ahp_msgbuf_t *buf)
+    int ahp_msgbuf_reserve(ahp_msgbuf_t *buf, unsigned long len)
     int ahp_msgbuf_append(ahp_msgbuf_t *buf, const char *data, unsigned long len)
     int ahp_msgbuf_copy(ahp_msgbuf_t *src, ahp_msgbuf_t *dst)
     char *ahp_msgbuf_data(ahp_msgbuf_t *buf)
     long ahp_msgbuf_length(ahp_msgbuf_t *buf)
+    char *ahp_msgbuf_tail(ahp_msgbuf_t *buf)
+    long ahp_msgbuf_tail_length(ahp_msgbuf_t *buf)
+    void ahp_msgbuf_commit(ahp_msgbuf_t *buf, long size)
     void ahp_msgbuf_reset(ahp_msgbuf_t *buf)
 
     #
@@ -45,9 +49,33 @@ cdef extern from "ahparser/ahparser.h":
         AHP_VERSION_11
         AHP_VERSION_20
 
+    enum: AHP_STATIC_INDEX_TABLE_SIZE
+
+    int ahp_static_header_index(const char *name, size_t len)
+    const ahp_strlen_t *ahp_static_header_name(int index)
+
     #
     # parser.h
 
+    ctypedef enum ahp_parser_state_t:
+        AHP_PARSER_STATE_IDLE
+        AHP_PARSER_STATE_PARSE_REQUEST_LINE
+        AHP_PARSER_STATE_PARSE_RESPONSE_LINE
+        AHP_PARSER_STATE_PARSE_MESSAGE_HEADER
+        AHP_PARSER_STATE_PARSE_BODY
+        AHP_PARSER_STATE_PARSE_CHUNKED_HEAD
+        AHP_PARSER_STATE_PARSE_CHUNKED_DATA
+        AHP_PARSER_STATE_PARSE_CHUNKED_TRAILER
+
+    enum: AHP_MAX_HEADERS
+
+    ctypedef struct ahp_header_span_t:
+        uint32_t name_offset
+        uint32_t name_length
+        uint32_t value_offset
+        uint32_t value_length
+        uint32_t name_index
+
     # parser callbacks
     ctypedef int (*ahp_request_line_callback)(ahp_parser_t *parser, ahp_method_t method, ahp_strlen_t *uri, ahp_version_t version)
     ctypedef int (*ahp_request_line_ext_callback)(ahp_parser_t *parser, ahp_strlen_t *method, ahp_strlen_t *uri, ahp_version_t version)
@@ -55,13 +83,24 @@ cdef extern from "ahparser/ahparser.h":
     ctypedef int (*ahp_message_body_callback)(ahp_parser_t *parser, ahp_strlen_t *body)
 
     ctypedef struct ahp_parser_t:
+        ahp_parser_state_t state
         void *data
 
+        long max_uri_length
+        long max_header_size
+        int max_header_count
+        long max_body_size
+
         ahp_request_line_callback on_request_line
         ahp_request_line_ext_callback on_request_line_ext
         ahp_message_header_callback on_message_header
         ahp_message_body_callback on_message_body
 
+        const char *header_block
+        long header_block_length
+        int header_count
+        ahp_header_span_t headers[AHP_MAX_HEADERS]
+
     void ahp_parse_reset(ahp_parser_t *parser)
     int ahp_parse_request(ahp_parser_t *parser, ahp_msgbuf_t *msg)
     int ahp_parse_body_length(ahp_parser_t *parser, ahp_msgbuf_t *msg, long length)
@@ -71,6 +110,8 @@ cdef extern from "ahparser/ahparser.h":
     #
     # splitter.h
 
+    enum: AHP_DEFAULT_MAX_FRAME_SIZE
+
     ctypedef enum ahp_frame_type_t:
         AHP_FRAME_TYPE_DATA
         AHP_FRAME_TYPE_HEADERS
@@ -82,6 +123,7 @@ cdef extern from "ahparser/ahparser.h":
         AHP_FRAME_TYPE_GOWAY
         AHP_FRAME_TYPE_WINDOW_UPDATE
         AHP_FRAME_TYPE_CONTINUAION
+        AHP_FRAME_TYPE_PRIORITY_UPDATE
 
     ctypedef enum ahp_frame_flag_t:
         AHP_FRAME_FLAG_ACK
@@ -90,6 +132,13 @@ cdef extern from "ahparser/ahparser.h":
         AHP_FRAME_FLAG_PADDED
         AHP_FRAME_FLAG_PRIORITY
 
+    ctypedef enum ahp_error_t:
+        AHP_ERROR_NO_ERROR
+        AHP_ERROR_PROTOCOL_ERROR
+        AHP_ERROR_FRAME_SIZE_ERROR
+        AHP_ERROR_COMPRESSION_ERROR
+        AHP_ERROR_ENHANCE_YOUR_CALM
+
     # splitter delegate
     ctypedef void* (*ahp_alloc_frame_delegate)(ahp_splitter_t *splitter, uint8_t type, uint8_t flags, uint32_t identifier, ahp_strlen_t *payload)
     ctypedef void (*ahp_free_frame_delegate)(ahp_splitter_t *splitter, void *frame)
@@ -100,8 +149,14 @@ cdef extern from "ahparser/ahparser.h":
     ctypedef int (*ahp_headers_frame_callback)(ahp_splitter_t* splitter, void* frame, ahp_strlen_t* header_block_fragment)
     ctypedef int (*ahp_settings_frame_callback)(ahp_splitter_t *splitter, void *frame, uint16_t identifier, uint32_t value)
     ctypedef int (*ahp_window_update_frame_callback)(ahp_splitter_t *splitter, void *frame, uint32_t increment)
+    ctypedef int (*ahp_rst_stream_frame_callback)(ahp_splitter_t *splitter, void *frame, uint32_t error_code)
+    ctypedef int (*ahp_ping_frame_callback)(ahp_splitter_t *splitter, void *frame, ahp_strlen_t *opaque_data)
+    ctypedef int (*ahp_priority_update_frame_callback)(ahp_splitter_t *splitter, void *frame,
+                                                       uint32_t prioritized_stream_id,
+                                                       ahp_strlen_t *priority_field_value)
 
     ctypedef struct ahp_splitter_t:
+        uint32_t max_frame_size
         void *data
 
         ahp_alloc_frame_delegate alloc_frame
@@ -112,18 +167,50 @@ cdef extern from "ahparser/ahparser.h":
         ahp_headers_frame_callback on_headers_frame
         ahp_settings_frame_callback on_settings_frame
         ahp_window_update_frame_callback on_window_update_frame
+        ahp_rst_stream_frame_callback on_rst_stream_frame
+        ahp_ping_frame_callback on_ping_frame
+        ahp_priority_update_frame_callback on_priority_update_frame
 
     int ahp_split_frame(ahp_splitter_t *splitter, ahp_msgbuf_t *msg)
 
+    enum: AHP_FRAME_HEADER_SIZE
+
+    int ahp_append_frame_header(ahp_msgbuf_t *msg, uint32_t length, uint8_t type, uint8_t flags, uint32_t identifier)
+
     #
     # hpack.h
 
+    enum: AHP_HPACK_DEFAULT_TABLE_SIZE
+
     # hpack callbacks
     ctypedef int (*ahp_header_field_callback)(ahp_hpack_t* hpack, ahp_strlen_t* name, ahp_strlen_t* value);
 
+    ctypedef struct ahp_hpack_table_t:
+        size_t size
+        size_t capacity
+
     ctypedef struct ahp_hpack_t:
+        ahp_hpack_table_t table
+        size_t max_table_size
+
         void *data
 
         ahp_header_field_callback on_header_field
 
+    int ahp_hpack_init(ahp_hpack_t* hpack, size_t max_table_size)
+    void ahp_hpack_free(ahp_hpack_t* hpack)
+    void ahp_hpack_set_max_table_size(ahp_hpack_t* hpack, size_t max_table_size)
+    void ahp_hpack_begin_block(ahp_hpack_t* hpack)
     int ahp_hpack_decode(ahp_hpack_t* hpack, ahp_msgbuf_t* block);
+
+    ctypedef struct ahp_hpack_encoder_t:
+        ahp_hpack_table_t table
+        size_t table_size_limit
+        size_t max_table_size
+
+    int ahp_hpack_encoder_init(ahp_hpack_encoder_t* encoder, size_t table_size_limit)
+    void ahp_hpack_encoder_free(ahp_hpack_encoder_t* encoder)
+    void ahp_hpack_encoder_set_max_table_size(ahp_hpack_encoder_t* encoder, size_t max_table_size)
+    int ahp_hpack_encode_table_size_update(ahp_hpack_encoder_t* encoder, ahp_msgbuf_t* block)
+    int ahp_hpack_encode_field(ahp_hpack_encoder_t* encoder, ahp_msgbuf_t* block, const char* name, size_t name_length,
+                               const char* value, size_t value_length)
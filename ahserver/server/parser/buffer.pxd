@@ -6,3 +6,4 @@ from .ahparser cimport ahp_msgbuf_t
 
 cdef class Buffer:
     cdef ahp_msgbuf_t _buffer
+    cdef Py_ssize_t _exports  # 导出的 buffer view 数量
@@ -2,20 +2,33 @@
 # cython: language_level=3
 # cython: embedsignature=True
 
+from cpython.buffer cimport PyBuffer_FillInfo
+
 from .ahparser cimport (
     ahp_msgbuf_t,
     ahp_msgbuf_init,
     ahp_msgbuf_free,
+    ahp_msgbuf_reserve,
     ahp_msgbuf_append,
     ahp_msgbuf_copy,
     ahp_msgbuf_data,
     ahp_msgbuf_length,
+    ahp_msgbuf_tail,
+    ahp_msgbuf_tail_length,
+    ahp_msgbuf_commit,
     ahp_msgbuf_reset,
 )
 
 
 cdef class Buffer:
-    """Message Buffer"""
+    """Message Buffer
+
+    除 append 外, 还以 buffer protocol 导出尾部的可写空间, 供 socket 直接写入:
+
+        buffer.reserve(size)
+        nbytes = sock.recv_into(memoryview(buffer))
+        buffer.commit(nbytes)
+    """
 
     def __dealloc__(self):
         ahp_msgbuf_free(&self._buffer)
@@ -25,8 +38,28 @@ cdef class Buffer:
         cdef int errno = ahp_msgbuf_init(&self._buffer, 2048)
         if errno != 0:
             raise Exception("Failed to init Buffer. errno:{}".format(errno))
+        self._exports = 0
+
+    def __getbuffer__(self, Py_buffer *view, int flags):
+        PyBuffer_FillInfo(view, self, ahp_msgbuf_tail(&self._buffer), ahp_msgbuf_tail_length(&self._buffer), 0, flags)
+        self._exports += 1
+
+    def __releasebuffer__(self, Py_buffer *view):
+        self._exports -= 1
+
+    @property
+    def length(self):  # type: () -> int
+        """缓冲区中尚未被解析的数据长度"""
+        return ahp_msgbuf_length(&self._buffer)
+
+    @property
+    def exported(self):  # type: () -> bool
+        """是否存在未释放的 memoryview, 此时不能扩容"""
+        return self._exports > 0
 
     def append(self, data, length=-1, offset=0):  # type: (bytes, int) -> None
+        if self._exports > 0:
+            raise BufferError("Buffer has exported views")
         cdef char* buf = <char*> data
         cdef int size = len(data)
         if length == -1:
@@ -37,6 +70,20 @@ cdef class Buffer:
         if errno != 0:
             raise Exception("Failed to append data to Buffer. errno:{}".format(errno))
 
+    def reserve(self, long size):  # type: (int) -> None
+        """保证尾部至少有 size 字节的可写空间"""
+        if self._exports > 0:
+            raise BufferError("Buffer has exported views")
+        cdef int errno = ahp_msgbuf_reserve(&self._buffer, size)
+        if errno != 0:
+            raise Exception("Failed to reserve Buffer. errno:{}".format(errno))
+
+    def commit(self, long nbytes):  # type: (int) -> None
+        """确认已写入尾部空间的 nbytes 字节数据"""
+        if nbytes < 0 or nbytes > ahp_msgbuf_tail_length(&self._buffer):
+            raise IndexError("out of range")
+        ahp_msgbuf_commit(&self._buffer, nbytes)
+
     def take(self):  # type: () -> bytes
         data = ahp_msgbuf_data(&self._buffer)[:ahp_msgbuf_length(&self._buffer)]
         ahp_msgbuf_reset(&self._buffer)
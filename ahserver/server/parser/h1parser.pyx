@@ -6,24 +6,49 @@ import logging
 
 from libc.errno cimport *
 
-from ..protocol import HttpMethod, HttpVersion, HttpHeader
+from ..protocol import HttpMethod, HttpVersion, HttpHeader, HttpStatus
 from .ahparser cimport *
 from .buffer cimport Buffer
+from .headers cimport HeaderTable
 
 logger = logging.getLogger()
 
-http_method_table = [
-    "OPTIONS", "GET", "HEAD", "POST", "PUT", "DELETE", "TRACE", "CONNECT"
-]
-
-http_version_table = [
-    "1.0", "1.1", "2.0"
-]
+# 以 ahp_method_t 索引
+http_method_table = (
+    HttpMethod.OPTIONS,
+    HttpMethod.GET,
+    HttpMethod.HEAD,
+    HttpMethod.POST,
+    HttpMethod.PUT,
+    HttpMethod.DELETE,
+    HttpMethod.TRACE,
+    HttpMethod.CONNECT,
+)
+
+# 以 ahp_version_t 索引
+http_version_table = (
+    HttpVersion.V10,
+    HttpVersion.V11,
+    HttpVersion.V20,
+)
 
 http_method_need_body = {
     HttpMethod.POST, HttpMethod.PUT
 }
 
+# 超出报文大小限制时拒绝请求的状态码, 以 errno 索引
+http_limit_status_table = {
+    ENAMETOOLONG: HttpStatus.URI_TOO_LONG,
+    EMSGSIZE: HttpStatus.REQUEST_HEADER_FIELDS_TOO_LARGE,
+    EFBIG: HttpStatus.PAYLOAD_TOO_LARGE,
+}
+
+# 连接所处的读取阶段, 用于超时控制
+PHASE_IDLE = 0  # 没有未完成的请求, 等待新请求
+PHASE_HEADER = 1  # 正在读取请求 header
+PHASE_BODY = 2  # 正在读取请求 body
+PHASE_BUSY = 3  # 请求已读取完整, 等待响应
+
 cdef enum:
     STATE_IDLE = 0  # 初始状态
 
@@ -40,7 +65,7 @@ cdef enum:
     STATE_WAIT_PRI_BODY
     STATE_HAVE_PRI_MESSAGE
 
-    STATE_BUSY  # 正在处理 request
+    STATE_BUSY  # 请求解析完成, pipeline 已满时在此等待响应完成
     STATE_ERROR
 
     STATE_SIZE
@@ -78,10 +103,16 @@ cdef class H1Parser:
         object _on_pri_request
 
         object _request
+        HeaderTable _header_table  # 当前请求的请求头表
 
         body_transfer_type _transfer_type
         long _transfer_length
 
+        int _pipeline_depth  # 允许同时处理的请求数 (http1.1 pipeline)
+        object _spool_threshold  # body 超过该大小的部分写入临时文件
+        int _inflight  # 已交给应用, 尚未响应的请求数
+        bint _dispatched  # 当前解析的请求已交给应用 (报文头完整时即交给应用, body 可能尚在接收)
+
     def __dealloc__(self):
         pass
 
@@ -105,16 +136,38 @@ cdef class H1Parser:
         self._parser.data = <void*> self
         self._parser.on_request_line = __request_line_callback
         self._parser.on_request_line_ext = __request_line_ext_callback
-        self._parser.on_message_header = __message_header_callback
+        self._parser.on_message_header = NULL  # 只记录请求头的位置, 由 HeaderTable 按需生成
         self._parser.on_message_body = __message_body_callback
         ahp_parse_reset(&self._parser)
 
-    def __init__(self, buffer, create_request, on_request, on_pri_request=None):
+    def __init__(self, buffer, create_request, on_request, on_pri_request=None, pipeline_depth=1,
+                 spool_threshold=None):
         self._buffer = buffer  # 注入msgbuf
         self._create_request = create_request  # 注入request工厂
         self._on_request = on_request  # 注入request处理回调
         self._on_pri_request = on_pri_request
         self._request = None
+        self._pipeline_depth = pipeline_depth if pipeline_depth > 0 else 1
+        self._spool_threshold = spool_threshold
+        self._inflight = 0
+        self._dispatched = False
+
+    def set_limits(self, max_uri_length=None, max_header_size=None, max_header_count=None, max_body_size=None):
+        """设置请求报文的大小限制, None 表示不限制
+
+        超出限制的请求在接收完整之前即被拒绝, parse 返回 -1, 由 error_status 给出应回复的状态码
+        """
+        self._parser.max_uri_length = max_uri_length or 0
+        self._parser.max_header_size = max_header_size or 0
+        self._parser.max_header_count = max_header_count or 0
+        self._parser.max_body_size = max_body_size or 0
+
+    @property
+    def error_status(self):
+        """解析出错时, 拒绝请求应回复的状态码; 无法回复时为 None"""
+        if self._state != STATE_ERROR:
+            return None
+        return http_limit_status_table.get(self._errno)
 
     cdef void _change_state(self, parser_state state):
         self._state, self._last_state = state, self._state
@@ -122,6 +175,45 @@ cdef class H1Parser:
     def free(self):
         self._change_state(STATE_IDLE)
 
+    def release(self):
+        """一个请求的响应已完成, 释放其占用的 pipeline 位置
+
+        释放后应再次调用 parse, 以解析缓冲区中排队的请求
+        """
+        self._inflight -= 1
+        if self._inflight == 0:
+            # 响应按请求的顺序完成, 最后交给应用的请求即当前请求
+            self._dispatched = False
+
+    @property
+    def inflight(self):
+        """已交给应用, 尚未响应的请求数"""
+        return self._inflight
+
+    @property
+    def preceding_inflight(self):
+        """排在当前解析的请求之前, 尚未响应的请求数"""
+        return self._inflight - 1 if self._dispatched else self._inflight
+
+    @property
+    def pipeline_full(self):
+        """pipeline 已满, 暂停解析, 后续请求留在缓冲区中"""
+        return self._state == STATE_BUSY and self._inflight >= self._pipeline_depth
+
+    @property
+    def phase(self):
+        """连接当前的读取阶段"""
+        if self._state == STATE_IDLE or self._state == STATE_WAIT_HEADER:
+            if ahp_msgbuf_length(&self._buffer._buffer) == 0 and \
+                    self._parser.state != AHP_PARSER_STATE_PARSE_MESSAGE_HEADER:
+                # pipeline 中仍有请求未响应时, 连接不算空闲
+                return PHASE_IDLE if self._inflight == 0 else PHASE_BUSY
+            return PHASE_HEADER
+        elif self._state == STATE_WAIT_BODY or self._state == STATE_WAIT_PRI_BODY:
+            return PHASE_BODY
+        else:
+            return PHASE_BUSY
+
     def parse(self):
         """接收新数据"""
         cdef parser_ctrl ctrl
@@ -143,6 +235,8 @@ cdef class H1Parser:
 
         ahp_parse_reset(&self._parser)
         self._request = self._create_request()
+        self._header_table = None
+        self._dispatched = False
 
         self._change_state(STATE_WAIT_HEADER)
 
@@ -154,7 +248,9 @@ cdef class H1Parser:
         # parse http request message
         self._errno = ahp_parse_request(&self._parser, &self._buffer._buffer)
         if self._errno == 0:
-            # 报文头完整
+            # 报文头完整, 在缓冲区被修改前拷贝报文头块
+            self._header_table = HeaderTable.from_parser(&self._parser)
+            self._request.attach_header_table(self._header_table)
             self._change_state(STATE_HAVE_HEADER)
         elif self._errno == EAGAIN:
             # 不能构成完整请求，等待更多数据
@@ -170,32 +266,44 @@ cdef class H1Parser:
         # If a message is received with both a Transfer-Encoding and a
         # Content-Length header field, the Transfer-Encoding overrides the
         # Content-Length.
-        if HttpHeader.TRANSFER_ENCODING in self._request:
-            encoding = self._request[HttpHeader.TRANSFER_ENCODING]
-            if encoding[-7:] == b"chunked":
+        encoding = self._header_table.get(HttpHeader.TRANSFER_ENCODING)
+        length = self._header_table.get(HttpHeader.CONTENT_LENGTH)
+        if encoding is not None:
+            if encoding.endswith(b"chunked"):
                 # chunked
+                self._request.create_body(self._spool_threshold)
                 self._transfer_type = BODY_TRANSFER_CHUNKED
                 self._change_state(STATE_TOUCH_BODY)
             else:
                 # others
                 self._change_state(STATE_ERROR)
 
-        elif HttpHeader.CONTENT_LENGTH in self._request:
-            length = self._request[HttpHeader.CONTENT_LENGTH]
+        elif length is not None:
             self._transfer_length = int(length)
-            self._transfer_type = BODY_TRANSFER_LENGTH
-            self._change_state(STATE_TOUCH_BODY)
+            if 0 < self._parser.max_body_size < self._transfer_length:
+                # body 超长, 不必接收即可拒绝
+                self._errno = EFBIG
+                self._change_state(STATE_ERROR)
+            else:
+                if self._transfer_length > 0:
+                    self._request.create_body(self._spool_threshold)
+                self._transfer_type = BODY_TRANSFER_LENGTH
+                self._change_state(STATE_TOUCH_BODY)
 
         else:
             if self._request.method in http_method_need_body:
                 # FIXME: 服务器如果不能判断消息长度的话应该以 400 响应(错误的请求)，或者以 411 响应(要求长度)
                 self._change_state(STATE_ERROR)
             elif self._request.method == HttpMethod.PRI:
+                self._request.create_body()
                 self._change_state(STATE_TOUCH_PRI_BODY)
             else:
                 self._change_state(STATE_HAVE_MESSAGE)
 
         if self._state == STATE_HAVE_MESSAGE or self._state == STATE_TOUCH_BODY:
+            # 交给应用即占用 pipeline 位置, 应用可能在 body 接收完整之前即响应并释放
+            self._inflight += 1
+            self._dispatched = True
             self._on_request(self._request)
 
         return CTRL_CONTINUE
@@ -242,11 +350,12 @@ cdef class H1Parser:
     cdef parser_ctrl _proc_have_message(self):
         # 获取到完整的 request
 
-        self._change_state(STATE_BUSY)
         self._request.body.eof_received()
-        # self._on_request(self._request)
 
-        return CTRL_PAUSE
+        # pipeline 未满时继续解析后续请求
+        self._change_state(STATE_BUSY)
+
+        return CTRL_CONTINUE
 
     cdef parser_ctrl _proc_touch_pri_body(self):
         self._errno = ahp_parse_body_length(&self._parser, &self._buffer._buffer, 6)
@@ -284,8 +393,11 @@ cdef class H1Parser:
         return CTRL_CONTINUE
 
     cdef parser_ctrl _proc_busy(self):
-        self._errno = EBUSY
-        self._change_state(STATE_ERROR)
+        # http1.1 pipeline: 正在处理的请求数达到上限时, 暂停解析, 后续请求留在缓冲区中
+        if self._inflight >= self._pipeline_depth:
+            return CTRL_PAUSE
+
+        self._change_state(STATE_IDLE)
 
         return CTRL_CONTINUE
 
@@ -332,11 +444,6 @@ cdef class H1Parser:
 
         return -1
 
-    cdef int _on_message_header(self, ahp_strlen_t *name, ahp_strlen_t *value):
-        field_name = name.str[:name.len]
-        self._request[field_name] = value.str[:value.len]
-        return 0
-
     cdef int _on_message_body(self, ahp_strlen_t *body):
         try:
             self._request.body.write(body.str[:body.len])
@@ -355,11 +462,6 @@ cdef int __request_line_ext_callback(ahp_parser_t *parser, ahp_strlen_t *method,
     return obj._on_request_line_ext(method, uri, version)
 
 
-cdef int __message_header_callback(ahp_parser_t *parser, ahp_strlen_t *name, ahp_strlen_t *value):
-    cdef H1Parser obj = <H1Parser> parser.data
-    return obj._on_message_header(name, value)
-
-
 cdef int __message_body_callback(ahp_parser_t *parser, ahp_strlen_t *body):
     cdef H1Parser obj = <H1Parser> parser.data
     return obj._on_message_body(body)
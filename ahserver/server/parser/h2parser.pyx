@@ -9,12 +9,16 @@ from ..frame import (
     HttpFrame,
     HttpDataFrame,
     HttpHeadersFrame,
+    HttpRstStreamFrame,
     HttpSettingsFrame,
+    HttpPingFrame,
+    HttpPriorityUpdateFrame,
     HttpWindowUpdateFrame,
 )
-from ..protocol import HttpVersion
+from ..protocol import HttpHeader, HttpVersion
 from .ahparser cimport *
 from .buffer cimport Buffer
+from .headers cimport intern_header_name
 
 try:
     from typing import TYPE_CHECKING
@@ -38,12 +42,24 @@ cdef class H2Parser:
 
         object _request
 
+        int _errno  # splitter 返回的错误码, 负值为 http2 错误码取反
+
+        # 请求头块大小限制, 0 表示不限制
+        long _max_header_size
+        int _max_header_count
+        int _header_count  # 当前请求头块中已解码的请求头数量
+        long _header_block_size  # 当前请求头块已接收的大小, 包括各个 CONTINUATION 帧
+
     def __cinit__(self):
         cdef int errno = ahp_msgbuf_init(&self._header_buffer, 1024)
         if errno != 0:
             raise Exception("Failed to init Buffer. errno:{}".format(errno))
+        errno = ahp_hpack_init(&self._hpack, AHP_HPACK_DEFAULT_TABLE_SIZE)
+        if errno != 0:
+            raise Exception("Failed to init hpack. errno:{}".format(errno))
 
         # 注册 splitter 回调
+        self._splitter.max_frame_size = AHP_DEFAULT_MAX_FRAME_SIZE
         self._splitter.data = <void*> self
         self._splitter.alloc_frame = __alloc_frame_delegate
         self._splitter.free_frame = __free_frame_delegate
@@ -52,6 +68,9 @@ cdef class H2Parser:
         self._splitter.on_headers_frame = __headers_frame_callback
         self._splitter.on_settings_frame = __settings_frame_callback
         self._splitter.on_window_update_frame = __window_update_frame_callback
+        self._splitter.on_rst_stream_frame = __rst_stream_frame_callback
+        self._splitter.on_ping_frame = __ping_frame_callback
+        self._splitter.on_priority_update_frame = __priority_update_frame_callback
 
         # 注册 hpack 回调
         self._hpack.data = <void*> self
@@ -59,17 +78,37 @@ cdef class H2Parser:
 
     def __dealloc__(self):
         ahp_msgbuf_free(&self._header_buffer)
+        ahp_hpack_free(&self._hpack)
 
     def __init__(self, buffer, create_frame, on_frame):  # type:(Buffer, Callable[[HttpFrame], int]) -> None
         self._buffer = buffer  # 注入msgbuf
         self._create_frame = create_frame  # 注入frame工厂
         self._on_frame = on_frame  # 注入frame处理回调
 
+    def set_limits(self, max_header_size=None, max_header_count=None):
+        """设置请求头块的大小限制, None 表示不限制
+
+        超出限制时 parse 返回 -1, error_code 为 ENHANCE_YOUR_CALM
+        """
+        self._max_header_size = max_header_size or 0
+        self._max_header_count = max_header_count or 0
+
+    def set_header_table_size(self, size):
+        """设置本端通告的 SETTINGS_HEADER_TABLE_SIZE, 即对端编码请求头时可使用的动态表大小上限"""
+        ahp_hpack_set_max_table_size(&self._hpack, size)
+
+    @property
+    def error_code(self):
+        """解析出错时, 关闭连接应使用的 http2 错误码"""
+        if self._errno < 0:
+            return -self._errno
+        return AHP_ERROR_PROTOCOL_ERROR
+
     def parse(self):
         """接收新数据"""
 
-        cdef int errno = ahp_split_frame(&self._splitter, &self._buffer._buffer)
-        if errno != EAGAIN:
+        self._errno = ahp_split_frame(&self._splitter, &self._buffer._buffer)
+        if self._errno != EAGAIN:
             return -1
 
         return 0
@@ -78,6 +117,8 @@ cdef class H2Parser:
         frame = self._create_frame(frame_type, flags, identifier)
         if frame is None:
             return NULL
+        if frame_type == AHP_FRAME_TYPE_DATA:
+            frame.length = payload.len
         # 将frame传递到c库中, 加引用
         Py_INCREF(frame)
         return <void*>frame
@@ -98,40 +139,76 @@ cdef class H2Parser:
         return 0
 
     cdef int _on_headers_frame(self, void *frame_ptr, ahp_strlen_t *header_block_fragment):
+        frame: HttpHeadersFrame = <object> frame_ptr
+        if frame.type == AHP_FRAME_TYPE_HEADERS:
+            # 新的请求头块, 其后的 CONTINUATION 帧与之合计
+            self._header_count = 0
+            self._header_block_size = 0
+            ahp_hpack_begin_block(&self._hpack)
+        self._header_block_size += <long> header_block_fragment.len
+        if 0 < self._max_header_size < self._header_block_size:
+            return -AHP_ERROR_ENHANCE_YOUR_CALM
+
         cdef int errno = ahp_msgbuf_append(&self._header_buffer, header_block_fragment.str, header_block_fragment.len)
         if errno != 0:
             return errno
 
-        frame: HttpHeadersFrame = <object> frame_ptr
         self._request = frame.request
         errno = ahp_hpack_decode(&self._hpack, &self._header_buffer)
 
-        if errno == 0 or (errno == EAGAIN and (frame.flag & AHP_FRAME_FLAG_END_HEADERS) == 0):
+        if errno < 0:
+            return errno
+        if errno == 0 or (errno == EAGAIN and (frame.flags & AHP_FRAME_FLAG_END_HEADERS) == 0):
             return 0
+        if errno == ENOMEM:
+            return ENOMEM
 
-        return EBADMSG
+        # 请求头块无法解码, 动态表已不可用
+        return -AHP_ERROR_COMPRESSION_ERROR
 
     cdef int _on_settings_frame(self, void *frame_ptr, uint16_t identifier, uint32_t value):
         frame: HttpSettingsFrame = <object> frame_ptr
         frame.settings[identifier] = value
         return 0
 
-    cdef int _on_window_update_frame(sel, void *frame_ptr, uint32_t increment):
+    cdef int _on_window_update_frame(self, void *frame_ptr, uint32_t increment):
         frame: HttpWindowUpdateFrame = <object> frame_ptr
         frame.increment = increment
         return 0
 
+    cdef int _on_rst_stream_frame(self, void *frame_ptr, uint32_t error_code):
+        frame: HttpRstStreamFrame = <object> frame_ptr
+        frame.error_code = error_code
+        return 0
+
+    cdef int _on_ping_frame(self, void *frame_ptr, ahp_strlen_t *opaque_data):
+        frame: HttpPingFrame = <object> frame_ptr
+        frame.data = opaque_data.str[:opaque_data.len]
+        return 0
+
+    cdef int _on_priority_update_frame(self, void *frame_ptr, uint32_t prioritized_stream_id,
+                                       ahp_strlen_t *priority_field_value):
+        frame: HttpPriorityUpdateFrame = <object> frame_ptr
+        frame.prioritized_stream_id = prioritized_stream_id
+        frame.priority_field_value = priority_field_value.str[:priority_field_value.len]
+        return 0
+
     cdef int _on_header_field(self, ahp_strlen_t* name, ahp_strlen_t* value):
-        field_name = name.str[:name.len]
+        self._header_count += 1
+        if 0 < self._max_header_count < self._header_count:
+            return -AHP_ERROR_ENHANCE_YOUR_CALM
+
+        # http2 中 header 名称均为小写, 常见名称使用共用的 bytes 对象
+        field_name = intern_header_name(name.str, name.len)
         if name.str[0] == 0x3A:
             if field_name == b":method":
                 self._request.method = value.str[:value.len]
             elif field_name == b":path":
                 self._request.uri = value.str[:value.len]
             elif field_name == b":authority":
-                self._request[b"host"] = value.str[:value.len]
+                self._request.add_lowercase(HttpHeader.HOST, value.str[:value.len])
         else:
-            self._request[field_name] = value.str[:value.len]
+            self._request.add_lowercase(field_name, value.str[:value.len])
         return 0
 
 
@@ -163,6 +240,19 @@ cdef int __window_update_frame_callback(ahp_splitter_t *splitter, void *frame, u
     cdef H2Parser obj = <H2Parser> splitter.data
     return obj._on_window_update_frame(frame, increment)
 
+cdef int __rst_stream_frame_callback(ahp_splitter_t *splitter, void *frame, uint32_t error_code):
+    cdef H2Parser obj = <H2Parser> splitter.data
+    return obj._on_rst_stream_frame(frame, error_code)
+
+cdef int __ping_frame_callback(ahp_splitter_t *splitter, void *frame, ahp_strlen_t *opaque_data):
+    cdef H2Parser obj = <H2Parser> splitter.data
+    return obj._on_ping_frame(frame, opaque_data)
+
+cdef int __priority_update_frame_callback(ahp_splitter_t *splitter, void *frame, uint32_t prioritized_stream_id,
+                                          ahp_strlen_t *priority_field_value):
+    cdef H2Parser obj = <H2Parser> splitter.data
+    return obj._on_priority_update_frame(frame, prioritized_stream_id, priority_field_value)
+
 cdef int __header_field_callback(ahp_hpack_t* hpack, ahp_strlen_t* name, ahp_strlen_t* value):
     cdef H2Parser obj = <H2Parser> hpack.data
     return obj._on_header_field(name, value)
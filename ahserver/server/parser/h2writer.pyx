@@ -0,0 +1,88 @@
+# encoding=utf-8
+# cython: language_level=3
+# cython: embedsignature=True
+
+from cpython.buffer cimport PyObject_GetBuffer, PyBuffer_Release, PyBUF_SIMPLE
+from cpython.bytes cimport PyBytes_FromStringAndSize
+
+from .ahparser cimport *
+
+try:
+    from typing import TYPE_CHECKING
+except Exception:
+    TYPE_CHECKING = False
+
+if TYPE_CHECKING:
+    from typing import List, Optional
+
+cdef enum:
+    # 负载不短于此长度时不拷贝, 作为单独的片段写出
+    COPY_THRESHOLD = 1024
+
+
+cdef class H2FrameWriter:
+    """http2 帧的输出缓冲
+
+    帧头以及较短的负载 (SETTINGS, WINDOW_UPDATE, HEADERS ...) 依次拷贝到同一块缓冲区, 较长的负载 (DATA 帧的 body)
+    不拷贝, 作为单独的片段; take() 取出累积的全部片段, 以一次 writelines 写出
+    """
+
+    cdef:
+        ahp_msgbuf_t _buffer
+        list _chunks
+        Py_ssize_t _size
+
+    def __cinit__(self):
+        cdef int errno = ahp_msgbuf_init(&self._buffer, 4096)
+        if errno != 0:
+            raise Exception("Failed to init Buffer. errno:{}".format(errno))
+        self._chunks = []
+        self._size = 0
+
+    def __dealloc__(self):
+        ahp_msgbuf_free(&self._buffer)
+
+    @property
+    def size(self):
+        """累积的字节数"""
+        return self._size
+
+    def write_frame(self, uint8_t frame_type, uint8_t flags, uint32_t identifier, payload=None):
+        # type: (int, int, int, Optional[bytes]) -> None
+        """追加一个帧, payload 可以是 bytes 或 memoryview 等 bytes-like 对象, 写出前不能被修改"""
+        cdef Py_buffer view
+        cdef Py_ssize_t length = 0
+        cdef int errno
+
+        if payload is None:
+            errno = ahp_append_frame_header(&self._buffer, 0, frame_type, flags, identifier)
+        else:
+            PyObject_GetBuffer(payload, &view, PyBUF_SIMPLE)
+            try:
+                length = view.len
+                errno = ahp_append_frame_header(&self._buffer, length, frame_type, flags, identifier)
+                if errno == 0 and length > 0:
+                    if length < COPY_THRESHOLD:
+                        errno = ahp_msgbuf_append(&self._buffer, <const char*>view.buf, length)
+                    else:
+                        self._take_buffer()
+                        self._chunks.append(payload)
+            finally:
+                PyBuffer_Release(&view)
+        if errno != 0:
+            raise MemoryError()
+        self._size += AHP_FRAME_HEADER_SIZE + length
+
+    def take(self):  # type: () -> List[bytes]
+        """取出累积的片段, 并清空缓冲"""
+        self._take_buffer()
+        chunks = self._chunks
+        self._chunks = []
+        self._size = 0
+        return chunks
+
+    cdef _take_buffer(self):
+        cdef long length = ahp_msgbuf_length(&self._buffer)
+        if length > 0:
+            self._chunks.append(PyBytes_FromStringAndSize(ahp_msgbuf_data(&self._buffer), length))
+            ahp_msgbuf_reset(&self._buffer)
@@ -0,0 +1,23 @@
+# encoding=utf-8
+# cython: language_level=3
+# cython: embedsignature=True
+
+from .ahparser cimport ahp_header_span_t, ahp_parser_t
+
+cdef bytes intern_header_name(const char *name, Py_ssize_t length)
+
+cdef class HeaderTable:
+    cdef bytes _block  # 报文头块的拷贝
+    cdef const char *_data
+    cdef ahp_header_span_t *_spans
+    cdef int _count
+
+    @staticmethod
+    cdef HeaderTable from_parser(ahp_parser_t *parser)
+
+    cdef int find(self, const char *name, Py_ssize_t length, int start)
+    cdef int find_index(self, int index, int start)
+    cdef bytes value(self, int index)
+    cdef int _next(self, int index, int start)
+    cdef bint _is_first(self, int index)
+    cdef bytes _name(self, int index, bint lower)
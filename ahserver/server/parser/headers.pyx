@@ -0,0 +1,193 @@
+# encoding=utf-8
+# cython: language_level=3
+# cython: embedsignature=True
+
+from cpython.bytes cimport PyBytes_AS_STRING, PyBytes_FromStringAndSize
+from cpython.mem cimport PyMem_Free, PyMem_Malloc
+from libc.string cimport memcmp, memcpy
+
+from ..protocol import HttpHeader
+from .ahparser cimport (
+    AHP_STATIC_INDEX_TABLE_SIZE,
+    ahp_header_span_t,
+    ahp_parser_t,
+    ahp_static_header_index,
+    ahp_static_header_name,
+    ahp_strlen_t,
+)
+
+
+cdef inline unsigned char _lower(unsigned char ch):
+    if ch >= b'A' and ch <= b'Z':
+        return ch + 32
+    return ch
+
+
+cdef inline bint _name_equals(const char *a, const char *b, Py_ssize_t length):
+    cdef Py_ssize_t i
+    for i in range(length):
+        if _lower(<unsigned char> a[i]) != _lower(<unsigned char> b[i]):
+            return False
+    return True
+
+
+cdef list _create_static_names():
+    # 与 HttpHeader 中的常量共用同一对象
+    cdef dict interned = {value: value for value in vars(HttpHeader).values() if isinstance(value, bytes)}
+    cdef list names = [None]
+    cdef const ahp_strlen_t *name
+    cdef int i
+    for i in range(1, AHP_STATIC_INDEX_TABLE_SIZE + 1):
+        name = ahp_static_header_name(i)
+        value = PyBytes_FromStringAndSize(name.str, name.len)
+        names.append(interned.setdefault(value, value))
+    return names
+
+
+# RFC7541 静态表中的 header 名称 (小写), 以静态表序号索引, 各请求共用
+cdef list _static_names = _create_static_names()
+
+
+cdef bytes intern_header_name(const char *name, Py_ssize_t length):
+    """header 名称为静态表中的小写名称时, 返回共用的 bytes 对象, 否则创建新对象"""
+    cdef int index = ahp_static_header_index(name, length)
+    if index > 0 and memcmp(name, ahp_static_header_name(index).str, length) == 0:
+        return _static_names[index]
+    return PyBytes_FromStringAndSize(name, length)
+
+
+cdef class HeaderTable:
+    """请求头表
+
+    保存报文头块的拷贝和各 header 在块中的位置, 名称和值在查找或遍历时才生成 bytes 对象.
+    名称不区分大小写, 同名 header 的值以 "," 连接, 行为与 HeadersDict 一致.
+    """
+
+    def __cinit__(self):
+        self._block = None
+        self._data = NULL
+        self._spans = NULL
+        self._count = 0
+
+    def __dealloc__(self):
+        PyMem_Free(self._spans)
+
+    @staticmethod
+    cdef HeaderTable from_parser(ahp_parser_t *parser):
+        """从 ahp_parse_request 的解码结果创建, 须在 msgbuf 被修改前调用"""
+        cdef HeaderTable table = HeaderTable.__new__(HeaderTable)
+
+        table._block = PyBytes_FromStringAndSize(parser.header_block, parser.header_block_length)
+        table._data = PyBytes_AS_STRING(table._block)
+        if parser.header_count > 0:
+            table._spans = <ahp_header_span_t *> PyMem_Malloc(parser.header_count * sizeof(ahp_header_span_t))
+            if table._spans == NULL:
+                raise MemoryError()
+            memcpy(table._spans, parser.headers, parser.header_count * sizeof(ahp_header_span_t))
+            table._count = parser.header_count
+
+        return table
+
+    cdef int find(self, const char *name, Py_ssize_t length, int start):
+        """从 start 开始查找名称为 name 的 header, 返回其序号, 不存在时返回 -1"""
+        cdef int index = ahp_static_header_index(name, length)
+        if index > 0:
+            return self.find_index(index, start)
+
+        cdef int i
+        for i in range(start, self._count):
+            if self._spans[i].name_index == 0 and self._spans[i].name_length == length and \
+                    _name_equals(self._data + self._spans[i].name_offset, name, length):
+                return i
+        return -1
+
+    cdef int find_index(self, int index, int start):
+        """从 start 开始查找名称在静态表中序号为 index 的 header"""
+        cdef int i
+        for i in range(start, self._count):
+            if <int> self._spans[i].name_index == index:
+                return i
+        return -1
+
+    cdef bytes value(self, int index):
+        """第 index 个 header 的值, 与其后的同名 header 的值合并"""
+        cdef ahp_header_span_t *span = &self._spans[index]
+        cdef bytes value = PyBytes_FromStringAndSize(self._data + span.value_offset, span.value_length)
+
+        cdef int i = self._next(index, index + 1)
+        while i >= 0:
+            value += b"," + PyBytes_FromStringAndSize(self._data + self._spans[i].value_offset,
+                                                       self._spans[i].value_length)
+            i = self._next(index, i + 1)
+
+        return value
+
+    cdef int _next(self, int index, int start):
+        """从 start 开始查找与第 index 个 header 同名的 header"""
+        cdef ahp_header_span_t *span = &self._spans[index]
+        if span.name_index > 0:
+            return self.find_index(span.name_index, start)
+        return self.find(self._data + span.name_offset, span.name_length, start)
+
+    cdef bint _is_first(self, int index):
+        """第 index 个 header 是否为同名 header 中的第一个"""
+        return self._next(index, 0) == index
+
+    cdef bytes _name(self, int index, bint lower):
+        cdef ahp_header_span_t *span = &self._spans[index]
+        cdef const char *data = self._data + span.name_offset
+        if span.name_index > 0:
+            # 静态表中的名称使用共用的小写 bytes 对象
+            if lower or memcmp(data, ahp_static_header_name(span.name_index).str, span.name_length) == 0:
+                return _static_names[span.name_index]
+
+        cdef bytes name = PyBytes_FromStringAndSize(data, span.name_length)
+        cdef char *buf
+        cdef Py_ssize_t i
+        if lower:
+            # 新创建的 bytes 尚未共享, 可以原地修改
+            buf = PyBytes_AS_STRING(name)
+            for i in range(span.name_length):
+                buf[i] = _lower(<unsigned char> buf[i])
+        return name
+
+    def __contains__(self, bytes name):
+        return self.find(name, len(name), 0) >= 0
+
+    def __getitem__(self, bytes name):
+        cdef int i = self.find(name, len(name), 0)
+        if i < 0:
+            raise KeyError(name)
+        return self.value(i)
+
+    def get(self, bytes name, default=None):
+        cdef int i = self.find(name, len(name), 0)
+        if i < 0:
+            return default
+        return self.value(i)
+
+    def __iter__(self):
+        cdef int i
+        for i in range(self._count):
+            if self._is_first(i):
+                yield self._name(i, False)
+
+    def __len__(self):
+        cdef int i, n = 0
+        for i in range(self._count):
+            if self._is_first(i):
+                n += 1
+        return n
+
+    def items(self):
+        """(名称, 值) 列表, 名称保留原始大小写"""
+        cdef int i
+        return [(self._name(i, False), self.value(i)) for i in range(self._count) if self._is_first(i)]
+
+    def lower_items(self):
+        """(小写名称, 值) 列表"""
+        cdef int i
+        return [(self._name(i, True), self.value(i)) for i in range(self._count) if self._is_first(i)]
+
+    def __repr__(self):
+        return str(dict(self.items()))
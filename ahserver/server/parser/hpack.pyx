@@ -0,0 +1,64 @@
+# encoding=utf-8
+# cython: language_level=3
+# cython: embedsignature=True
+
+from cpython.bytes cimport PyBytes_AS_STRING, PyBytes_FromStringAndSize, PyBytes_GET_SIZE
+
+from .ahparser cimport *
+
+try:
+    from typing import TYPE_CHECKING
+except Exception:
+    TYPE_CHECKING = False
+
+if TYPE_CHECKING:
+    from typing import Iterable, Tuple
+
+
+cdef class HpackEncoder:
+    """HPACK 编码器
+
+    每个连接一个, 编码出的头块须按编码的顺序发送. table_size 为本端使用的动态表大小的上限,
+    实际大小不超过对端通告的 SETTINGS_HEADER_TABLE_SIZE
+    """
+
+    cdef:
+        ahp_hpack_encoder_t _encoder
+        ahp_msgbuf_t _block
+
+    def __cinit__(self, table_size=AHP_HPACK_DEFAULT_TABLE_SIZE):
+        cdef int errno = ahp_msgbuf_init(&self._block, 1024)
+        if errno != 0:
+            raise Exception("Failed to init Buffer. errno:{}".format(errno))
+        errno = ahp_hpack_encoder_init(&self._encoder, table_size)
+        if errno != 0:
+            raise Exception("Failed to init hpack encoder. errno:{}".format(errno))
+
+    def __dealloc__(self):
+        ahp_msgbuf_free(&self._block)
+        ahp_hpack_encoder_free(&self._encoder)
+
+    @property
+    def table_size(self):
+        """动态表当前的大小"""
+        return self._encoder.table.size
+
+    def set_max_table_size(self, size):
+        """对端通告新的 SETTINGS_HEADER_TABLE_SIZE"""
+        ahp_hpack_encoder_set_max_table_size(&self._encoder, size)
+
+    def encode(self, headers):  # type: (Iterable[Tuple[bytes, bytes]]) -> bytes
+        """编码一个头块, 伪头部 (如 :status) 须在最前"""
+        cdef bytes name, value
+        ahp_msgbuf_reset(&self._block)
+        cdef int errno = ahp_hpack_encode_table_size_update(&self._encoder, &self._block)
+        for name, value in headers:
+            if errno != 0:
+                break
+            errno = ahp_hpack_encode_field(&self._encoder, &self._block,
+                                           PyBytes_AS_STRING(name), PyBytes_GET_SIZE(name),
+                                           PyBytes_AS_STRING(value), PyBytes_GET_SIZE(value))
+        if errno != 0:
+            # 动态表可能已与对端不一致, 连接不能再使用
+            raise MemoryError()
+        return PyBytes_FromStringAndSize(ahp_msgbuf_data(&self._block), ahp_msgbuf_length(&self._block))
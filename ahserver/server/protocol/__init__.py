@@ -41,16 +41,15 @@ class HttpVersion(Enum):
 
     @staticmethod
     def parse(version: str):
-        if version == "1.1":
-            return HttpVersion.V11
-        elif version == "2.0":
-            return HttpVersion.V20
-        elif version == "1.0":
-            return HttpVersion.V10
-        else:
+        try:
+            return _http_versions[version]
+        except KeyError:
             raise Exception("Unknown http version.")
 
 
+_http_versions = {member.value: member for member in HttpVersion}
+
+
 @IntPairEnumParser("http_status")
 class HttpStatus(Enum):
     # 1xx: 信息性 - 收到请求，继续处理
@@ -18,7 +18,8 @@ ACCEPT_CHARSET = b"Accept-Charset".lower()
 ACCEPT_ENCODING = b"Accept-Encoding".lower()
 ACCEPT_LANGUAGE = b"Accept-Language".lower()
 AUTHORIZATION = b"Authorization".lower()
-EXCEPT = b"Except".lower()
+EXCEPT = b"Except".lower()  # 拼写错误, 保留以兼容, 应使用 EXPECT
+EXPECT = b"Expect".lower()
 FROM = b"From".lower()
 HOST = b"Host".lower()
 IF_MATCH = b"If-Match".lower()
@@ -33,6 +34,7 @@ REFERER = b"Referer".lower()
 TE = b"TE".lower()
 USER_AGENT = b"User-Agent".lower()
 HTTP2_SETTINGS = b"HTTP2-Settings".lower()
+PRIORITY = b"Priority".lower()  # RFC 9218
 
 # Response Header Fields
 ACCEPT_RANGES = b"Accept-Ranges".lower()
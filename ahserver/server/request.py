@@ -4,7 +4,7 @@ __all__ = ["Request", "HttpRequest"]
 
 from ahserver.server.constant import LATIN1_ENCODING
 
-from ..util.stream import StreamIO
+from ..util.stream import EMPTY_STREAM, StreamIO
 from .headersdict import HeadersDict
 from .protocol import HttpMethod, HttpVersion
 
@@ -14,22 +14,44 @@ except Exception:
     TYPE_CHECKING = False
 
 if TYPE_CHECKING:
-    from typing import Union
+    from typing import Optional, Union
 
 
 class Request:
+    __slots__ = ()
+
     def __init__(self):  # type: () -> None
         super(Request, self).__init__()
 
 
 class HttpRequest(Request, HeadersDict):
+    __slots__ = ("_method", "uri", "_version", "_body")
+
     def __init__(self, method=HttpMethod.GET, uri=b"/", version=HttpVersion.V11):
         # type: (Union[HttpMethod, str], bytes, Union[HttpVersion, str]) -> None
         super(HttpRequest, self).__init__()
         self.method = method
         self.uri = uri
         self.version = version
-        self.body = StreamIO()
+        self._body = None  # type: Optional[StreamIO]
+
+    @property
+    def body(self):  # type: () -> StreamIO
+        """请求 body; 没有 body 的请求共用一个空的 stream"""
+        return self._body if self._body is not None else EMPTY_STREAM
+
+    @body.setter
+    def body(self, body):  # type: (Optional[StreamIO]) -> None
+        self._body = body
+
+    def create_body(self, spool_threshold=None):  # type: (Optional[int]) -> StreamIO
+        """请求带有 body 时, 由解析器调用以创建接收 body 的 stream
+
+        body 超过 spool_threshold 的部分写入临时文件
+        """
+        if self._body is None:
+            self._body = StreamIO(spool_threshold=spool_threshold)
+        return self._body
 
     @property
     def method(self):  # type: () -> HttpMethod
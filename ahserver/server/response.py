@@ -1,13 +1,16 @@
 # encoding=utf-8
 
-__all__ = ["Response", "HttpResponse", "SGIHttpResponse"]
+__all__ = ["Response", "HttpResponse", "SGIHttpResponse", "FileWrapper", "DefaultHeaderBlock"]
+
+import os
+import stat
 
 from abc import ABCMeta, abstractmethod
 from six import add_metaclass
 
 from .. import __version__
 from ..util.date import date_now
-from .constant import LATIN1_ENCODING
+from .constant import LATIN1_ENCODING, SIZE_64KB
 from .headersdict import HeadersDict
 from .protocol import HttpStatus, HttpHeader
 
@@ -17,7 +20,8 @@ except Exception:
     TYPE_CHECKING = False
 
 if TYPE_CHECKING:
-    from typing import AnyStr, AsyncIterator, Dict, Union
+    from typing import AnyStr, AsyncIterator, BinaryIO, Dict, Iterator, Optional, Tuple, Union
+    from ..util.date import DateCache
     from .request import HttpRequest
 
 
@@ -26,11 +30,15 @@ server_version = "AHServer {}".format(__version__).encode(LATIN1_ENCODING)
 
 @add_metaclass(ABCMeta)
 class Response:
+    __slots__ = ()
+
     def __init__(self):  # type: () -> None
         super(Response, self).__init__()
 
 
 class HttpResponse(Response, HeadersDict):
+    __slots__ = ("request", "status", "_body")
+
     def __init__(self, request, status=HttpStatus.OK, headers=None, body=None):
         # type: (HttpRequest, Union[str, HttpStatus], Dict[AnyStr, AnyStr], bytes) -> None
         super(HttpResponse, self).__init__()
@@ -51,17 +59,21 @@ class HttpResponse(Response, HeadersDict):
     def body(self, body):
         self._body = body
 
-    def normalize_headers(self):
+    def normalize_headers(self, date=None):  # type: (Optional[bytes]) -> None
         if HttpHeader.DATE not in self:
-            self[HttpHeader.DATE] = date_now().encode(LATIN1_ENCODING)
+            self[HttpHeader.DATE] = date if date is not None else date_now().encode(LATIN1_ENCODING)
         if HttpHeader.SERVER not in self:
             self[HttpHeader.SERVER] = server_version
 
 
 class SGIHttpResponse(HttpResponse):
+    __slots__ = ("file",)
+
     def __init__(self, request, status=HttpStatus.OK, headers=None) -> None:
         # type: (HttpRequest, Union[str, HttpStatus], Dict[AnyStr, AnyStr]) -> None
         super(SGIHttpResponse, self).__init__(request, status, headers)
+        # 文件响应, 设置后 body 由 context 直接从文件发送
+        self.file = None  # type: Optional[FileWrapper]
 
     @abstractmethod
     def body_iterator(self):  # type: () -> AsyncIterator[bytes]
@@ -73,3 +85,78 @@ class SGIHttpResponse(HttpResponse):
 
     def close(self):
         pass
+
+
+class DefaultHeaderBlock:
+    """默认响应头 (Date, Server)
+
+    预先渲染为一个 http1.x 报文片段, 随 Date 缓存每秒更新一次
+    """
+
+    def __init__(self, date_cache):  # type: (DateCache) -> None
+        self.date_cache = date_cache
+        self._date = None  # type: Optional[bytes]
+        self._block = b""
+
+    @property
+    def date(self):  # type: () -> bytes
+        return self.date_cache.value
+
+    def render(self):  # type: () -> bytes
+        date = self.date_cache.value
+        if date is not self._date:
+            self._date = date
+            self._block = b"".join(
+                (HttpHeader.DATE, b": ", date, b"\r\n", HttpHeader.SERVER, b": ", server_version, b"\r\n")
+            )
+        return self._block
+
+
+class FileWrapper:
+    """文件响应 body
+
+    context 优先使用 sendfile 零拷贝发送文件中 offset 起的 count 字节 (offset 为 None 时从当前位置开始,
+    count 为 None 时直到文件末尾), 不支持零拷贝时 (如 TLS) 分块读取发送.
+    实现了 wsgi.file_wrapper 的接口: 可迭代, 可关闭.
+    """
+
+    def __init__(self, file, block_size=SIZE_64KB, offset=None, count=None):
+        # type: (BinaryIO, int, Optional[int], Optional[int]) -> None
+        self.file = file
+        self.block_size = block_size
+        self.offset = offset
+        self.count = count
+
+    def fileno(self):  # type: () -> Optional[int]
+        """文件可以零拷贝发送时返回文件描述符, 否则返回 None"""
+        try:
+            fd = self.file.fileno()
+            if stat.S_ISREG(os.fstat(fd).st_mode):
+                return fd
+        except (AttributeError, OSError, ValueError):
+            pass
+        return None
+
+    def span(self):  # type: () -> Tuple[int, int]
+        """发送范围 (offset, count), 仅在 fileno() 不为 None 时可用"""
+        offset = self.offset if self.offset is not None else self.file.tell()
+        available = max(0, os.fstat(self.file.fileno()).st_size - offset)
+        count = available if self.count is None else min(self.count, available)
+        return offset, count
+
+    def __iter__(self):  # type: () -> Iterator[bytes]
+        if self.offset is not None:
+            self.file.seek(self.offset)
+
+        remaining = self.count
+        while remaining is None or remaining > 0:
+            data = self.file.read(self.block_size if remaining is None else min(self.block_size, remaining))
+            if not data:
+                break
+            if remaining is not None:
+                remaining -= len(data)
+            yield data
+
+    def close(self):
+        if hasattr(self.file, "close"):
+            self.file.close()
@@ -2,8 +2,15 @@
 
 __all__ = ["HttpServer"]
 
+import asyncio
+import logging
+
+from ..util.date import DateCache
+from ..util.timer import TimerWheel
+from .config import HttpServerConfig
 from .dispatch.root import RootDispatcher
 from .connection.http import HttpConnection
+from .response import DefaultHeaderBlock
 
 try:
     from typing import TYPE_CHECKING
@@ -11,15 +18,29 @@ except Exception:
     TYPE_CHECKING = False
 
 if TYPE_CHECKING:
-    from typing import Optional
+    from asyncio import Future
+    from typing import Optional, Set
     from .dispatch import HttpDispatcher
     from .request import HttpRequest
     from .response import HttpResponse
 
 
 class HttpServer:
-    def __init__(self):
+    def __init__(self, config=None):  # type: (Optional[HttpServerConfig]) -> None
+        self.config = config if config is not None else HttpServerConfig()
         self.root_dispatcher = RootDispatcher()
+        # 所有连接共用的超时定时器
+        self.timer_wheel = TimerWheel(self.config.timer_resolution)
+        # 每秒刷新的 Date 缓存, 及预先渲染的默认响应头
+        self.date_cache = DateCache()
+        self.default_headers = DefaultHeaderBlock(self.date_cache)
+        # 已接受的连接数
+        self.accepted_connections = 0
+
+        # 活动连接 (已建立, 对 TLS 而言即握手已完成)
+        self.connections = set()  # type: Set[HttpConnection]
+        self.is_draining = False
+        self._drained = None  # type: Optional[Future]
 
     def add_dispatcher(self, dispatcher):  # type: (HttpDispatcher) -> None
         self.root_dispatcher.add_dispatcher(dispatcher)
@@ -28,4 +49,37 @@ class HttpServer:
         return await self.root_dispatcher.dispatch(request)
 
     def new_connection(self):  # type: () -> HttpConnection
+        self.accepted_connections += 1
         return HttpConnection(self)
+
+    def connection_made(self, connection):  # type: (HttpConnection) -> None
+        # 握手未完成的 TLS 连接既不会建立也不会断开, 因此在建立时才加入活动连接
+        self.connections.add(connection)
+
+    def connection_lost(self, connection):  # type: (HttpConnection) -> None
+        self.connections.discard(connection)
+        if not self.connections and self._drained is not None and not self._drained.done():
+            self._drained.set_result(None)
+
+    async def shutdown(self, timeout=None):  # type: (Optional[float]) -> None
+        """优雅关闭
+
+        通知所有连接不再接受新请求 (http1.x 回复 Connection: close, http2 发送 GOAWAY),
+        等待进行中的请求完成; timeout 秒后仍未关闭的连接将被强制关闭. 调用前应先停止接受新连接.
+        """
+        self.is_draining = True
+
+        for connection in list(self.connections):
+            connection.shutdown()
+
+        if self.connections:
+            self._drained = asyncio.get_running_loop().create_future()
+            try:
+                await asyncio.wait_for(asyncio.shield(self._drained), timeout)
+            except asyncio.TimeoutError:
+                logging.warning("%d connections are still active after shutdown timeout.", len(self.connections))
+                for connection in list(self.connections):
+                    connection.close()
+
+        self.timer_wheel.close()
+        self.date_cache.stop()
@@ -1,13 +1,57 @@
 # encoding=utf-8
 
-__all__ = ["date_now"]
+__all__ = ["date_now", "DateCache"]
+
+import time
 
 from datetime import datetime
 from time import mktime
 from wsgiref.handlers import format_date_time
 
+try:
+    from typing import TYPE_CHECKING
+except Exception:
+    TYPE_CHECKING = False
+
+if TYPE_CHECKING:
+    from asyncio import AbstractEventLoop, TimerHandle
+    from typing import Optional
+
 
 def date_now():
     now = datetime.now()
     stamp = mktime(now.timetuple())
     return format_date_time(stamp)
+
+
+class DateCache:
+    """http Date 缓存
+
+    由 event loop 定时器在每秒开始时刷新, value 为 latin-1 编码的当前时间, 避免为每个响应格式化时间
+    """
+
+    def __init__(self):  # type: () -> None
+        self.value = b""
+        self._timer = None  # type: Optional[TimerHandle]
+        self._loop = None  # type: Optional[AbstractEventLoop]
+        self._refresh()
+
+    def start(self, loop):  # type: (AbstractEventLoop) -> None
+        """启动定时刷新, 重复调用无副作用"""
+        if self._timer is None:
+            self._loop = loop
+            self._tick()
+
+    def stop(self):  # type: () -> None
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _refresh(self):  # type: () -> float
+        now = time.time()
+        self.value = format_date_time(now).encode("latin-1")
+        return now
+
+    def _tick(self):  # type: () -> None
+        now = self._refresh()
+        self._timer = self._loop.call_later(1.0 - now % 1.0, self._tick)
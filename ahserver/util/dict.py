@@ -5,7 +5,12 @@
 
 __all__ = ["CaseInsensitiveDict"]
 
-from collections import OrderedDict, Mapping, MutableMapping, ItemsView, Iterator
+from collections import OrderedDict
+
+try:
+    from collections.abc import Mapping, MutableMapping, ItemsView, Iterator
+except ImportError:
+    from collections import Mapping, MutableMapping, ItemsView, Iterator
 
 try:
     from typing import TYPE_CHECKING
@@ -35,6 +40,9 @@ class LowerItemsView(ItemsView):
     def __iter__(self):  # type: () -> Iterator
         return LowerItemsIterator(self._view.__iter__())
 
+    def __len__(self):  # type: () -> int
+        return len(self._view)
+
 
 class OriginKeyIterator(Iterator):
     def __init__(self, iterator):  # type: (Iterator) -> None
@@ -95,6 +103,15 @@ class CaseInsensitiveDict(MutableMapping):  # type: MutableMapping[AnyStr, Any]
     def __delitem__(self, key):  # type: (AnyStr) -> None
         del self._store[key.lower()]
 
+    def lower_get(self, lower_key, default=None):  # type: (AnyStr, Any) -> Any
+        """lower_key 已是小写时, 省去 lower() 调用"""
+        item = self._store.get(lower_key)
+        return default if item is None else item[1]
+
+    def lower_set(self, lower_key, value):  # type: (AnyStr, Any) -> None
+        """lower_key 已是小写时, 省去 lower() 调用, 以 lower_key 作为原始 key"""
+        self._store[lower_key] = (lower_key, value)
+
     def __iter__(self):  # type: () -> Iterator[AnyStr]
         return OriginKeyIterator(self._store.values().__iter__())
 
@@ -24,14 +24,20 @@ class FieldNameEnumParser(EnumParser):
     def __call__(self, clazz):  # type: (Type[Enum]) -> Type[Enum]
         super(FieldNameEnumParser, self).__call__(clazz)
 
+        # 缓存解析结果, 只缓存能解析为成员的字符串, 数量有限
+        clazz._parse_cache_ = {}
+
         @classmethod
         def parse(cls, filed_name):  # type: (EnumMeta, Union[str, bytes]) -> Enum
-            if isinstance(filed_name, bytes):
-                filed_name = filed_name.decode("ascii")
+            member = cls._parse_cache_.get(filed_name)
+            if member is not None:
+                return member
 
-            key = filed_name.upper().replace("-", "_")
+            name = filed_name.decode("ascii") if isinstance(filed_name, bytes) else filed_name
+            key = name.upper().replace("-", "_")
             if key in cls.__members__:
-                return cls[key]
+                member = cls._parse_cache_[filed_name] = cls[key]
+                return member
 
             raise Exception("Unknown {}.".format(self.enum_type))
 
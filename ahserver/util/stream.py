@@ -1,12 +1,13 @@
 # encoding=utf-8
 
-__all__ = ["StreamIO", "InputStreamWrapper"]
+__all__ = ["StreamIO", "EmptyStreamIO", "EMPTY_STREAM", "InputStreamWrapper"]
 
 import asyncio
+import os
+import tempfile
 
 from abc import ABCMeta, abstractmethod
-from asyncio import Condition as ACondition, Lock as ALock
-from io import BytesIO, SEEK_END, SEEK_SET
+from collections import deque
 from six import add_metaclass
 
 try:
@@ -16,21 +17,23 @@ except Exception:
 
 if TYPE_CHECKING:
     from asyncio import AbstractEventLoop
-    from typing import ByteString, List, Optional, Union
+    from typing import BinaryIO, ByteString, Callable, Deque, List, Optional, Union
+
+# 从落盘文件中每次读回的大小
+SPOOL_READ_SIZE = 64 * 1024
+# 尚未写入落盘文件的数据超过 SPOOL_HIGH_WATER 时暂停接收, 回落到 SPOOL_LOW_WATER 以下时恢复
+SPOOL_HIGH_WATER = 1024 * 1024
+SPOOL_LOW_WATER = 256 * 1024
 
 
 @add_metaclass(ABCMeta)
 class StreamIOBase:
-    def __init__(self, initial_bytes):  # type: (Optional[bytes]) -> None
-        self._buf = BytesIO(initial_bytes)
-        self._pos = 0
+    def __init__(self):  # type: () -> None
         self._has_eof = False
 
-    def getvalue(self):
-        return self._buf.getvalue()
-
-    def auto_reduce(self):
-        return self._buf.tell()
+    @abstractmethod
+    def getvalue(self):  # type: () -> bytes
+        raise NotImplementedError()
 
     @abstractmethod
     def write(self, b):  # type: (bytes) -> None
@@ -40,99 +43,330 @@ class StreamIOBase:
         raise NotImplementedError()
 
 
+class _SpoolFile:
+    """body 的落盘部分
+
+    数据写入已删除的临时文件, 写入和读取都在 executor 中以 pwrite/pread 进行, 不阻塞事件循环.
+    """
+
+    def __init__(self, on_written):  # type: (Callable[[], None]) -> None
+        self.file = tempfile.TemporaryFile()  # type: Optional[BinaryIO]
+        self.on_written = on_written
+        self.read_offset = 0
+        self.write_offset = 0  # 已写入文件的字节数
+        self.unwritten = 0  # 尚未写入文件的字节数, 包括正在写入的部分
+        self.pending = deque()  # type: Deque[bytes]
+        self.error = None  # type: Optional[BaseException]
+        self._flush_task = None  # type: Optional[asyncio.Task]
+        self._closing = False
+
+    @property
+    def readable(self):  # type: () -> int
+        """已写入文件, 尚未读取的字节数"""
+        return self.write_offset - self.read_offset
+
+    @property
+    def drained(self):  # type: () -> bool
+        """数据均已写入文件并读出"""
+        return self.unwritten == 0 and self.readable == 0
+
+    def append(self, b):  # type: (bytes) -> None
+        if self.error is not None or self._closing:
+            return
+        self.pending.append(b)
+        self.unwritten += len(b)
+        if self._flush_task is None:
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush())
+
+    async def _flush(self):  # type: () -> None
+        loop = asyncio.get_running_loop()
+        try:
+            while self.pending and not self._closing:
+                data = b"".join(self.pending) if len(self.pending) > 1 else self.pending[0]
+                self.pending.clear()
+                view = memoryview(data)
+                while view:
+                    n = await loop.run_in_executor(None, os.pwrite, self.file.fileno(), view, self.write_offset)
+                    self.write_offset += n
+                    self.unwritten -= n
+                    view = view[n:]
+                self.on_written()
+        except BaseException as e:
+            self.error = e
+            self.pending.clear()
+            self.unwritten = 0
+            self.on_written()
+        finally:
+            self._flush_task = None
+            if self._closing:
+                self.close()
+
+    async def read(self, size):  # type: (int) -> bytes
+        loop = asyncio.get_running_loop()
+        size = min(size, self.readable)
+        data = await loop.run_in_executor(None, os.pread, self.file.fileno(), size, self.read_offset)
+        self.read_offset += len(data)
+        return data
+
+    def close(self):  # type: () -> None
+        """关闭文件; 正在写入时, 放弃其余数据, 写入返回后再关闭"""
+        self._closing = True
+        if self._flush_task is None and self.file is not None:
+            self.file.close()
+            self.file = None
+
+
 class StreamIO(StreamIOBase):
-    def __init__(self, initial_bytes=None):  # type: (Optional[bytes]) -> None
-        super(StreamIO, self).__init__(initial_bytes)
-        self._alock = ALock()
-        self._acond = ACondition(self._alock)
-        self._wake_task = None
+    """请求 body stream
+
+    以 chunk 队列保存收到的数据, 不合并拷贝; 读取过的 chunk 即从队列中释放.
+    read1 直接返回收到的 chunk. 读取方等待数据时挂起在 future 上, 同一时刻只允许一个读取方等待.
+
+    指定 spool_threshold 时, 收到的数据超过该大小后, 其余部分写入临时文件, 读取时再分块读回,
+    内存占用不随 body 大小增长. 临时文件在数据读完或 stream 被回收时关闭. 写入文件跟不上接收时,
+    经由 set_flow_control 注册的回调通知接收方暂停接收.
+    """
+
+    def __init__(self, initial_bytes=None, spool_threshold=None):  # type: (Optional[bytes], Optional[int]) -> None
+        super(StreamIO, self).__init__()
+        self._chunks = deque()  # type: Deque[Union[bytes, memoryview]]
+        self._buffered = 0  # 队列中未读取的字节数
+        self._size = 0  # 未读取的字节数, 包括落盘部分
+        self._received = 0
+        self._waiter = None  # type: Optional[asyncio.Future]
+        self._spool_threshold = spool_threshold
+        self._spool = None  # type: Optional[_SpoolFile]
+        self._continue_callback = None  # type: Optional[Callable[[], None]]
+        self._flow_control = None  # type: Optional[Callable[[bool], None]]
+        self._paused = False
+        if initial_bytes:
+            self.write(initial_bytes)
+
+    def getvalue(self):  # type: () -> bytes
+        """内存中未读取的数据"""
+        return b"".join(self._chunks)
 
     async def at_eof(self):
-        return self._has_eof and self._buf.seek(0, SEEK_END) == self._pos
+        return self._has_eof and self._size == 0
+
+    def expect_continue(self, callback):  # type: (Callable[[], None]) -> None
+        """请求带有 Expect: 100-continue 时, 注册发送 100 Continue 的回调
+
+        回调在第一次读取数据需要等待时调用; 客户端未等待 100 Continue 即发送了 body 时不再调用
+        """
+        self._continue_callback = callback
+
+    @property
+    def awaiting_continue(self):  # type: () -> bool
+        """客户端是否仍在等待 100 Continue, 尚未发送 body"""
+        return self._continue_callback is not None
+
+    def set_flow_control(self, callback):  # type: (Callable[[bool], None]) -> None
+        """注册接收流控的回调
+
+        尚未写入临时文件的数据超过 SPOOL_HIGH_WATER 时以 True 调用, 接收方应暂停接收;
+        回落到 SPOOL_LOW_WATER 以下时以 False 调用, 恢复接收
+        """
+        self._flow_control = callback
+
+    def _set_paused(self, paused):  # type: (bool) -> None
+        self._paused = paused
+        if self._flow_control is not None:
+            self._flow_control(paused)
+
+    def _spool_written(self):  # type: () -> None
+        spool = self._spool
+        if self._paused and (spool.unwritten <= SPOOL_LOW_WATER or spool.error is not None):
+            self._set_paused(False)
+        self._wakeup()
+
+    async def _wait(self):  # type: () -> None
+        if self._waiter is not None:
+            raise RuntimeError("Another coroutine is already waiting for stream data")
+
+        if self._continue_callback is not None:
+            callback, self._continue_callback = self._continue_callback, None
+            callback()
+
+        self._waiter = asyncio.get_running_loop().create_future()
+        try:
+            await self._waiter
+        finally:
+            self._waiter = None
+
+    def _wakeup(self):  # type: () -> None
+        waiter = self._waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    async def _fill(self):  # type: () -> bool
+        """等待更多数据进入队列, 数据已读完时返回 False"""
+        buffered = self._buffered
+        while True:
+            if self._buffered > buffered:
+                # 等待期间 write 追加了数据
+                return True
+            spool = self._spool
+            if spool is not None:
+                if spool.error is not None:
+                    raise spool.error
+                if spool.readable > 0:
+                    data = await spool.read(SPOOL_READ_SIZE)
+                    self._chunks.append(data)
+                    self._buffered += len(data)
+                    return True
+                if self._has_eof and spool.drained:
+                    spool.close()
+                    return False
+            elif self._has_eof:
+                return False
+
+            await self._wait()
+
+    def _pop(self, size=-1):  # type: (int) -> Union[bytes, memoryview]
+        """从队列头部取出至多 size 字节, size 为 -1 时取出整个 chunk"""
+        chunk = self._chunks[0]
+        if size < 0 or size >= len(chunk):
+            self._chunks.popleft()
+        else:
+            view = chunk if isinstance(chunk, memoryview) else memoryview(chunk)
+            self._chunks[0] = view[size:]
+            chunk = view[:size]
+        self._buffered -= len(chunk)
+        self._size -= len(chunk)
+        return chunk
+
+    async def read1(self):  # type: () -> bytes
+        if not self._chunks and not await self._fill():
+            return b""
+
+        chunk = self._pop()
+        return chunk if isinstance(chunk, bytes) else bytes(chunk)
+
+    async def read(self, size=-1):  # type: (int) -> bytes
+        if size == 0:
+            return b""
+
+        while size < 0 or self._buffered < size:
+            if not await self._fill():
+                break
+
+        if size < 0 or size >= self._buffered:
+            if len(self._chunks) <= 1:
+                return await self.read1()
+            data = b"".join(self._chunks)
+            self._chunks.clear()
+            self._size -= self._buffered
+            self._buffered = 0
+            return data
+
+        parts = []
+        while size > 0:
+            chunk = self._pop(size)
+            size -= len(chunk)
+            parts.append(chunk)
+        return b"".join(parts)
+
+    def _find_newline(self, size):  # type: (int) -> int
+        """换行符之后的位置, 不存在时返回 -1"""
+        offset = 0
+        for chunk in self._chunks:
+            if 0 <= size <= offset:
+                break
+            index = bytes(chunk).find(b"\n") if isinstance(chunk, memoryview) else chunk.find(b"\n")
+            if index >= 0:
+                return offset + index + 1
+            offset += len(chunk)
+        return -1
+
+    async def readline(self, size=-1):  # type: (int) -> bytes
+        while True:
+            end = self._find_newline(size)
+            if end >= 0 or 0 <= size <= self._buffered or not await self._fill():
+                break
+
+        if end < 0:
+            end = self._buffered
+        if 0 <= size < end:
+            end = size
+        return await self.read(end)
+
+    async def readlines(self, hint=-1):  # type: (int) -> List[bytes]
+        lines = []
+        total = 0
+        while hint <= 0 or total < hint:
+            line = await self.readline()
+            if not line:
+                break
+            lines.append(line)
+            total += len(line)
+        return lines
+
+    def write(self, b):  # type: (Union[bytes, bytearray]) -> None
+        """write data in event loop"""
+        if len(b) <= 0:
+            return
+
+        b = b if isinstance(b, bytes) else bytes(b)
+        self._continue_callback = None
+        self._received += len(b)
+        self._size += len(b)
+        if self._spool is None and self._spool_threshold is not None and self._received > self._spool_threshold:
+            self._spool = _SpoolFile(self._spool_written)
+
+        if self._spool is not None:
+            self._spool.append(b)
+            if not self._paused and self._spool.unwritten > SPOOL_HIGH_WATER:
+                self._set_paused(True)
+        else:
+            self._chunks.append(b)
+            self._buffered += len(b)
+            self._wakeup()
+
+    def eof_received(self):
+        self._has_eof = True
+        self._wakeup()
+
+
+class EmptyStreamIO:
+    """已结束的空 stream, 没有 body 的请求共用同一实例"""
+
+    __slots__ = ()
+
+    awaiting_continue = False
+
+    def getvalue(self):
+        return b""
+
+    async def at_eof(self):
+        return True
 
     async def read1(self):
-        async with self._acond:
-            self._buf.seek(self._pos, SEEK_SET)
-            try:
-                data = self._buf.read()
-                if len(data) <= 0 and not self._has_eof:
-                    await self._acond.wait()
-                    return self._buf.read()
-                return data
-            finally:
-                self._pos = self.auto_reduce()
+        return b""
 
     async def read(self, size=-1):
-        async with self._acond:
-            self._buf.seek(self._pos, SEEK_SET)
-            try:
-                data = bytearray()
-                while True:
-                    b = self._buf.read(size)
-                    data += b
-                    if (size != -1 and len(b) >= size) or self._has_eof:
-                        return data
-                    if size != -1:
-                        size -= len(b)
-
-                    self._pos = self.auto_reduce()
-                    await self._acond.wait()
-                    self._buf.seek(self._pos, SEEK_SET)
-            finally:
-                self._pos = self.auto_reduce()
+        return b""
 
     async def readline(self, size=-1):
-        async with self._acond:
-            self._buf.seek(self._pos, SEEK_SET)
-            try:
-                data = bytearray()
-                while True:
-                    b = self._buf.readline(size)
-                    data += b
-                    if (len(data) > 0 and data[-1] == b"\n") or (size != -1 and len(b) >= size) or self._has_eof:
-                        return data
-                    if size != -1:
-                        size -= len(b)
-
-                    self._pos = self.auto_reduce()
-                    await self._acond.wait()
-                    self._buf.seek(self._pos, SEEK_SET)
-            finally:
-                self._pos = self.auto_reduce()
+        return b""
 
     async def readlines(self, hint=-1):
-        async with self._acond:
-            while not self._has_eof:
-                await self._acond.wait()
-            self._buf.seek(self._pos, SEEK_SET)
-            try:
-                return self._buf.readlines(hint)
-            finally:
-                self._pos = self.auto_reduce()
-
-    async def _wake_read(self):
-        async with self._acond:
-            self._acond.notify()
-
-    def _reset_wake_task(self, task):
-        if self._wake_task is task:
-            self._wake_task = None
-
-    def wake_read(self):
-        if self._wake_task is None or self._wake_task.done():
-            loop = asyncio.get_running_loop()
-            self._wake_task = loop.create_task(self._wake_read())
-            self._wake_task.add_done_callback(self._reset_wake_task)
+        return []
 
     def write(self, b):  # type: (Union[bytes, bytearray]) -> None
-        """write data in event loop"""
-        self._buf.seek(0, SEEK_END)
-        self._buf.write(b)
-        self.wake_read()
+        raise IOError("Can not write to empty stream")
 
     def eof_received(self):
-        self._has_eof = True
-        self.wake_read()
+        pass
+
+    def expect_continue(self, callback):  # type: (Callable[[], None]) -> None
+        pass
+
+    def set_flow_control(self, callback):  # type: (Callable[[bool], None]) -> None
+        pass
+
+
+EMPTY_STREAM = EmptyStreamIO()
 
 
 class InputStreamWrapper:
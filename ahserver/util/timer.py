@@ -0,0 +1,109 @@
+# encoding=utf-8
+
+__all__ = ["TimerWheel", "TimerWheelHandle"]
+
+import asyncio
+import logging
+
+try:
+    from typing import TYPE_CHECKING
+except Exception:
+    TYPE_CHECKING = False
+
+if TYPE_CHECKING:
+    from asyncio import AbstractEventLoop, TimerHandle
+    from typing import Any, Callable, Optional, Set
+
+
+class TimerWheelHandle:
+    __slots__ = ("_wheel", "_slot", "_rounds", "_callback", "_args")
+
+    def __init__(self, wheel, callback, args):  # type: (TimerWheel, Callable[..., Any], tuple) -> None
+        self._wheel = wheel
+        self._slot = None  # type: Optional[Set[TimerWheelHandle]]
+        self._rounds = 0
+        self._callback = callback
+        self._args = args
+
+    def cancel(self):  # type: () -> None
+        if self._slot is not None:
+            self._slot.discard(self)
+            self._slot = None
+            self._wheel._count -= 1
+
+    def cancelled(self):  # type: () -> bool
+        return self._slot is None
+
+
+class TimerWheel:
+    """粗粒度的时间轮定时器
+
+    所有定时任务共用一个 event loop 定时器, 每个 tick 只处理当前槽位中的任务;
+    添加和取消定时任务都是 O(1) 操作. 适合连接级的超时控制 (keep-alive, header/body 读取超时等),
+    触发时间的误差不超过一个 tick.
+    """
+
+    def __init__(self, resolution=1.0, size=64, loop=None):
+        # type: (float, int, Optional[AbstractEventLoop]) -> None
+        self._resolution = resolution
+        self._slots = [set() for _ in range(size)]  # type: list[Set[TimerWheelHandle]]
+        self._cursor = 0
+        self._count = 0
+        self._loop = loop
+        self._tick_handle = None  # type: Optional[TimerHandle]
+        self._tick_time = 0.0
+
+    def call_later(self, delay, callback, *args):  # type: (float, Callable[..., Any], Any) -> TimerWheelHandle
+        """在 delay 秒后调用 callback(*args)"""
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+
+        size = len(self._slots)
+        ticks = max(1, -int(-delay // self._resolution))  # ceil
+        rounds, offset = divmod(ticks - 1, size)
+
+        handle = TimerWheelHandle(self, callback, args)
+        handle._rounds = rounds
+        handle._slot = self._slots[(self._cursor + offset + 1) % size]
+        handle._slot.add(handle)
+        self._count += 1
+
+        if self._tick_handle is None:
+            self._tick_time = self._loop.time() + self._resolution
+            self._tick_handle = self._loop.call_at(self._tick_time, self._tick)
+
+        return handle
+
+    def close(self):  # type: () -> None
+        if self._tick_handle is not None:
+            self._tick_handle.cancel()
+            self._tick_handle = None
+        for slot in self._slots:
+            for handle in slot:
+                handle._slot = None
+            slot.clear()
+        self._count = 0
+
+    def _tick(self):
+        self._cursor = (self._cursor + 1) % len(self._slots)
+
+        slot = self._slots[self._cursor]
+        expired = []
+        for handle in slot:
+            if handle._rounds > 0:
+                handle._rounds -= 1
+            else:
+                expired.append(handle)
+
+        for handle in expired:
+            handle.cancel()
+            try:
+                handle._callback(*handle._args)
+            except Exception:
+                logging.exception("encounter unexpected exception in timer callback.")
+
+        if self._count > 0:
+            self._tick_time += self._resolution
+            self._tick_handle = self._loop.call_at(self._tick_time, self._tick)
+        else:
+            self._tick_handle = None
@@ -0,0 +1,65 @@
+# encoding=utf-8
+"""请求报文头的解析耗时
+
+以 H1Parser 反复解析同一请求, 统计每个请求的平均耗时. 环境变量 AHP_SCAN 可指定 ahparser 使用的扫描实现
+(swar/sse2/avx2, x86-64 上默认为 sse2), 用于对比:
+
+    AHP_SCAN=swar python benchmark/header_scan.py
+    python benchmark/header_scan.py [-n 20000]
+"""
+
+import argparse
+import asyncio
+import time
+
+from ahserver.server.parser import Buffer, H1Parser
+from ahserver.server.request import HttpRequest
+
+GET_REQUEST = (
+    b"GET /index.html?q=1 HTTP/1.1\r\n"
+    b"Host: www.example.com\r\n"
+    b"Connection: keep-alive\r\n"
+    b"User-Agent: Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0 Safari/537.36\r\n"
+    b"Accept: text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8\r\n"
+    b"Accept-Encoding: gzip, deflate, br\r\n"
+    b"Accept-Language: en-US,en;q=0.9\r\n"
+    b"\r\n"
+)
+
+# 带有较大 cookie 的请求
+COOKIE_REQUEST = GET_REQUEST[:-2] + b"Cookie: " + b"; ".join(
+    b"name%02d=%s" % (i, b"0123456789abcdef" * 8) for i in range(32)
+) + b"\r\n\r\n"
+
+# 带有较长 uri 的请求
+URI_REQUEST = b"GET /search?" + b"&".join(b"key%02d=value%02d" % (i, i) for i in range(200)) + GET_REQUEST[19:]
+
+
+def measure(name, data, count):  # type: (str, bytes, int) -> None
+    requests = []
+    buffer = Buffer()
+    parser = H1Parser(buffer, HttpRequest, requests.append)
+
+    start = time.perf_counter()
+    for _ in range(count):
+        buffer.append(data)
+        parser.parse()
+        parser.release()
+    elapsed = time.perf_counter() - start
+
+    assert len(requests) == count
+    print("{:<7} {:>6} bytes {:>10.2f} us/request".format(name, len(data), elapsed / count * 1e6))
+
+
+async def main(count):  # type: (int) -> None
+    for name, data in (("GET", GET_REQUEST), ("COOKIE", COOKIE_REQUEST), ("URI", URI_REQUEST)):
+        measure(name, data, count // 10)  # 预热
+        measure(name, data, count)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="request header parsing time")
+    parser.add_argument("-n", "--number", type=int, default=20000, help="number of requests")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.number))
@@ -0,0 +1,95 @@
+# encoding=utf-8
+"""请求对象的内存分配统计
+
+以 tracemalloc 统计 H1Parser 解析请求并读取若干 header 后, 每个存活的请求对象占用的内存块数和字节数.
+
+用法:
+    python benchmark/request_alloc.py [-n 10000]
+"""
+
+import argparse
+import asyncio
+import tracemalloc
+
+from ahserver.server.parser import Buffer, H1Parser
+from ahserver.server.protocol import HttpHeader
+from ahserver.server.request import HttpRequest
+
+GET_REQUEST = (
+    b"GET /index.html?q=1 HTTP/1.1\r\n"
+    b"Host: www.example.com\r\n"
+    b"Connection: keep-alive\r\n"
+    b"Cache-Control: max-age=0\r\n"
+    b'sec-ch-ua: "Chromium";v="118", "Not=A?Brand";v="99"\r\n'
+    b"sec-ch-ua-mobile: ?0\r\n"
+    b'sec-ch-ua-platform: "Linux"\r\n'
+    b"Upgrade-Insecure-Requests: 1\r\n"
+    b"User-Agent: Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0 Safari/537.36\r\n"
+    b"Accept: text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8\r\n"
+    b"Sec-Fetch-Site: none\r\n"
+    b"Sec-Fetch-Mode: navigate\r\n"
+    b"Sec-Fetch-User: ?1\r\n"
+    b"Sec-Fetch-Dest: document\r\n"
+    b"Accept-Encoding: gzip, deflate, br\r\n"
+    b"Accept-Language: en-US,en;q=0.9\r\n"
+    b"Cookie: session=0123456789abcdef; theme=dark\r\n"
+    b"\r\n"
+)
+
+POST_REQUEST = (
+    b"POST /api/items HTTP/1.1\r\n"
+    b"Host: www.example.com\r\n"
+    b"User-Agent: curl/8.0\r\n"
+    b"Accept: */*\r\n"
+    b"Content-Type: application/json\r\n"
+    b"Content-Length: 16\r\n"
+    b"\r\n"
+    b'{"name": "item"}'
+)
+
+
+def parse_requests(data, count):  # type: (bytes, int) -> list
+    requests = []
+
+    buffer = Buffer()
+    parser = H1Parser(buffer, HttpRequest, requests.append)
+    for _ in range(count):
+        buffer.append(data)
+        parser.parse()
+        # 模拟应用读取少量 header
+        request = requests[-1]
+        request.get(HttpHeader.HOST)
+        request.get(HttpHeader.USER_AGENT)
+        request.get(HttpHeader.ACCEPT_ENCODING)
+        request.get(HttpHeader.CONNECTION)
+        parser.release()
+    return requests
+
+
+def measure(name, data, count):  # type: (str, bytes, int) -> None
+    parse_requests(data, 100)  # 预热, 排除模块级缓存
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    requests = parse_requests(data, count)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    stats = after.compare_to(before, "filename")
+    blocks = sum(stat.count_diff for stat in stats)
+    size = sum(stat.size_diff for stat in stats)
+    print("{:<6} {:>10.1f} blocks/request {:>10.1f} bytes/request".format(name, blocks / count, size / count))
+    del requests
+
+
+async def main(count):  # type: (int) -> None
+    measure("GET", GET_REQUEST, count)
+    measure("POST", POST_REQUEST, count)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="per request allocation")
+    parser.add_argument("-n", "--number", type=int, default=10000, help="number of requests")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.number))
@@ -3,9 +3,13 @@
 import io
 import os
 import re
+import shutil
+import subprocess
+import sys
 
 from Cython.Build import cythonize
 from setuptools import Extension, find_packages, setup
+from setuptools.command.build_ext import build_ext
 
 kwds = {}
 
@@ -20,6 +24,24 @@ if os.path.exists("README.rst"):
     with io.open("README.rst", encoding="utf-8") as rf:
         kwds["long_description"] = rf.read()
 
+# 构建模式, 由环境变量 AHSERVER_BUILD 指定:
+#   release: -O3 与 LTO, 关闭 Cython 的下标检查 (默认)
+#   debug: 不优化, 保留 Cython 的下标检查, 便于调试
+#   pgo: 在 release 的基础上, 先以 -fprofile-generate 构建并运行 benchmark/pgo_train.py 采集 profile,
+#        再以 -fprofile-use 重新构建. 需要 GCC
+BUILD_MODE = os.environ.get("AHSERVER_BUILD", "release")
+if BUILD_MODE not in ("release", "debug", "pgo"):
+    raise ValueError("unknown AHSERVER_BUILD: {}".format(BUILD_MODE))
+
+if BUILD_MODE == "debug":
+    compile_args = ["-fno-strict-aliasing", "-g", "-O0"]
+    link_args = []
+    compiler_directives = {}
+else:
+    compile_args = ["-fno-strict-aliasing", "-O3", "-flto"]
+    link_args = ["-O3", "-flto"]
+    compiler_directives = {"boundscheck": False, "wraparound": False}
+
 ahparser = Extension(
     name="ahserver.server.parser.ahparser",
     sources=[
@@ -29,13 +51,15 @@ ahparser = Extension(
         "ahparser/src/index.c",
         "ahparser/src/msgbuf.c",
         "ahparser/src/parser.c",
+        "ahparser/src/scan.c",
         "ahparser/src/splitter.c",
         "ahparser/src/strbuf.c",
         "ahparser/src/strlen.c",
         "ahserver/server/parser/ahparser.pyx",
     ],
     include_dirs=["ahparser/include"],
-    extra_compile_args=["-fno-strict-aliasing", "-g", "-O0"],
+    extra_compile_args=compile_args,
+    extra_link_args=link_args,
     language="c",
 )
 
@@ -43,10 +67,45 @@ h2ext = Extension(
     name="ahserver.server.parser.*",
     sources=["ahserver/server/parser/*.pyx"],
     include_dirs=["ahparser/include"],
-    extra_compile_args=["-fno-strict-aliasing", "-g", "-O0"],
+    extra_compile_args=compile_args,
+    extra_link_args=link_args,
     language="c",
 )
 
+
+class BuildExt(build_ext):
+    """pgo 模式下分两次构建扩展, 中间运行训练负载"""
+
+    def run(self):
+        if BUILD_MODE != "pgo":
+            build_ext.run(self)
+            return
+
+        profile_dir = os.path.abspath(os.path.join(self.build_temp, "pgo"))
+        shutil.rmtree(profile_dir, ignore_errors=True)
+
+        self.force = True  # 两次构建的目标文件相同, 需强制重新编译
+        compiler = self.compiler  # run 会将其替换为编译器对象
+        self._set_profile_args(["-fprofile-generate=" + profile_dir])
+        build_ext.run(self)
+
+        # 训练负载从构建输出中导入扩展
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(
+            filter(None, [wd if self.inplace else os.path.abspath(self.build_lib), env.get("PYTHONPATH")])
+        )
+        subprocess.check_call([sys.executable, os.path.join(wd, "benchmark", "pgo_train.py")], env=env)
+
+        self.compiler = compiler
+        self._set_profile_args(["-fprofile-use=" + profile_dir, "-fprofile-correction", "-Wno-missing-profile"])
+        build_ext.run(self)
+
+    def _set_profile_args(self, profile_args):  # type: (list) -> None
+        for ext in self.extensions:
+            ext.extra_compile_args = compile_args + profile_args
+            ext.extra_link_args = link_args + profile_args
+
+
 setup(
     name="ahserver",
     description="a simple http server.",
@@ -64,7 +123,8 @@ setup(
         "Topic :: Utilities",
     ],
     packages=find_packages(exclude=["example"]),
-    ext_modules=cythonize([ahparser, h2ext]),
+    ext_modules=cythonize([ahparser, h2ext], compiler_directives=compiler_directives),
+    cmdclass={"build_ext": BuildExt},
     install_requires=["six"],
     extras_require={"uvloop": ["uvloop"], "asgi": ["asgiref"]},
     entry_points={
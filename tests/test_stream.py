@@ -0,0 +1,64 @@
+# encoding=utf-8
+
+import asyncio
+import unittest
+
+from ahserver.util.stream import StreamIO
+
+
+class StreamIOTest(unittest.TestCase):
+    """请求 body stream: 数据到达即可读取, 不必等待 body 结束"""
+
+    def run_async(self, coroutine):
+        return asyncio.run(asyncio.wait_for(coroutine, 5))
+
+    def test_read1_before_eof(self):
+        async def main():
+            stream = StreamIO()
+            reader = asyncio.get_running_loop().create_task(stream.read1())
+            await asyncio.sleep(0)
+            stream.write(b"abc")
+            stream.write(b"def")
+            self.assertEqual(await reader, b"abc")
+            self.assertEqual(await stream.read1(), b"def")
+            stream.eof_received()
+            self.assertEqual(await stream.read1(), b"")
+
+        self.run_async(main())
+
+    def test_read_and_readline_before_eof(self):
+        async def main():
+            stream = StreamIO(spool_threshold=1024)
+            loop = asyncio.get_running_loop()
+            reader = loop.create_task(stream.read(4))
+            await asyncio.sleep(0)
+            stream.write(b"ab")
+            await asyncio.sleep(0)
+            self.assertFalse(reader.done())
+            stream.write(b"cd\nef")
+            self.assertEqual(await reader, b"abcd")
+            self.assertEqual(await stream.readline(), b"\n")
+            reader = loop.create_task(stream.readline())
+            await asyncio.sleep(0)
+            stream.write(b"g\n")
+            self.assertEqual(await reader, b"efg\n")
+            stream.eof_received()
+            self.assertEqual(await stream.read(), b"")
+
+        self.run_async(main())
+
+    def test_spooled_body(self):
+        async def main():
+            stream = StreamIO(spool_threshold=16)
+            data = bytes(range(256)) * 4096
+            for offset in range(0, len(data), 10000):
+                stream.write(data[offset:offset + 10000])
+            stream.eof_received()
+            self.assertEqual(await stream.read(), data)
+            self.assertEqual(await stream.read1(), b"")
+
+        self.run_async(main())
+
+
+if __name__ == "__main__":
+    unittest.main()